@@ -1,14 +1,22 @@
 import numpy as np
 import pickle
 import os
-import re
+import sys
 from tensorflow import keras
 from tensorflow.keras.preprocessing.sequence import pad_sequences
 
+# Repo root, for the text normalizer shared with model_training
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from model_training.model.normalizer import TextNormalizer
+
 
 class SpamClassifier:
-    def __init__(self, model_path=None, tokenizer_path=None, max_length=100):
+    def __init__(self, model_path=None, tokenizer_path=None, max_length=100, batch_size=256,
+                 max_input_length=None):
         self.max_length = max_length
+        self.batch_size = batch_size
+        self.normalizer = TextNormalizer(max_input_length)
         
         # Default paths
         if model_path is None:
@@ -38,18 +46,7 @@ class SpamClassifier:
         print("Spam classifier initialized successfully!")
     
     def clean_text(self, text):
-        if not isinstance(text, str):
-            return ""
-        
-        text = text.lower()
-        text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
-        text = re.sub(r'\S+@\S+', '', text)
-        text = re.sub(r'\b\d{10,}\b', '', text)
-        text = re.sub(r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b', '', text)
-        text = re.sub(r'[^a-z\s]', ' ', text)
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        return text
+        return self.normalizer.normalize(text)
     
     def preprocess(self, text):
         cleaned = self.clean_text(text)
@@ -64,6 +61,29 @@ class SpamClassifier:
         
         return padded
     
+    def preprocess_batch(self, texts):
+        cleaned = self.normalizer.normalize_batch(texts)
+        sequences = self.tokenizer.texts_to_sequences(cleaned)
+        
+        padded = pad_sequences(
+            sequences, 
+            maxlen=self.max_length, 
+            padding='post', 
+            truncating='post',
+            dtype='int32'
+        )
+        
+        return padded
+    
+    def _format_result(self, probability):
+        is_spam = probability > 0.5
+        
+        return {
+            'prediction': 'spam' if is_spam else 'ham',
+            'confidence': float(probability if is_spam else 1 - probability),
+            'spam_probability': float(probability)
+        }
+    
     def predict(self, text):
         cleaned = self.clean_text(text)
         print(f"DEBUG: Cleaned text: {cleaned}")
@@ -81,21 +101,27 @@ class SpamClassifier:
         probability = self.model.predict(padded, verbose=0)[0][0]
         print(f"DEBUG: Probability: {probability}")
         
-        is_spam = probability > 0.5
-        
-        return {
-            'prediction': 'spam' if is_spam else 'ham',
-            'confidence': float(probability if is_spam else 1 - probability),
-            'spam_probability': float(probability)
-        }
+        return self._format_result(probability)
     
-    def predict_batch(self, texts):
-        results = []
+    def predict_batch(self, texts, batch_size=None):
+        texts = list(texts)
+        if not texts:
+            return []
+        
+        batch_size = batch_size or self.batch_size
+        
+        # One tokenizer pass and one padded int32 matrix for the whole list
+        input_data = self.preprocess_batch(texts)
+        probabilities = np.empty(len(input_data), dtype=np.float32)
         
-        for text in texts:
-            results.append(self.predict(text))
+        # Run the CNN chunk by chunk so memory stays bounded for large inboxes
+        for start in range(0, len(input_data), batch_size):
+            chunk = input_data[start:start + batch_size]
+            probabilities[start:start + len(chunk)] = np.asarray(
+                self.model.predict_on_batch(chunk)
+            ).reshape(-1)
         
-        return results
+        return [self._format_result(probability) for probability in probabilities]
 
 
 # Example usage
@@ -49,37 +49,118 @@ async function detectNewEmail(container) {
     showProcessingIndicator();
 
     try {
-        const response = await fetch(`${CONFIG.API_URL}/generate-response`, {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify({ email: emailContent })
-        });
+        await streamResponse(emailContent, extractSenderEmail());
+    } catch (error) {
+        console.error('Error calling API:', error);
+        removeProcessingIndicator();
+        showErrorNotification();
+    }
+}
 
-        const data = await response.json();
+// Reads /generate-response/stream and renders the suggestion as tokens arrive
+async function streamResponse(emailContent, senderEmail) {
+    const response = await fetch(`${CONFIG.API_URL}/generate-response/stream`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({ email: emailContent, sender: senderEmail })
+    });
 
-        removeProcessingIndicator();
+    if (!response.ok || !response.body) {
+        throw new Error(`Stream request failed with status ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let suggestion = null;
+
+    const handlers = {
+        spam: (data) => {
+            if (data.is_spam) {
+                removeProcessingIndicator();
+                showSpamNotification(data.spam_confidence);
+            }
+        },
+        classification: (data) => {
+            removeProcessingIndicator();
+            suggestion = suggestion || showResponseSuggestion('', data);
+            suggestion?.setClassification(data);
+        },
+        token: (data) => {
+            removeProcessingIndicator();
+            suggestion = suggestion || showResponseSuggestion('', null);
+            suggestion?.append(data.text);
+        },
+        validation: (data) => {
+            suggestion?.setValidation(data);
+        },
+        done: (data) => {
+            removeProcessingIndicator();
+            if (data.is_spam) {
+                return;
+            }
+            if (!data.success) {
+                console.error('Response generation failed:', data.error);
+                suggestion?.remove();
+                showErrorNotification(`Error: ${data.error || 'Failed to generate response'}`);
+            } else if (data.response) {
+                suggestion = suggestion || showResponseSuggestion('', data.classification);
+                suggestion?.finish(data.response);
+            } else {
+                console.error('No response generated:', data);
+                showErrorNotification('No response was generated. Please check the server logs.');
+            }
+        }
+    };
 
-        if (data.is_spam) {
-            showSpamNotification(data.spam_confidence);
-        } else if (!data.success) {
-            console.error('Response generation failed:', data.error);
-            showErrorNotification(`Error: ${data.error || 'Failed to generate response'}`);
-        } else if (data.response) {
-            showResponseSuggestion(data.response, data.classification);
-        } else {
-            console.error('No response generated:', data);
-            showErrorNotification('No response was generated. Please check the server logs.');
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) {
+            break;
         }
+
+        buffer += decoder.decode(value, { stream: true });
+
+        // SSE frames are separated by a blank line
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const frame = parseSSEFrame(buffer.slice(0, boundary));
+            buffer = buffer.slice(boundary + 2);
+
+            if (frame && handlers[frame.event]) {
+                handlers[frame.event](frame.data);
+            }
+        }
+    }
+}
+
+function parseSSEFrame(frame) {
+    let event = 'message';
+    const dataLines = [];
+
+    for (const line of frame.split('\n')) {
+        if (line.startsWith('event:')) {
+            event = line.slice(6).trim();
+        } else if (line.startsWith('data:')) {
+            dataLines.push(line.slice(5).trimStart());
+        }
+    }
+
+    if (!dataLines.length) {
+        return null;
+    }
+
+    try {
+        return { event, data: JSON.parse(dataLines.join('\n')) };
     } catch (error) {
-        console.error('Error calling API:', error);
-        removeProcessingIndicator();
-        showErrorNotification();
+        console.error('Malformed stream event:', frame);
+        return null;
     }
 }
 
-function extractEmailContent() {
+function findEmailBody() {
     const selectors = [
         '.a3s.aiL',  
         '[data-message-id] .a3s',
@@ -89,13 +170,26 @@ function extractEmailContent() {
     for (const selector of selectors) {
         const element = document.querySelector(selector);
         if (element) {
-            return element.innerText || element.textContent;
+            return element;
         }
     }
 
     return null;
 }
 
+function extractEmailContent() {
+    const element = findEmailBody();
+    return element ? (element.innerText || element.textContent) : null;
+}
+
+// Sender address from Gmail's message header, not from the body text
+function extractSenderEmail() {
+    const body = findEmailBody();
+    const message = body && body.closest('[data-message-id], .adn');
+    const sender = (message || document).querySelector('.gD[email]');
+    return sender ? sender.getAttribute('email') : null;
+}
+
 function showProcessingIndicator() {
     const indicator = document.createElement('div');
     indicator.id = 'cs-assistant-processing';
@@ -135,7 +229,7 @@ function showResponseSuggestion(response, classification) {
 
     if (!replyArea) {
         console.error('Could not find reply area');
-        return;
+        return null;
     }
 
     // Create suggestion box
@@ -145,14 +239,15 @@ function showResponseSuggestion(response, classification) {
         <div class="cs-suggestion-container">
             <div class="cs-suggestion-header">
                 <h3>AI-Generated Response Suggestion</h3>
-                <span class="cs-badge">${classification?.query_type || 'customer_query'}</span>
+                <span class="cs-badge"></span>
             </div>
             <div class="cs-suggestion-body">
-                <pre>${response}</pre>
+                <pre></pre>
             </div>
+            <div class="cs-suggestion-validation"></div>
             <div class="cs-suggestion-actions">
-                <button id="cs-use-response" class="cs-btn cs-btn-primary">Use This Response</button>
-                <button id="cs-edit-response" class="cs-btn cs-btn-secondary">Edit</button>
+                <button id="cs-use-response" class="cs-btn cs-btn-primary" disabled>Use This Response</button>
+                <button id="cs-edit-response" class="cs-btn cs-btn-secondary" disabled>Edit</button>
                 <button id="cs-dismiss" class="cs-btn cs-btn-text">Dismiss</button>
             </div>
         </div>
@@ -160,20 +255,56 @@ function showResponseSuggestion(response, classification) {
 
     replyArea.insertBefore(suggestionBox, replyArea.firstChild);
 
+    const badge = suggestionBox.querySelector('.cs-badge');
+    const body = suggestionBox.querySelector('pre');
+    const validationNote = suggestionBox.querySelector('.cs-suggestion-validation');
+    const actionButtons = suggestionBox.querySelectorAll('#cs-use-response, #cs-edit-response');
+
+    // textContent keeps streamed model output from being parsed as HTML
+    badge.textContent = classification?.query_type || 'customer_query';
+    body.textContent = response;
+
     // Add event listeners
     document.getElementById('cs-use-response')?.addEventListener('click', () => {
-        copyToReply(response);
+        copyToReply(body.textContent);
         suggestionBox.remove();
     });
 
     document.getElementById('cs-edit-response')?.addEventListener('click', () => {
-        copyToReply(response);
+        copyToReply(body.textContent);
         suggestionBox.remove();
     });
 
     document.getElementById('cs-dismiss')?.addEventListener('click', () => {
         suggestionBox.remove();
     });
+
+    const suggestion = {
+        append(text) {
+            body.textContent += text;
+        },
+        setClassification(data) {
+            badge.textContent = data?.query_type || 'customer_query';
+        },
+        setValidation(data) {
+            if (data && !data.is_valid && data.issues?.length) {
+                validationNote.textContent = `Review before sending: ${data.issues.join('; ')}`;
+            }
+        },
+        finish(text) {
+            body.textContent = text;
+            actionButtons.forEach((button) => { button.disabled = false; });
+        },
+        remove() {
+            suggestionBox.remove();
+        }
+    };
+
+    if (response) {
+        suggestion.finish(response);
+    }
+
+    return suggestion;
 }
 
 function copyToReply(text) {
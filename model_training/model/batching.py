@@ -0,0 +1,141 @@
+import threading
+import time
+import queue
+from collections import Counter
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """Collects single predict calls from many threads into one forward pass.
+
+    Requests wait at most ``max_wait_ms`` for company; a batch is dispatched
+    as soon as it reaches ``max_batch_size`` or the wait expires.
+    """
+
+    def __init__(self, classifier, max_batch_size=32, max_wait_ms=5.0):
+        self.classifier = classifier
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+
+        self._requests = 0
+        self._batches = 0
+        self._max_queue_depth = 0
+        self._batch_sizes = Counter()
+        self._total_wait = 0.0
+        self._total_inference = 0.0
+
+        self._worker = threading.Thread(
+            target=self._run,
+            name='spam-micro-batcher',
+            daemon=True
+        )
+        self._worker.start()
+
+    def submit(self, text):
+        future = Future()
+
+        # Checked under the lock close() takes, so nothing lands behind the shutdown marker
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed")
+            self._queue.put((text, future, time.perf_counter()))
+            self._requests += 1
+            self._max_queue_depth = max(self._max_queue_depth, self._queue.qsize())
+
+        return future
+
+    def predict(self, text, timeout=None):
+        return self.submit(text).result(timeout=timeout)
+
+    def predict_batch(self, texts, batch_size=None):
+        # Callers that already hold a batch skip the queue entirely
+        return self.classifier.predict_batch(texts, batch_size=batch_size)
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+
+        items = [first]
+        deadline = time.perf_counter() + self.max_wait
+
+        while len(items) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Put the shutdown marker back so the loop exits after this batch
+                self._queue.put(None)
+                break
+            items.append(item)
+
+        return items
+
+    def _run(self):
+        while True:
+            items = self._collect()
+            if items is None:
+                return
+
+            texts = [text for text, _, _ in items]
+            started = time.perf_counter()
+
+            try:
+                results = self.classifier.predict_batch(texts, batch_size=len(texts))
+            except Exception as e:
+                for _, future, _ in items:
+                    future.set_exception(e)
+                results = None
+
+            finished = time.perf_counter()
+
+            if results is not None:
+                results = list(results)
+                for (_, future, _), result in zip(items, results):
+                    future.set_result(result)
+                # A short result list must not leave callers waiting forever
+                for _, future, _ in items[len(results):]:
+                    future.set_exception(RuntimeError(
+                        f"predict_batch returned {len(results)} results for {len(items)} texts"
+                    ))
+
+            with self._lock:
+                self._batches += 1
+                self._batch_sizes[len(items)] += 1
+                self._total_wait += sum(started - enqueued for _, _, enqueued in items)
+                self._total_inference += finished - started
+
+    def stats(self):
+        with self._lock:
+            batches = self._batches
+            served = sum(size * count for size, count in self._batch_sizes.items())
+
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self._max_queue_depth,
+                "requests": self._requests,
+                "batches": batches,
+                "avg_batch_size": served / batches if batches else 0.0,
+                "max_batch_size_seen": max(self._batch_sizes) if self._batch_sizes else 0,
+                "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+                "avg_queue_wait_ms": 1000 * self._total_wait / served if served else 0.0,
+                "avg_inference_ms": 1000 * self._total_inference / batches if batches else 0.0,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000
+            }
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._worker.join()
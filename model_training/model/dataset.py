@@ -0,0 +1,154 @@
+import json
+import os
+import numpy as np
+
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+SHARDS_DIR = os.path.join(DATA_DIR, 'shards')
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_PATH = os.path.join(SHARDS_DIR, MANIFEST_NAME)
+
+RANDOM_STATE = 42
+
+
+class BinaryShardWriter:
+    """Writes padded sequences and labels as fixed-width .npy shards plus a manifest.
+
+    Each shard is an int32 ``(rows, max_length)`` matrix and an int32 label
+    vector. The manifest is written last, so readers never see a
+    half-written dataset.
+    """
+
+    def __init__(self, output_dir=SHARDS_DIR, max_length=100):
+        self.output_dir = output_dir
+        self.max_length = max_length
+        self.splits = {}
+        os.makedirs(output_dir, exist_ok=True)
+
+    def write(self, split, sequences, labels, shard_index=None):
+        sequences = np.ascontiguousarray(sequences, dtype=np.int32)
+        labels = np.ascontiguousarray(labels, dtype=np.int32)
+
+        if sequences.ndim != 2 or sequences.shape[1] != self.max_length:
+            raise ValueError(f"Expected sequences of shape (rows, {self.max_length}), got {sequences.shape}")
+        if len(sequences) != len(labels):
+            raise ValueError("Sequences and labels must have the same number of rows")
+
+        shards = self.splits.setdefault(split, [])
+        if shard_index is None:
+            shard_index = len(shards)
+
+        name = f'{split}_{shard_index:05d}'
+        np.save(os.path.join(self.output_dir, f'{name}_X.npy'), sequences)
+        np.save(os.path.join(self.output_dir, f'{name}_y.npy'), labels)
+
+        shards.append({
+            'X': f'{name}_X.npy',
+            'y': f'{name}_y.npy',
+            'rows': int(len(sequences)),
+            'positives': int(labels.sum())
+        })
+
+    def close(self):
+        manifest = {
+            'format': 'int32-npy-shards',
+            'max_length': self.max_length,
+            'splits': {
+                split: sorted(shards, key=lambda shard: shard['X'])
+                for split, shards in self.splits.items()
+            }
+        }
+
+        path = os.path.join(self.output_dir, MANIFEST_NAME)
+        with open(path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        print(f"Binary dataset manifest written to: {path}")
+        return path
+
+
+def load_manifest(manifest_path=MANIFEST_PATH):
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    manifest['root'] = os.path.dirname(os.path.abspath(manifest_path))
+    return manifest
+
+
+def open_shards(split, manifest_path=MANIFEST_PATH):
+    """Memory-map every (X, y) shard of a split without reading it into RAM."""
+    manifest = load_manifest(manifest_path)
+
+    return [
+        (
+            np.load(os.path.join(manifest['root'], shard['X']), mmap_mode='r'),
+            np.load(os.path.join(manifest['root'], shard['y']), mmap_mode='r')
+        )
+        for shard in manifest['splits'].get(split, [])
+    ]
+
+
+def load_arrays(split, manifest_path=MANIFEST_PATH):
+    """Whole split as in-memory arrays; a single shard stays memory-mapped."""
+    shards = open_shards(split, manifest_path)
+
+    if len(shards) == 1:
+        return shards[0]
+
+    X = np.concatenate([X for X, _ in shards])
+    y = np.concatenate([y for _, y in shards])
+    return X, y
+
+
+def _holdout_mask(rows, shard_index, validation_fraction, seed):
+    # Fixed per shard, so a row stays on the same side of the split every epoch
+    rng = np.random.default_rng([seed, shard_index])
+    return rng.random(rows) < validation_fraction
+
+
+def make_tf_dataset(split='train', manifest_path=MANIFEST_PATH, batch_size=64, shuffle=True,
+                    seed=RANDOM_STATE, validation_fraction=0.0, subset=None):
+    """Streaming tf.data pipeline over the memory-mapped shards of one split.
+
+    Batches are gathered from one shard at a time, so only the current
+    batch is ever copied out of the mapped files. ``subset`` selects the
+    'training' or 'validation' rows of a ``validation_fraction`` holdout.
+    """
+    import tensorflow as tf
+
+    manifest = load_manifest(manifest_path)
+    max_length = manifest['max_length']
+    shards = open_shards(split, manifest_path)
+
+    if subset not in (None, 'training', 'validation'):
+        raise ValueError("subset must be None, 'training' or 'validation'")
+
+    # Created once so every epoch draws a fresh shard and row order
+    rng = np.random.default_rng(seed)
+
+    def generator():
+        order = rng.permutation(len(shards)) if shuffle else range(len(shards))
+
+        for shard_index in order:
+            X, y = shards[shard_index]
+            rows = np.arange(len(X))
+
+            if subset is not None and validation_fraction > 0:
+                holdout = _holdout_mask(len(X), shard_index, validation_fraction, seed)
+                rows = rows[holdout] if subset == 'validation' else rows[~holdout]
+
+            if shuffle:
+                rows = rng.permutation(rows)
+
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                yield X[batch], y[batch]
+
+    dataset = tf.data.Dataset.from_generator(
+        generator,
+        output_signature=(
+            tf.TensorSpec(shape=(None, max_length), dtype=tf.int32),
+            tf.TensorSpec(shape=(None,), dtype=tf.int32)
+        )
+    )
+
+    return dataset.prefetch(tf.data.AUTOTUNE)
@@ -0,0 +1,117 @@
+import json
+import numpy as np
+
+try:
+    from .inference import LAYERS_KEY, DEFAULT_MODEL_PATHS, NumpyBackend
+except ImportError:
+    from inference import LAYERS_KEY, DEFAULT_MODEL_PATHS, NumpyBackend
+
+
+# Layer config keys the NumPy runtime needs to replay the forward pass
+LAYER_CONFIG_KEYS = ('activation', 'padding', 'strides', 'pool_size', 'epsilon')
+
+
+def _short_weight_name(weight):
+    # 'conv1d_1/kernel:0' (Keras 2) and 'kernel' (Keras 3) both map to 'kernel'
+    return weight.name.split('/')[-1].split(':')[0]
+
+
+def _layer_config(layer):
+    config = layer.get_config()
+    exported = {}
+
+    for key in LAYER_CONFIG_KEYS:
+        if key not in config:
+            continue
+        value = config[key]
+        if isinstance(value, (list, tuple)):
+            value = value[0]
+        exported[key] = value
+
+    return exported
+
+
+def export_numpy_weights(model, output_path=None):
+    """Dump a trained Keras model into a flat .npz archive for NumpyBackend."""
+    if output_path is None:
+        output_path = DEFAULT_MODEL_PATHS['numpy']
+
+    layers = []
+    arrays = {}
+
+    for layer in model.layers:
+        layers.append({
+            'name': layer.name,
+            'type': layer.__class__.__name__,
+            'config': _layer_config(layer)
+        })
+        for weight in layer.weights:
+            key = f"{layer.name}/{_short_weight_name(weight)}"
+            arrays[key] = np.asarray(weight.numpy(), dtype=np.float32)
+
+    arrays[LAYERS_KEY] = np.array(json.dumps(layers))
+
+    print(f"Exporting {len(arrays) - 1} weight arrays to: {output_path}")
+    np.savez(output_path, **arrays)
+
+    return output_path
+
+
+def export_tflite(model, output_path=None):
+    import tensorflow as tf
+
+    if output_path is None:
+        output_path = DEFAULT_MODEL_PATHS['tflite']
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    tflite_model = converter.convert()
+
+    print(f"Exporting TFLite model to: {output_path}")
+    with open(output_path, 'wb') as f:
+        f.write(tflite_model)
+
+    return output_path
+
+
+def check_parity(model, backend, sequences, atol=1e-4):
+    """Compare backend probabilities against the Keras model on the same inputs."""
+    expected = np.asarray(model.predict(sequences, verbose=0)).reshape(-1)
+    actual = backend.predict(sequences)
+
+    max_diff = float(np.max(np.abs(expected - actual)))
+    agreement = float(np.mean((expected > 0.5) == (actual > 0.5)))
+
+    print(f"Max abs probability difference: {max_diff:.2e} (tolerance {atol:.0e})")
+    print(f"Label agreement: {agreement:.2%}")
+
+    return max_diff <= atol
+
+
+def sample_sequences(model, count=256, max_length=100, seed=42):
+    """Random padded sequences covering the whole vocabulary."""
+    vocab_size = model.layers[0].get_config()['input_dim']
+    rng = np.random.default_rng(seed)
+
+    sequences = rng.integers(1, vocab_size, size=(count, max_length), dtype=np.int32)
+    lengths = rng.integers(1, max_length + 1, size=count)
+    sequences[np.arange(max_length) >= lengths[:, None]] = 0
+
+    return sequences
+
+
+if __name__ == "__main__":
+    from tensorflow import keras
+
+    model = keras.models.load_model(DEFAULT_MODEL_PATHS['keras'])
+
+    weights_path = export_numpy_weights(model)
+    export_tflite(model)
+
+    print("\nChecking NumPy backend parity...")
+    backend = NumpyBackend(weights_path)
+    sequences = sample_sequences(model)
+
+    if check_parity(model, backend, sequences):
+        print("NumPy backend matches the Keras model.")
+    else:
+        raise SystemExit("NumPy backend diverges from the Keras model!")
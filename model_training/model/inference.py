@@ -0,0 +1,249 @@
+import json
+import os
+import threading
+import numpy as np
+
+
+SAVED_MODELS_DIR = os.path.join(os.path.dirname(__file__), 'saved_models')
+
+DEFAULT_MODEL_PATHS = {
+    'keras': os.path.join(SAVED_MODELS_DIR, 'spam_classifier.h5'),
+    'tf_function': os.path.join(SAVED_MODELS_DIR, 'spam_classifier.h5'),
+    'tflite': os.path.join(SAVED_MODELS_DIR, 'spam_classifier.tflite'),
+    'tflite_int8': os.path.join(SAVED_MODELS_DIR, 'spam_classifier_int8.tflite'),
+    'numpy': os.path.join(SAVED_MODELS_DIR, 'spam_classifier.npz'),
+}
+
+LAYERS_KEY = '__layers__'
+
+
+class KerasBackend:
+    """Runs the saved .h5 model through Keras."""
+
+    def __init__(self, model_path, max_length=100):
+        from tensorflow import keras
+
+        self.model = keras.models.load_model(model_path)
+
+    def predict(self, sequences):
+        return np.asarray(self.model.predict_on_batch(sequences)).reshape(-1)
+
+
+class TFFunctionBackend:
+    """Traces the Keras model once into a tf.function with a fixed signature."""
+
+    def __init__(self, model_path, max_length=100):
+        import tensorflow as tf
+        from tensorflow import keras
+
+        self._tf = tf
+        self.model = keras.models.load_model(model_path)
+        self._forward = tf.function(
+            lambda x: self.model(x, training=False),
+            input_signature=[tf.TensorSpec([None, max_length], tf.int32)]
+        )
+
+    def predict(self, sequences):
+        outputs = self._forward(self._tf.constant(sequences, dtype=self._tf.int32))
+        return outputs.numpy().reshape(-1)
+
+
+def _load_tflite_interpreter():
+    # Prefer the standalone runtime so serving does not need full TensorFlow
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        import tensorflow as tf
+        Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+
+class TFLiteBackend:
+    """Runs a converted .tflite flatbuffer."""
+
+    def __init__(self, model_path, max_length=100, num_threads=None):
+        Interpreter = _load_tflite_interpreter()
+
+        self.interpreter = Interpreter(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch_size = None
+        # Interpreters are not thread safe
+        self._lock = threading.Lock()
+
+    def _quantize_input(self, sequences):
+        dtype = self._input['dtype']
+        scale, zero_point = self._input.get('quantization', (0.0, 0))
+        if scale and np.issubdtype(dtype, np.integer):
+            sequences = np.round(sequences / scale + zero_point)
+        return sequences.astype(dtype)
+
+    def _dequantize_output(self, outputs):
+        scale, zero_point = self._output.get('quantization', (0.0, 0))
+        if scale and np.issubdtype(outputs.dtype, np.integer):
+            return (outputs.astype(np.float32) - zero_point) * scale
+        return outputs.astype(np.float32)
+
+    def predict(self, sequences):
+        with self._lock:
+            if self._batch_size != len(sequences):
+                self.interpreter.resize_tensor_input(self._input['index'], sequences.shape)
+                self.interpreter.allocate_tensors()
+                self._batch_size = len(sequences)
+
+            self.interpreter.set_tensor(self._input['index'], self._quantize_input(sequences))
+            self.interpreter.invoke()
+            outputs = self.interpreter.get_tensor(self._output['index'])
+
+        return self._dequantize_output(outputs).reshape(-1)
+
+
+# NumPy runtime
+
+def _activation(x, name):
+    if name in (None, 'linear'):
+        return x
+    if name == 'relu':
+        return np.maximum(x, 0)
+    if name == 'sigmoid':
+        return 1.0 / (1.0 + np.exp(-x))
+    if name == 'tanh':
+        return np.tanh(x)
+    if name == 'softmax':
+        e = np.exp(x - x.max(axis=-1, keepdims=True))
+        return e / e.sum(axis=-1, keepdims=True)
+    raise ValueError(f"Unsupported activation: {name}")
+
+
+def _conv1d(x, kernel, bias, padding):
+    kernel_size = kernel.shape[0]
+
+    if padding == 'same':
+        left = (kernel_size - 1) // 2
+        x = np.pad(x, ((0, 0), (left, kernel_size - 1 - left), (0, 0)))
+
+    out_length = x.shape[1] - kernel_size + 1
+    if out_length <= 0:
+        raise ValueError("Sequence shorter than convolution kernel")
+
+    # Sum of one matmul per kernel tap instead of materialising im2col windows
+    out = x[:, :out_length, :] @ kernel[0]
+    for k in range(1, kernel_size):
+        out += x[:, k:k + out_length, :] @ kernel[k]
+
+    if bias is not None:
+        out += bias
+    return out
+
+
+def _max_pool1d(x, pool_size, strides, padding):
+    if padding != 'valid':
+        raise ValueError(f"Unsupported pooling padding: {padding}")
+
+    if strides == pool_size:
+        out_length = x.shape[1] // pool_size
+        x = x[:, :out_length * pool_size, :]
+        return x.reshape(x.shape[0], out_length, pool_size, x.shape[2]).max(axis=2)
+
+    windows = np.lib.stride_tricks.sliding_window_view(x, pool_size, axis=1)
+    return windows[:, ::strides].max(axis=-1)
+
+
+class NumpyBackend:
+    """Forward pass of the exported CNN using only NumPy.
+
+    Reads the flat weight archive written by ``export.export_numpy_weights``
+    and replays the layer stack in inference mode (dropout is a no-op and
+    batch norm uses its moving statistics).
+    """
+
+    def __init__(self, model_path, max_length=100):
+        with np.load(model_path, allow_pickle=False) as archive:
+            self.layers = json.loads(str(archive[LAYERS_KEY]))
+            self.weights = {
+                key: archive[key] for key in archive.files if key != LAYERS_KEY
+            }
+
+        self.dtype = np.float32
+
+    def _weight(self, layer, name):
+        return self.weights.get(f"{layer['name']}/{name}")
+
+    def forward(self, sequences):
+        x = np.asarray(sequences)
+
+        for layer in self.layers:
+            kind = layer['type']
+            config = layer['config']
+
+            if kind == 'Embedding':
+                x = self._weight(layer, 'embeddings')[x]
+            elif kind == 'Conv1D':
+                x = _conv1d(
+                    x,
+                    self._weight(layer, 'kernel'),
+                    self._weight(layer, 'bias'),
+                    config.get('padding', 'valid')
+                )
+                x = _activation(x, config.get('activation'))
+            elif kind == 'MaxPooling1D':
+                x = _max_pool1d(
+                    x,
+                    config['pool_size'],
+                    config.get('strides') or config['pool_size'],
+                    config.get('padding', 'valid')
+                )
+            elif kind == 'GlobalMaxPooling1D':
+                x = x.max(axis=1)
+            elif kind == 'GlobalAveragePooling1D':
+                x = x.mean(axis=1)
+            elif kind == 'Flatten':
+                x = x.reshape(x.shape[0], -1)
+            elif kind == 'Dense':
+                x = x @ self._weight(layer, 'kernel')
+                bias = self._weight(layer, 'bias')
+                if bias is not None:
+                    x = x + bias
+                x = _activation(x, config.get('activation'))
+            elif kind == 'BatchNormalization':
+                mean = self._weight(layer, 'moving_mean')
+                variance = self._weight(layer, 'moving_variance')
+                gamma = self._weight(layer, 'gamma')
+                beta = self._weight(layer, 'beta')
+
+                x = (x - mean) / np.sqrt(variance + config.get('epsilon', 1e-3))
+                if gamma is not None:
+                    x = x * gamma
+                if beta is not None:
+                    x = x + beta
+            elif kind in ('Dropout', 'SpatialDropout1D', 'InputLayer'):
+                continue
+            elif kind == 'Activation':
+                x = _activation(x, config.get('activation'))
+            else:
+                raise ValueError(f"Unsupported layer type for NumPy backend: {kind}")
+
+        return x.astype(self.dtype, copy=False)
+
+    def predict(self, sequences):
+        return self.forward(sequences).reshape(-1)
+
+
+BACKENDS = {
+    'keras': KerasBackend,
+    'tf_function': TFFunctionBackend,
+    'tflite': TFLiteBackend,
+    'tflite_int8': TFLiteBackend,
+    'numpy': NumpyBackend,
+}
+
+
+def load_backend(name, model_path=None, max_length=100):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{name}'. Choose from: {', '.join(BACKENDS)}")
+
+    if model_path is None:
+        model_path = DEFAULT_MODEL_PATHS[name]
+
+    return BACKENDS[name](model_path, max_length=max_length)
@@ -0,0 +1,176 @@
+import json
+import os
+import numpy as np
+
+try:
+    from .export import export_numpy_weights
+    from .inference import SAVED_MODELS_DIR, NumpyBackend
+    from .normalizer import TextNormalizer, clean_texts
+    from .vocabulary import DATA_DIR, Vocabulary
+except ImportError:
+    from export import export_numpy_weights
+    from inference import SAVED_MODELS_DIR, NumpyBackend
+    from normalizer import TextNormalizer, clean_texts
+    from vocabulary import DATA_DIR, Vocabulary
+
+
+INTENT_CSV = os.path.join(DATA_DIR, 'intents.csv')
+INTENT_VOCAB_PATH = os.path.join(DATA_DIR, 'intent_vocab.npy')
+INTENT_MODEL_PATH = os.path.join(SAVED_MODELS_DIR, 'intent_classifier.h5')
+INTENT_WEIGHTS_PATH = os.path.join(SAVED_MODELS_DIR, 'intent_classifier.npz')
+INTENT_LABELS_PATH = os.path.join(SAVED_MODELS_DIR, 'intent_labels.json')
+
+# Values of src.schemas.QueryType; the trained label order is saved with the model
+INTENT_LABELS = [
+    'product_return', 'refund_request', 'product_damage', 'delivery_issue',
+    'product_inquiry', 'warranty_claim', 'general', 'other'
+]
+
+MAX_WORDS = 10000
+MAX_SEQUENCE_LENGTH = 100
+MAX_KEYWORDS = 5
+
+
+def load_intent_data(filepath=INTENT_CSV):
+    """Labelled emails with 'Message' and 'Intent' columns, cleaned like the spam data."""
+    import pandas as pd
+
+    print(f"Loading intent data from {filepath}...")
+    df = pd.read_csv(filepath)
+
+    valid_intents = df['Intent'].isin(INTENT_LABELS)
+    invalid_count = (~valid_intents).sum()
+    if invalid_count > 0:
+        print(f"\nWarning: Found {invalid_count} rows with unknown intents. Removing them...")
+        df = df[valid_intents]
+
+    df['cleaned_message'] = clean_texts(df['Message'].tolist())
+    df = df[df['cleaned_message'].str.len() > 0]
+
+    print(f"\nIntent distribution:\n{df['Intent'].value_counts()}")
+
+    return df
+
+
+def create_intent_model(vocab_size, num_classes, max_length=MAX_SEQUENCE_LENGTH):
+    """Small version of the spam CNN with a softmax head over the intents."""
+    from tensorflow import keras
+    from tensorflow.keras import layers
+
+    model = keras.Sequential([
+        keras.Input(shape=(max_length,), dtype='int32'),
+        layers.Embedding(input_dim=vocab_size, output_dim=64),
+        layers.Conv1D(filters=128, kernel_size=3, activation='relu'),
+        layers.GlobalMaxPooling1D(),
+        layers.Dropout(0.5),
+        layers.Dense(64, activation='relu'),
+        layers.Dense(num_classes, activation='softmax')
+    ])
+
+    model.compile(
+        optimizer='adam',
+        loss='sparse_categorical_crossentropy',
+        metrics=['accuracy']
+    )
+
+    return model
+
+
+def train_intent_model(filepath=INTENT_CSV, epochs=20, batch_size=32,
+                       model_path=INTENT_MODEL_PATH, weights_path=INTENT_WEIGHTS_PATH,
+                       vocab_path=INTENT_VOCAB_PATH, labels_path=INTENT_LABELS_PATH):
+    """Train the intent CNN with the spam pipeline's tokenizer and export it for NumpyBackend."""
+    from sklearn.model_selection import train_test_split
+    from tensorflow.keras.callbacks import EarlyStopping
+
+    try:
+        from .preprocessing import create_tokenizer, preprocess_texts, TEST_SIZE, RANDOM_STATE
+    except ImportError:
+        from preprocessing import create_tokenizer, preprocess_texts, TEST_SIZE, RANDOM_STATE
+
+    df = load_intent_data(filepath)
+
+    labels = [label for label in INTENT_LABELS if label in set(df['Intent'])]
+    y = df['Intent'].map({label: i for i, label in enumerate(labels)}).values.astype(np.int32)
+
+    tokenizer = create_tokenizer(df['cleaned_message'].values, MAX_WORDS)
+    X = preprocess_texts(tokenizer, df['cleaned_message'].values, MAX_SEQUENCE_LENGTH).astype(np.int32)
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y,
+        test_size=TEST_SIZE,
+        random_state=RANDOM_STATE,
+        stratify=y
+    )
+
+    vocab_size = min(len(tokenizer.word_index) + 1, MAX_WORDS)
+    model = create_intent_model(vocab_size, len(labels))
+
+    model.fit(
+        X_train, y_train,
+        batch_size=batch_size,
+        epochs=epochs,
+        validation_split=0.1,
+        callbacks=[EarlyStopping(monitor='val_loss', patience=3, restore_best_weights=True)],
+        verbose=1
+    )
+
+    test_loss, test_accuracy = model.evaluate(X_test, y_test, verbose=0)
+    print(f"\nIntent test accuracy: {test_accuracy:.4f}")
+
+    print(f"Saving intent model to: {model_path}")
+    model.save(model_path)
+    export_numpy_weights(model, weights_path)
+    Vocabulary.from_keras_tokenizer(tokenizer).save(vocab_path)
+
+    with open(labels_path, 'w') as f:
+        json.dump(labels, f, indent=2)
+
+    return model, labels
+
+
+class IntentClassifier:
+    """Serves the exported intent CNN with NumPy only, in about a millisecond per email."""
+
+    def __init__(self, weights_path=INTENT_WEIGHTS_PATH, vocab_path=INTENT_VOCAB_PATH,
+                 labels_path=INTENT_LABELS_PATH, max_length=MAX_SEQUENCE_LENGTH):
+        self.max_length = max_length
+        self.normalizer = TextNormalizer()
+        self.backend = NumpyBackend(weights_path, max_length=max_length)
+        self.vocabulary = Vocabulary.load(vocab_path)
+
+        with open(labels_path) as f:
+            self.labels = json.load(f)
+
+    def predict_proba(self, texts):
+        cleaned = self.normalizer.normalize_batch(texts)
+        sequences = self.vocabulary.encode_batch(cleaned, self.max_length)
+        return self.backend.forward(sequences), cleaned
+
+    def _keywords(self, cleaned):
+        # Distinct in-vocabulary words, rarest first (higher index = less frequent in training)
+        index = self.vocabulary.index
+        words = {word: index[word] for word in cleaned.split() if word in index and len(word) > 2}
+        return sorted(words, key=words.get, reverse=True)[:MAX_KEYWORDS]
+
+    def predict_batch(self, texts):
+        probabilities, cleaned = self.predict_proba(list(texts))
+        results = []
+
+        for row, text in zip(probabilities, cleaned):
+            best = int(np.argmax(row))
+            results.append({
+                'intent': self.labels[best],
+                'confidence': float(row[best]),
+                'probabilities': {label: float(p) for label, p in zip(self.labels, row)},
+                'keywords': self._keywords(text)
+            })
+
+        return results
+
+    def predict(self, text):
+        return self.predict_batch([text])[0]
+
+
+if __name__ == "__main__":
+    train_intent_model()
@@ -1,87 +1,163 @@
 import numpy as np
-import pickle
-import os
-import re
-from tensorflow import keras
-from tensorflow.keras.preprocessing.sequence import pad_sequences
+
+try:
+    from .cache import PredictionCache
+    from .inference import load_backend
+    from .normalizer import TextNormalizer
+    from .prefilter import DEFAULT_BAND, PREFILTER_PATH, CascadeStats, HashedNGramModel
+    from .vocabulary import load_tokenizer
+except ImportError:
+    from cache import PredictionCache
+    from inference import load_backend
+    from normalizer import TextNormalizer
+    from prefilter import DEFAULT_BAND, PREFILTER_PATH, CascadeStats, HashedNGramModel
+    from vocabulary import load_tokenizer
 
 
 class SpamClassifier:
-    def __init__(self, model_path=None, tokenizer_path=None, max_length=100):
+    def __init__(self, model_path=None, tokenizer_path=None, max_length=100, batch_size=256,
+                 backend='keras', max_input_length=None, cascade=False, prefilter_path=None,
+                 cascade_band=DEFAULT_BAND, cache_size=0, cache_ttl=3600):
         self.max_length = max_length
+        self.batch_size = batch_size
+        self.backend_name = backend
+        self.normalizer = TextNormalizer(max_input_length)
+        
+        # Backend picks its own default artifact (.h5, .tflite or .npz) when no path is given
+        print(f"Loading {backend} model from: {model_path or 'default path'}")
+        self.backend = load_backend(backend, model_path, max_length=max_length)
+        self.model = getattr(self.backend, 'model', None)
+        
+        # Prefers the memory-mapped vocabulary; a tokenizer.pkl is converted on load
+        print(f"Loading tokenizer from: {tokenizer_path or 'default path'}")
+        self.tokenizer = load_tokenizer(tokenizer_path)
         
-        if model_path is None:
-            model_path = os.path.join(
-                os.path.dirname(__file__), 
-                'saved_models', 
-                'spam_classifier.h5'
-            )
-        
-        if tokenizer_path is None:
-            tokenizer_path = os.path.join(
-                os.path.dirname(__file__), 
-                '..', 
-                'data', 
-                'tokenizer.pkl'
-            )
-        
-        print(f"Loading model from: {model_path}")
-        self.model = keras.models.load_model(model_path)
-        print(f"Loading tokenizer from: {tokenizer_path}")
-        with open(tokenizer_path, 'rb') as f:
-            self.tokenizer = pickle.load(f)
+        # Cascade: the hashed n-gram prefilter settles confident emails and
+        # only scores inside cascade_band reach the CNN
+        self.prefilter = None
+        self.cascade_band = tuple(cascade_band)
+        self.cascade_stats = None
+        if cascade:
+            print(f"Loading prefilter from: {prefilter_path or PREFILTER_PATH}")
+            self.prefilter = HashedNGramModel.load(prefilter_path or PREFILTER_PATH)
+            self.cascade_stats = CascadeStats(self.cascade_band)
+        
+        # Reopened threads re-send identical bodies; cache results by normalized text
+        self.cache = PredictionCache(cache_size, cache_ttl) if cache_size > 0 else None
         
         print("Spam classifier initialized successfully!")
     
     def clean_text(self, text):
-        if not isinstance(text, str):
-            return ""
-        
-        text = text.lower()
-        text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
-        text = re.sub(r'\S+@\S+', '', text)
-        text = re.sub(r'\b\d{10,}\b', '', text)
-        text = re.sub(r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b', '', text)
-        text = re.sub(r'[^a-z\s]', ' ', text)
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        return text
+        return self.normalizer.normalize(text)
     
     def preprocess(self, text):
-        cleaned = self.clean_text(text)
-        sequence = self.tokenizer.texts_to_sequences([cleaned])
-        
-        padded = pad_sequences(
-            sequence, 
-            maxlen=self.max_length, 
-            padding='post', 
-            truncating='post'
-        )
+        return self.preprocess_batch([text])
+    
+    def preprocess_batch(self, texts):
+        cleaned = self.normalizer.normalize_batch(texts)
+        return self.tokenizer.encode_batch(cleaned, self.max_length)
+    
+    def _format_result(self, probability, stage=None):
+        is_spam = probability > 0.5
+        
+        result = {
+            'prediction': 'spam' if is_spam else 'ham',
+            'confidence': float(probability if is_spam else 1 - probability),
+            'spam_probability': float(probability)
+        }
+        if stage:
+            result['stage'] = stage
         
-        return padded
+        return result
     
     def predict(self, text):
+        if self.prefilter is not None or self.cache is not None:
+            return self.predict_batch([text])[0]
+        
         input_data = self.preprocess(text)
         
         # Predict
-        probability = self.model.predict(input_data, verbose=0)[0][0]
+        probability = self.backend.predict(input_data)[0]
         
         # Determine class (threshold = 0.5)
-        is_spam = probability > 0.5
+        return self._format_result(probability)
+    
+    def predict_batch(self, texts, batch_size=None):
+        texts = list(texts)
+        if not texts:
+            return []
         
-        return {
-            'prediction': 'spam' if is_spam else 'ham',
-            'confidence': float(probability if is_spam else 1 - probability),
-            'spam_probability': float(probability)
-        }
+        batch_size = batch_size or self.batch_size
+        cleaned = self.normalizer.normalize_batch(texts)
+        
+        if self.cache is None:
+            return self._predict_cleaned(cleaned, batch_size)
+        
+        keys = [self.cache.key(text) for text in cleaned]
+        results = self.cache.get_many(keys)
+        
+        # Inference only for misses, once per distinct text in the batch
+        missing = {}
+        for i, result in enumerate(results):
+            if result is None:
+                missing.setdefault(keys[i], i)
+        
+        if missing:
+            computed = dict(zip(missing, self._predict_cleaned([cleaned[i] for i in missing.values()], batch_size)))
+            self.cache.put_many(computed.items())
+            results = [result if result is not None else computed[key] for key, result in zip(keys, results)]
+        
+        # Copies, so callers can't mutate the cached entries
+        return [dict(result) for result in results]
     
-    def predict_batch(self, texts):
-        results = []
+    def _predict_cleaned(self, cleaned, batch_size):
+        if self.prefilter is not None:
+            return self._predict_cascade(cleaned, batch_size)
+        
+        # One tokenizer pass and one padded int32 matrix for the whole list
+        input_data = self.tokenizer.encode_batch(cleaned, self.max_length)
+        probabilities = self._run_backend(input_data, batch_size)
         
-        for text in texts:
-            results.append(self.predict(text))
+        return [self._format_result(probability) for probability in probabilities]
+    
+    def _run_backend(self, input_data, batch_size):
+        probabilities = np.empty(len(input_data), dtype=np.float32)
         
-        return results
+        # Run the CNN chunk by chunk so memory stays bounded for large inboxes
+        for start in range(0, len(input_data), batch_size):
+            chunk = input_data[start:start + batch_size]
+            probabilities[start:start + len(chunk)] = self.backend.predict(chunk)
+        
+        return probabilities
+    
+    def _predict_cascade(self, cleaned, batch_size):
+        probabilities = self.prefilter.score_batch(cleaned)
+        
+        low, high = self.cascade_band
+        uncertain = np.flatnonzero((probabilities > low) & (probabilities < high))
+        prefilter_spam = int((probabilities >= high).sum())
+        
+        self.cascade_stats.record(
+            prefilter_ham=len(cleaned) - len(uncertain) - prefilter_spam,
+            prefilter_spam=prefilter_spam,
+            cnn=len(uncertain)
+        )
+        
+        # Only the uncertain rows are tokenized and sent through the CNN
+        if len(uncertain):
+            input_data = self.tokenizer.encode_batch([cleaned[i] for i in uncertain], self.max_length)
+            probabilities[uncertain] = self._run_backend(input_data, batch_size)
+        
+        stages = np.full(len(cleaned), 'prefilter', dtype=object)
+        stages[uncertain] = 'cnn'
+        
+        return [self._format_result(p, stage) for p, stage in zip(probabilities, stages)]
+    
+    def stats(self):
+        return {
+            'cascade': self.cascade_stats.snapshot() if self.cascade_stats else None,
+            'cache': self.cache.stats() if self.cache else None
+        }
 
 
 # Example usage
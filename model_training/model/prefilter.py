@@ -0,0 +1,175 @@
+import json
+import os
+import threading
+import zlib
+import numpy as np
+
+try:
+    from .inference import SAVED_MODELS_DIR
+except ImportError:
+    from inference import SAVED_MODELS_DIR
+
+
+PREFILTER_PATH = os.path.join(SAVED_MODELS_DIR, 'spam_prefilter.npz')
+METADATA_KEY = '__metadata__'
+
+N_FEATURES = 2 ** 18
+NGRAM_RANGE = (1, 2)
+
+# Prefilter probabilities inside (low, high) are sent on to the CNN
+DEFAULT_BAND = (0.05, 0.95)
+
+
+def feature_indices(cleaned_text, n_features=N_FEATURES, ngram_range=NGRAM_RANGE):
+    """Distinct hashed word n-gram buckets of one normalized text.
+
+    Uses crc32 rather than hash() so the buckets are stable across processes
+    and Python versions.
+    """
+    words = cleaned_text.split()
+    min_n, max_n = ngram_range
+    indices = set()
+
+    for n in range(min_n, max_n + 1):
+        for start in range(len(words) - n + 1):
+            gram = ' '.join(words[start:start + n])
+            indices.add(zlib.crc32(gram.encode('utf-8')) % n_features)
+
+    return indices
+
+
+class HashedNGramModel:
+    """Logistic regression over binary hashed word n-grams.
+
+    Scoring is a sum of a few dozen weights, so it costs microseconds per
+    email and needs nothing but NumPy at serve time.
+    """
+
+    def __init__(self, weights, bias, ngram_range=NGRAM_RANGE):
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.bias = float(bias)
+        self.ngram_range = tuple(ngram_range)
+
+    @property
+    def n_features(self):
+        return len(self.weights)
+
+    def score(self, cleaned_text):
+        indices = list(feature_indices(cleaned_text, self.n_features, self.ngram_range))
+        logit = self.bias + float(self.weights[indices].sum())
+        return 1.0 / (1.0 + np.exp(-logit))
+
+    def score_batch(self, cleaned_texts):
+        rows = [feature_indices(text, self.n_features, self.ngram_range) for text in cleaned_texts]
+
+        lengths = np.fromiter(map(len, rows), dtype=np.int64, count=len(rows))
+        flat = np.fromiter((i for row in rows for i in row), dtype=np.int64, count=int(lengths.sum()))
+        row_ids = np.repeat(np.arange(len(rows)), lengths)
+
+        logits = self.bias + np.bincount(row_ids, weights=self.weights[flat], minlength=len(rows))
+        return (1.0 / (1.0 + np.exp(-logits))).astype(np.float32)
+
+    def save(self, path=PREFILTER_PATH):
+        print(f"Saving prefilter ({self.n_features} hashed features) to: {path}")
+        metadata = {'bias': self.bias, 'ngram_range': list(self.ngram_range)}
+        np.savez(path, weights=self.weights, **{METADATA_KEY: np.array(json.dumps(metadata))})
+
+    @classmethod
+    def load(cls, path=PREFILTER_PATH):
+        with np.load(path) as archive:
+            metadata = json.loads(str(archive[METADATA_KEY]))
+            return cls(archive['weights'], metadata['bias'], metadata['ngram_range'])
+
+
+def featurize(cleaned_texts, n_features=N_FEATURES, ngram_range=NGRAM_RANGE):
+    """Sparse binary design matrix with the same buckets HashedNGramModel scores."""
+    from scipy.sparse import csr_matrix
+
+    indptr = [0]
+    indices = []
+    for text in cleaned_texts:
+        indices.extend(sorted(feature_indices(text, n_features, ngram_range)))
+        indptr.append(len(indices))
+
+    data = np.ones(len(indices), dtype=np.float32)
+    return csr_matrix((data, indices, indptr), shape=(len(cleaned_texts), n_features))
+
+
+def train_prefilter(cleaned_texts, labels, n_features=N_FEATURES, ngram_range=NGRAM_RANGE, C=1.0):
+    from sklearn.linear_model import LogisticRegression
+
+    print(f"\nTraining hashed n-gram prefilter on {len(cleaned_texts)} texts...")
+    X = featurize(cleaned_texts, n_features, ngram_range)
+
+    classifier = LogisticRegression(C=C, solver='liblinear', max_iter=1000)
+    classifier.fit(X, np.asarray(labels))
+
+    return HashedNGramModel(classifier.coef_[0], classifier.intercept_[0], ngram_range)
+
+
+def band_report(model, cleaned_texts, labels, band=DEFAULT_BAND):
+    """How much traffic the prefilter settles on its own, and how accurately."""
+    scores = model.score_batch(cleaned_texts)
+    labels = np.asarray(labels)
+    low, high = band
+
+    decided = (scores <= low) | (scores >= high)
+    predictions = (scores >= high).astype(labels.dtype)
+
+    return {
+        'band': [low, high],
+        'samples': int(len(labels)),
+        'prefilter_rate': float(decided.mean()) if len(labels) else 0.0,
+        'prefilter_accuracy': float((predictions[decided] == labels[decided]).mean()) if decided.any() else None,
+        'prefilter_only_accuracy': float(((scores > 0.5) == labels).mean()) if len(labels) else None
+    }
+
+
+class CascadeStats:
+    """Thread-safe counters for which stage settled each prediction."""
+
+    def __init__(self, band):
+        self.band = band
+        self._lock = threading.Lock()
+        self._prefilter_ham = 0
+        self._prefilter_spam = 0
+        self._cnn = 0
+
+    def record(self, prefilter_ham, prefilter_spam, cnn):
+        with self._lock:
+            self._prefilter_ham += prefilter_ham
+            self._prefilter_spam += prefilter_spam
+            self._cnn += cnn
+
+    def snapshot(self):
+        with self._lock:
+            ham, spam, cnn = self._prefilter_ham, self._prefilter_spam, self._cnn
+
+        total = ham + spam + cnn
+        return {
+            'band': list(self.band),
+            'requests': total,
+            'prefilter_ham': ham,
+            'prefilter_spam': spam,
+            'cnn': cnn,
+            'prefilter_hit_rate': (ham + spam) / total if total else 0.0,
+            'cnn_rate': cnn / total if total else 0.0
+        }
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    try:
+        from .preprocessing import PREPROCESSED_TRAIN, PREPROCESSED_TEST
+    except ImportError:
+        from preprocessing import PREPROCESSED_TRAIN, PREPROCESSED_TEST
+
+    train_df = pd.read_csv(PREPROCESSED_TRAIN, keep_default_na=False)
+    test_df = pd.read_csv(PREPROCESSED_TEST, keep_default_na=False)
+
+    model = train_prefilter(train_df['cleaned_message'].tolist(), train_df['label'].values)
+    model.save()
+
+    for band in [(0.02, 0.98), DEFAULT_BAND, (0.1, 0.9), (0.2, 0.8)]:
+        print(band_report(model, test_df['cleaned_message'].tolist(), test_df['label'].values, band))
@@ -1,12 +1,22 @@
 import pandas as pd
 import numpy as np
-import re
 import pickle
 from sklearn.model_selection import train_test_split
 from tensorflow.keras.preprocessing.text import Tokenizer
 from tensorflow.keras.preprocessing.sequence import pad_sequences
 import os
 
+try:
+    from .normalizer import clean_text, clean_texts
+    from .vocabulary import VOCAB_PATH, Vocabulary
+    from .dataset import SHARDS_DIR, BinaryShardWriter
+    from .prefilter import PREFILTER_PATH, band_report, train_prefilter
+except ImportError:
+    from normalizer import clean_text, clean_texts
+    from vocabulary import VOCAB_PATH, Vocabulary
+    from dataset import SHARDS_DIR, BinaryShardWriter
+    from prefilter import PREFILTER_PATH, band_report, train_prefilter
+
 
 # Configuration
 DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
@@ -21,21 +31,6 @@ TEST_SIZE = 0.2
 RANDOM_STATE = 42
 
 
-def clean_text(text):
-    if not isinstance(text, str):
-        return ""
-    
-    text = text.lower()
-    text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
-    text = re.sub(r'\S+@\S+', '', text)
-    text = re.sub(r'\b\d{10,}\b', '', text)
-    text = re.sub(r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b', '', text)
-    text = re.sub(r'[^a-z\s]', ' ', text)
-    text = re.sub(r'\s+', ' ', text).strip()
-    
-    return text
-
-
 def load_and_clean_data(filepath):
     print(f"Loading data from {filepath}...")
     df = pd.read_csv(filepath)
@@ -51,7 +46,7 @@ def load_and_clean_data(filepath):
         df = df[valid_categories]
     
     print("\nCleaning text...")
-    df['cleaned_message'] = df['Message'].apply(clean_text)
+    df['cleaned_message'] = clean_texts(df['Message'].tolist())
     
     df = df[df['cleaned_message'].str.len() > 0]
     
@@ -88,6 +83,23 @@ def save_tokenizer(tokenizer, filepath):
     print("Tokenizer saved successfully!")
 
 
+def parse_sequence(seq_str):
+    """Parse a padded sequence stored as a stringified array in the preprocessed CSVs."""
+    seq_str = seq_str.replace('[', '').replace(']', '').strip()
+    return np.array([int(x) for x in seq_str.split() if x], dtype=np.int32)
+
+
+def load_preprocessed_split(filepath):
+    """Load a preprocessed CSV back into an int32 sequence matrix and label vector."""
+    print(f"Loading preprocessed data from {filepath}...")
+    df = pd.read_csv(filepath)
+    
+    X = np.stack(df['sequence'].apply(parse_sequence).values).astype(np.int32)
+    y = df['label'].values.astype(np.int32)
+    
+    return X, y
+
+
 def preprocess_dataset():
     df = load_and_clean_data(TRAIN_CSV)
     
@@ -117,7 +129,18 @@ def preprocess_dataset():
     print(f"Train data saved to: {PREPROCESSED_TRAIN}")
     print(f"Test data saved to: {PREPROCESSED_TEST}")
     
+    shard_writer = BinaryShardWriter(SHARDS_DIR, MAX_SEQUENCE_LENGTH)
+    shard_writer.write('train', train_sequences, train_df['label'].values)
+    shard_writer.write('test', test_sequences, test_df['label'].values)
+    shard_writer.close()
+    
     save_tokenizer(tokenizer, TOKENIZER_PATH)
+    Vocabulary.from_keras_tokenizer(tokenizer).save(VOCAB_PATH)
+    
+    # Cheap first stage of the serving cascade, trained on the same split
+    prefilter = train_prefilter(train_df['cleaned_message'].tolist(), train_df['label'].values)
+    prefilter.save(PREFILTER_PATH)
+    print(f"Prefilter on test set: {band_report(prefilter, test_df['cleaned_message'].tolist(), test_df['label'].values)}")
     
     print("\n" + "="*50)
     print("Preprocessing completed successfully!")
@@ -129,4 +152,17 @@ def preprocess_dataset():
 
 
 if __name__ == "__main__":
-    preprocess_dataset()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Preprocess the spam dataset.")
+    parser.add_argument('--streaming', action='store_true',
+                        help="Chunked, multi-process mode for corpora that do not fit in memory")
+    parser.add_argument('--chunksize', type=int, default=50000)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+    
+    if args.streaming:
+        from streaming import preprocess_dataset_streaming
+        preprocess_dataset_streaming(chunksize=args.chunksize, workers=args.workers)
+    else:
+        preprocess_dataset()
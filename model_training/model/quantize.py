@@ -0,0 +1,156 @@
+import json
+import os
+import time
+import numpy as np
+from sklearn.metrics import accuracy_score, f1_score
+
+try:
+    from .inference import DEFAULT_MODEL_PATHS, SAVED_MODELS_DIR, load_backend
+    from .preprocessing import PREPROCESSED_TEST, load_preprocessed_split
+    from .dataset import MANIFEST_PATH, load_arrays
+except ImportError:
+    from inference import DEFAULT_MODEL_PATHS, SAVED_MODELS_DIR, load_backend
+    from preprocessing import PREPROCESSED_TEST, load_preprocessed_split
+    from dataset import MANIFEST_PATH, load_arrays
+
+
+REPORT_PATH = os.path.join(SAVED_MODELS_DIR, 'quantization_report.json')
+
+CALIBRATION_SAMPLES = 500
+LATENCY_RUNS = 500
+RANDOM_STATE = 42
+
+
+def calibration_samples(X, count=CALIBRATION_SAMPLES, seed=RANDOM_STATE):
+    """Random subset of the test split used to calibrate activation ranges."""
+    rng = np.random.default_rng(seed)
+    indices = rng.permutation(len(X))[:count]
+    return X[indices]
+
+
+def quantize_int8(model, calibration_data, output_path=None):
+    """Post-training full-integer quantization of the Keras model to a TFLite artifact.
+
+    Weights and activations are int8. The input stays int32 token ids and the
+    output stays float, so TFLiteBackend can serve it without extra glue.
+    """
+    import tensorflow as tf
+
+    if output_path is None:
+        output_path = DEFAULT_MODEL_PATHS['tflite_int8']
+
+    def representative_dataset():
+        for sequence in calibration_data:
+            yield [sequence[None, :].astype(np.int32)]
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+
+    tflite_model = converter.convert()
+
+    print(f"Saving int8 model to: {output_path}")
+    with open(output_path, 'wb') as f:
+        f.write(tflite_model)
+
+    return output_path
+
+
+def measure_latency(backend, X, runs=LATENCY_RUNS):
+    """Single-email latency in milliseconds, the path a /classify-email request takes."""
+    backend.predict(X[:1])
+
+    timings = []
+    for i in range(runs):
+        sample = X[i % len(X)][None, :]
+        started = time.perf_counter()
+        backend.predict(sample)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    return float(np.percentile(timings, 50)), float(np.percentile(timings, 99))
+
+
+def evaluate_backend(backend, X, y, batch_size=256):
+    probabilities = np.concatenate([
+        backend.predict(X[start:start + batch_size])
+        for start in range(0, len(X), batch_size)
+    ])
+    predictions = (probabilities > 0.5).astype(np.int32)
+
+    p50, p99 = measure_latency(backend, X)
+
+    return {
+        "accuracy": float(accuracy_score(y, predictions)),
+        "f1": float(f1_score(y, predictions, zero_division=0)),
+        "latency_p50_ms": p50,
+        "latency_p99_ms": p99,
+    }, probabilities
+
+
+def build_report(variants, X, y):
+    """Compare each (name -> (backend, artifact path)) variant against the first one."""
+    report = {"samples": int(len(X)), "variants": {}}
+    reference = None
+
+    for name, (backend, path) in variants.items():
+        print(f"\nEvaluating {name}...")
+        metrics, probabilities = evaluate_backend(backend, X, y)
+        metrics["size_bytes"] = os.path.getsize(path)
+
+        if reference is None:
+            reference = probabilities
+        else:
+            metrics["max_probability_diff"] = float(np.max(np.abs(probabilities - reference)))
+            metrics["label_agreement"] = float(np.mean((probabilities > 0.5) == (reference > 0.5)))
+
+        report["variants"][name] = metrics
+
+    return report
+
+
+def print_report(report):
+    print("\n" + "="*78)
+    print(f"Quantization report ({report['samples']} test samples)")
+    print("="*78)
+    print(f"{'variant':<14}{'accuracy':>10}{'f1':>8}{'p50 ms':>10}{'p99 ms':>10}{'size KB':>11}{'agree':>9}")
+    for name, m in report["variants"].items():
+        agreement = f"{m['label_agreement']:.2%}" if 'label_agreement' in m else '-'
+        print(
+            f"{name:<14}{m['accuracy']:>10.4f}{m['f1']:>8.4f}"
+            f"{m['latency_p50_ms']:>10.3f}{m['latency_p99_ms']:>10.3f}"
+            f"{m['size_bytes'] / 1024:>11.1f}{agreement:>9}"
+        )
+
+
+def quantize_and_report(report_path=REPORT_PATH):
+    from tensorflow import keras
+
+    if os.path.exists(MANIFEST_PATH):
+        X, y = load_arrays('test')
+    else:
+        X, y = load_preprocessed_split(PREPROCESSED_TEST)
+    model = keras.models.load_model(DEFAULT_MODEL_PATHS['keras'])
+
+    calibration = calibration_samples(X)
+    print(f"Calibrating with {len(calibration)} test sequences...")
+    int8_path = quantize_int8(model, calibration)
+
+    max_length = X.shape[1]
+    variants = {
+        'float_keras': (load_backend('keras', max_length=max_length), DEFAULT_MODEL_PATHS['keras']),
+        'int8_tflite': (load_backend('tflite_int8', int8_path, max_length=max_length), int8_path),
+    }
+
+    report = build_report(variants, X, y)
+    print_report(report)
+
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport saved to: {report_path}")
+
+    return report
+
+
+if __name__ == "__main__":
+    quantize_and_report()
@@ -0,0 +1,212 @@
+import os
+import shutil
+import tempfile
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+import numpy as np
+import pandas as pd
+
+try:
+    from .normalizer import clean_texts
+    from .vocabulary import VOCAB_PATH, Vocabulary
+    from .dataset import SHARDS_DIR, BinaryShardWriter
+    from .preprocessing import (
+        TRAIN_CSV, TOKENIZER_PATH, MAX_WORDS, MAX_SEQUENCE_LENGTH,
+        TEST_SIZE, RANDOM_STATE, save_tokenizer
+    )
+except ImportError:
+    from normalizer import clean_texts
+    from vocabulary import VOCAB_PATH, Vocabulary
+    from dataset import SHARDS_DIR, BinaryShardWriter
+    from preprocessing import (
+        TRAIN_CSV, TOKENIZER_PATH, MAX_WORDS, MAX_SEQUENCE_LENGTH,
+        TEST_SIZE, RANDOM_STATE, save_tokenizer
+    )
+
+
+CHUNK_SIZE = 50000
+
+
+def _ordered_map(executor, fn, iterable, max_pending):
+    """Like executor.map, but only reads ahead max_pending items so memory stays bounded."""
+    pending = deque()
+
+    for item in iterable:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+
+    while pending:
+        yield pending.popleft().result()
+
+
+def _clean_chunk(chunk):
+    """Pass 1 worker: filter, clean and count words for one raw CSV chunk."""
+    valid_categories = chunk['Category'].isin(['ham', 'spam'])
+    invalid_count = int((~valid_categories).sum())
+    chunk = chunk[valid_categories]
+
+    cleaned = pd.DataFrame({
+        'Category': chunk['Category'].values,
+        'Message': chunk['Message'].values,
+        'cleaned_message': clean_texts(chunk['Message'].tolist())
+    })
+    cleaned = cleaned[cleaned['cleaned_message'].str.len() > 0]
+    cleaned['label'] = cleaned['Category'].map({'ham': 0, 'spam': 1})
+
+    # Counter keeps first-seen order, which Keras relies on to break count ties
+    words = [text.split() for text in cleaned['cleaned_message']]
+    word_counts = Counter(chain.from_iterable(words))
+    word_docs = Counter(chain.from_iterable(set(seq) for seq in words))
+
+    return cleaned, word_counts, word_docs, invalid_count
+
+
+_worker_vocabulary = None
+
+
+def _init_encoder(words, oov_token):
+    global _worker_vocabulary
+    _worker_vocabulary = Vocabulary(words, oov_token=oov_token)
+
+
+def _encode_chunk(args):
+    """Pass 2 worker: tokenize one cleaned shard and assign rows to train/test."""
+    shard_index, path, max_length = args
+
+    df = pd.read_csv(path, keep_default_na=False)
+    sequences = _worker_vocabulary.encode_batch(df['cleaned_message'].tolist(), max_length)
+
+    # Deterministic per-shard split; stratification holds in expectation
+    rng = np.random.default_rng([RANDOM_STATE, shard_index])
+    is_test = rng.random(len(df)) < TEST_SIZE
+
+    return shard_index, df, sequences, is_test
+
+
+def tokenizer_from_counts(word_counts, word_docs, document_count, max_words=MAX_WORDS):
+    """Build the Keras Tokenizer that fit_on_texts would produce from the same counts."""
+    from tensorflow.keras.preprocessing.text import Tokenizer
+
+    tokenizer = Tokenizer(num_words=max_words, oov_token='<OOV>')
+    tokenizer.word_counts = OrderedDict(word_counts)
+    tokenizer.document_count = document_count
+    tokenizer.word_docs.update(word_docs)
+
+    # Stable sort on count, exactly as Tokenizer.fit_on_texts does
+    wcounts = sorted(word_counts.items(), key=lambda x: x[1], reverse=True)
+    sorted_voc = [tokenizer.oov_token] + [word for word, _ in wcounts]
+
+    tokenizer.word_index = dict(zip(sorted_voc, range(1, len(sorted_voc) + 1)))
+    tokenizer.index_word = {i: word for word, i in tokenizer.word_index.items()}
+    for word, count in word_docs.items():
+        tokenizer.index_docs[tokenizer.word_index[word]] = count
+
+    return tokenizer
+
+
+def write_csv_shard(df, sequences, split, shard_index, output_dir):
+    df = df.copy()
+    df['sequence'] = list(sequences)
+
+    path = os.path.join(output_dir, f'preprocessed_{split}_{shard_index:05d}.csv')
+    df.to_csv(path, index=False)
+
+    return path
+
+
+def write_binary_shards(output_dir):
+    """Writer that appends shards to a BinaryShardWriter; call .close() to write the manifest."""
+    shard_writer = BinaryShardWriter(output_dir, MAX_SEQUENCE_LENGTH)
+
+    def writer(df, sequences, split, shard_index, output_dir):
+        shard_writer.write(split, sequences, df['label'].values, shard_index)
+
+    writer.close = shard_writer.close
+    return writer
+
+
+def preprocess_dataset_streaming(input_csv=TRAIN_CSV, output_dir=SHARDS_DIR, chunksize=CHUNK_SIZE,
+                                 workers=None, writer=None):
+    """Two-pass, chunked version of preprocess_dataset for corpora that do not fit in memory.
+
+    Pass 1 cleans raw chunks in a process pool, spills the cleaned text to
+    temporary shards and merges word counts. Pass 2 re-reads the spilled
+    shards, tokenizes them against the fitted vocabulary and writes train/test
+    output shards as each chunk finishes. By default shards are fixed-width
+    int32 .npy files with a manifest (see dataset.py); pass
+    writer=write_csv_shard for the old CSV layout. Peak memory is a few chunks plus
+    the word counter, independent of corpus size.
+    """
+    workers = workers or os.cpu_count()
+    os.makedirs(output_dir, exist_ok=True)
+    writer = writer or write_binary_shards(output_dir)
+    spill_dir = tempfile.mkdtemp(prefix='cleaned_', dir=output_dir)
+
+    word_counts = Counter()
+    word_docs = Counter()
+    document_count = 0
+    class_counts = Counter()
+    invalid_rows = 0
+    spilled = []
+
+    try:
+        print(f"Pass 1: cleaning {input_csv} in chunks of {chunksize} with {workers} workers...")
+        reader = pd.read_csv(input_csv, usecols=['Category', 'Message'], chunksize=chunksize)
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for cleaned, chunk_counts, chunk_docs, invalid_count in _ordered_map(executor, _clean_chunk, reader, workers * 2):
+                path = os.path.join(spill_dir, f'cleaned_{len(spilled):05d}.csv')
+                cleaned.to_csv(path, index=False)
+                spilled.append(path)
+
+                word_counts.update(chunk_counts)
+                word_docs.update(chunk_docs)
+                document_count += len(cleaned)
+                class_counts.update(cleaned['Category'])
+                invalid_rows += invalid_count
+
+                print(f"  chunk {len(spilled)}: {len(cleaned)} rows, vocabulary {len(word_counts)}")
+
+        if invalid_rows > 0:
+            print(f"\nWarning: Removed {invalid_rows} rows with invalid categories.")
+        print(f"\nRows after cleaning: {document_count}")
+        print(f"Class distribution: {dict(class_counts)}")
+
+        tokenizer = tokenizer_from_counts(word_counts, word_docs, document_count)
+        vocabulary = Vocabulary.from_keras_tokenizer(tokenizer)
+        print(f"Vocabulary size: {len(tokenizer.word_index)}")
+
+        print(f"\nPass 2: tokenizing and writing shards to {output_dir}...")
+        train_rows = test_rows = 0
+        tasks = ((i, path, MAX_SEQUENCE_LENGTH) for i, path in enumerate(spilled))
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_encoder,
+            initargs=(np.asarray(vocabulary.words), vocabulary.oov_token)
+        ) as executor:
+            for shard_index, df, sequences, is_test in _ordered_map(executor, _encode_chunk, tasks, workers * 2):
+                writer(df[~is_test], sequences[~is_test], 'train', shard_index, output_dir)
+                writer(df[is_test], sequences[is_test], 'test', shard_index, output_dir)
+
+                train_rows += int((~is_test).sum())
+                test_rows += int(is_test.sum())
+
+        print(f"Train size: {train_rows}")
+        print(f"Test size: {test_rows}")
+
+        if hasattr(writer, 'close'):
+            writer.close()
+
+        save_tokenizer(tokenizer, TOKENIZER_PATH)
+        vocabulary.save(VOCAB_PATH)
+    finally:
+        shutil.rmtree(spill_dir, ignore_errors=True)
+
+    print("\n" + "="*50)
+    print("Streaming preprocessing completed successfully!")
+    print("="*50)
+
+    return tokenizer
@@ -0,0 +1,171 @@
+import json
+import os
+import pickle
+from itertools import chain, repeat
+import numpy as np
+
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+VOCAB_PATH = os.path.join(DATA_DIR, 'tokenizer_vocab.npy')
+TOKENIZER_PKL_PATH = os.path.join(DATA_DIR, 'tokenizer.pkl')
+
+# Keras Tokenizer defaults, kept so word splitting matches texts_to_sequences
+DEFAULT_FILTERS = '!"#$%&()*+,-./:;<=>?@[\\]^_`{|}~\t\n'
+
+
+def _metadata_path(path):
+    return os.path.splitext(path)[0] + '.json'
+
+
+class Vocabulary:
+    """Compact, array-backed replacement for a fitted Keras Tokenizer.
+
+    ``words[i]`` is the word with index ``i`` (index 0 is padding), truncated
+    to the ``num_words`` entries the model was trained with. On disk it is a
+    fixed-width unicode ``.npy`` array that loads via memory mapping, plus a
+    small JSON sidecar with the OOV and word-splitting settings.
+    """
+
+    def __init__(self, words, oov_token='<OOV>', lower=True, filters=DEFAULT_FILTERS, split=' '):
+        self.words = words
+        self.oov_token = oov_token
+        self.lower = lower
+        self.filters = filters
+        self.split = split
+
+        self.oov_index = None
+        if oov_token is not None:
+            self.oov_index = int(np.flatnonzero(words == oov_token)[0])
+
+        # Hash index built once over the mapped array; cheaper per word than
+        # converting every query word into a NumPy string for searchsorted
+        self.index = {word: i for i, word in enumerate(words.tolist()) if i > 0}
+        self._translate = str.maketrans({c: split for c in filters})
+
+    @property
+    def size(self):
+        return len(self.words)
+
+    @classmethod
+    def from_keras_tokenizer(cls, tokenizer):
+        num_words = tokenizer.num_words or len(tokenizer.word_index) + 1
+        words = [''] * min(num_words, len(tokenizer.word_index) + 1)
+
+        for word, i in tokenizer.word_index.items():
+            if i < len(words):
+                words[i] = word
+
+        width = max(len(word) for word in words)
+
+        return cls(
+            np.array(words, dtype=f'U{width}'),
+            oov_token=tokenizer.oov_token,
+            lower=tokenizer.lower,
+            filters=tokenizer.filters,
+            split=tokenizer.split
+        )
+
+    def save(self, path=VOCAB_PATH):
+        print(f"Saving vocabulary ({self.size} entries) to {path}...")
+        np.save(path, self.words)
+
+        with open(_metadata_path(path), 'w') as f:
+            json.dump({
+                'oov_token': self.oov_token,
+                'lower': self.lower,
+                'filters': self.filters,
+                'split': self.split,
+                'size': self.size
+            }, f, indent=2)
+
+    @classmethod
+    def load(cls, path=VOCAB_PATH, mmap=True):
+        with open(_metadata_path(path)) as f:
+            metadata = json.load(f)
+
+        words = np.load(path, mmap_mode='r' if mmap else None)
+
+        return cls(
+            words,
+            oov_token=metadata['oov_token'],
+            lower=metadata['lower'],
+            filters=metadata['filters'],
+            split=metadata['split']
+        )
+
+    def text_to_words(self, text):
+        if self.lower:
+            text = text.lower()
+        return list(filter(None, text.translate(self._translate).split(self.split)))
+
+    def texts_to_sequences(self, texts):
+        """Same output as Keras ``Tokenizer.texts_to_sequences``."""
+        get = self.index.get
+        oov_index = self.oov_index
+
+        if oov_index is None:
+            return [
+                [i for i in map(get, self.text_to_words(text)) if i is not None]
+                for text in texts
+            ]
+
+        return [
+            list(map(get, words, repeat(oov_index, len(words))))
+            for words in map(self.text_to_words, texts)
+        ]
+
+    def encode_batch(self, texts, max_length):
+        """Tokenize and post-pad/truncate a batch straight into an int32 matrix."""
+        sequences = [sequence[:max_length] for sequence in self.texts_to_sequences(texts)]
+
+        lengths = np.fromiter(map(len, sequences), dtype=np.int64, count=len(sequences))
+        flat = np.fromiter(chain.from_iterable(sequences), dtype=np.int32, count=int(lengths.sum()))
+
+        padded = np.zeros((len(sequences), max_length), dtype=np.int32)
+        padded[np.arange(max_length) < lengths[:, None]] = flat
+
+        return padded
+
+
+def load_tokenizer(path=None):
+    """Load a Vocabulary from the compact format, or convert a pickled Keras Tokenizer."""
+    if path is None:
+        path = VOCAB_PATH if os.path.exists(VOCAB_PATH) else TOKENIZER_PKL_PATH
+
+    if path.endswith('.pkl'):
+        with open(path, 'rb') as f:
+            return Vocabulary.from_keras_tokenizer(pickle.load(f))
+
+    return Vocabulary.load(path)
+
+
+def verify_conversion(tokenizer, vocabulary, texts):
+    """Return the texts whose sequences differ between the Keras tokenizer and the vocabulary."""
+    expected = tokenizer.texts_to_sequences(texts)
+    actual = vocabulary.texts_to_sequences(texts)
+
+    return [text for text, a, b in zip(texts, expected, actual) if a != b]
+
+
+def convert_tokenizer(pickle_path=TOKENIZER_PKL_PATH, output_path=VOCAB_PATH, texts=None):
+    with open(pickle_path, 'rb') as f:
+        tokenizer = pickle.load(f)
+
+    vocabulary = Vocabulary.from_keras_tokenizer(tokenizer)
+
+    if texts is None:
+        # Every known word, including ones past num_words that must map to OOV
+        texts = list(tokenizer.word_index) + ['unseenword ' + ' '.join(list(tokenizer.word_index)[:50])]
+
+    mismatches = verify_conversion(tokenizer, vocabulary, texts)
+    if mismatches:
+        raise ValueError(f"{len(mismatches)} texts tokenize differently after conversion")
+
+    print(f"Verified identical sequences on {len(texts)} texts")
+    vocabulary.save(output_path)
+
+    return vocabulary
+
+
+if __name__ == "__main__":
+    convert_tokenizer()
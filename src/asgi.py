@@ -0,0 +1,289 @@
+import asyncio
+import os
+import sys
+from quart import Quart, request, jsonify, make_response
+from quart_cors import cors
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.spam import SPAM_BATCH_SIZE, spam_classifier, spam_batcher, apredict_spam
+from src.async_workflow import aprocess_email, astream_email
+from src.workflow import semantic_cache, llm_cache
+from src.sse import SSE_HEADERS, sse_event, spam_event
+from src.bulk import parse_bulk_request, aprocess_bulk, ndjson_line
+from src.async_database import get_async_database
+from src.database import get_database
+from src.orders import order_lookup
+
+load_dotenv()
+
+# Async twin of src/server.py: LLM and MongoDB waits no longer hold a worker
+# thread, so one process keeps hundreds of emails in flight.
+# Run with: uvicorn src.asgi:app --port 5000
+app = cors(Quart(__name__))
+
+
+@app.before_serving
+async def connect_database():
+    # motor binds to the running event loop, so connect once serving starts
+    get_async_database()
+
+
+@app.after_serving
+async def close_database():
+    get_async_database().close()
+
+
+@app.route('/health', methods=['GET'])
+async def health_check():
+    """Health check endpoint."""
+    return jsonify({
+        "status": "healthy",
+        "spam_classifier": spam_classifier is not None,
+        "async": True,
+        "version": "1.0.0"
+    })
+
+
+@app.route('/metrics', methods=['GET'])
+async def metrics():
+    """Runtime stats for tuning the inference path."""
+    return jsonify({
+        "spam_batcher": spam_batcher.stats() if spam_batcher else None,
+        "spam_classifier": spam_classifier.stats() if spam_classifier else None,
+        "semantic_cache": semantic_cache.stats() if semantic_cache else None,
+        "llm_cache": llm_cache.stats() if llm_cache else None,
+        "catalog_snapshot": get_database().snapshot.stats() if get_database().snapshot else None,
+        "order_cache": order_lookup.cache.stats()
+    })
+
+
+@app.route('/cache/invalidate', methods=['POST'])
+async def invalidate_cache():
+    """Drop cached replies, e.g. after editing policies outside MongoDB.
+
+    Body (optional): {"query_type": "refund_request"} to clear one type only.
+    """
+    if not semantic_cache:
+        return jsonify({"error": "Semantic cache not enabled"}), 400
+
+    data = await request.get_json(silent=True) or {}
+    removed = semantic_cache.invalidate(data.get('query_type'))
+
+    return jsonify({"invalidated": removed})
+
+
+@app.route('/catalog/invalidate', methods=['POST'])
+async def invalidate_catalog():
+    """Reload the in-memory policy/product snapshot after editing MongoDB."""
+    db = get_database()
+
+    if db.snapshot is None:
+        return jsonify({"error": "Catalog snapshot not enabled"}), 400
+
+    await asyncio.to_thread(db.invalidate_snapshot)
+
+    return jsonify({"catalog_snapshot": db.snapshot.stats()})
+
+
+@app.route('/classify-email', methods=['POST'])
+async def classify_email():
+
+    try:
+        data = await request.get_json()
+
+        if not data or 'email' not in data:
+            return jsonify({"error": "Missing 'email' in request body"}), 400
+
+        if not spam_classifier:
+            return jsonify({"error": "Spam classifier not initialized"}), 500
+
+        result = await apredict_spam(data['email'])
+
+        return jsonify(result)
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/classify-email/batch', methods=['POST'])
+async def classify_email_batch():
+
+    try:
+        data = await request.get_json()
+
+        if not data or 'emails' not in data:
+            return jsonify({"error": "Missing 'emails' in request body"}), 400
+
+        emails = data['emails']
+
+        if not isinstance(emails, list):
+            return jsonify({"error": "'emails' must be a list"}), 400
+
+        if not spam_classifier:
+            return jsonify({"error": "Spam classifier not initialized"}), 500
+
+        batch_size = data.get('batch_size')
+        if batch_size is None:
+            batch_size = SPAM_BATCH_SIZE
+        elif not isinstance(batch_size, int) or isinstance(batch_size, bool) or batch_size < 1:
+            return jsonify({"error": "'batch_size' must be a positive integer"}), 400
+
+        # CPU-bound inference runs off the event loop
+        results = await asyncio.to_thread(spam_classifier.predict_batch, emails, batch_size)
+
+        return jsonify({
+            "results": results,
+            "count": len(results)
+        })
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/generate-response', methods=['POST'])
+async def generate_response():
+
+    try:
+        data = await request.get_json()
+
+        if not data or 'email' not in data:
+            return jsonify({"error": "Missing 'email' in request body"}), 400
+
+        if not isinstance(data.get('sender') or '', str):
+            return jsonify({"error": "'sender' must be a string"}), 400
+
+        email_text = data['email']
+        # The sender's address from the mail client, used to look up their orders
+        sender = data.get('sender')
+
+        # Step 1: Check if spam
+        if spam_classifier:
+            spam_result = await apredict_spam(email_text)
+
+            if spam_result['prediction'] == 'spam':
+                return jsonify({
+                    "is_spam": True,
+                    "spam_confidence": spam_result['confidence'],
+                    "response": None,
+                    "message": "Email classified as spam. No response generated.",
+                    "success": True
+                })
+        else:
+            spam_result = {"prediction": "ham", "confidence": 0.5}
+
+        result = await aprocess_email(email_text, sender_email=sender)
+
+        if not result.get('success'):
+            error_msg = result.get('error', 'Unknown error during response generation')
+            print(f"Response generation failed: {error_msg}")
+            return jsonify({
+                "is_spam": False,
+                "spam_confidence": 1 - spam_result.get('spam_probability', 0.5),
+                "response": None,
+                "success": False,
+                "error": error_msg,
+                "timings": result.get('timings')
+            }), 500
+
+        return jsonify({
+            "is_spam": False,
+            "spam_confidence": 1 - spam_result.get('spam_probability', 0.5),
+            "response": result.get('response'),
+            "classification": result.get('classification'),
+            "validation": result.get('validation'),
+            "timings": result.get('timings'),
+            "success": True
+        })
+
+    except Exception as e:
+        error_msg = f"Server error: {str(e)}"
+        print(f"Server error: {error_msg}")
+        return jsonify({
+            "is_spam": False,
+            "response": None,
+            "success": False,
+            "error": error_msg
+        }), 500
+
+
+@app.route('/generate-response/stream', methods=['POST'])
+async def generate_response_stream():
+    """Server-sent events: spam, classification, token..., validation, done."""
+    data = await request.get_json(silent=True)
+
+    if not data or 'email' not in data:
+        return jsonify({"error": "Missing 'email' in request body"}), 400
+
+    if not isinstance(data.get('sender') or '', str):
+        return jsonify({"error": "'sender' must be a string"}), 400
+
+    email_text = data['email']
+    sender = data.get('sender')
+
+    async def events():
+        try:
+            if spam_classifier:
+                event, spam = spam_event(await apredict_spam(email_text))
+                yield sse_event(event, spam)
+
+                if spam['is_spam']:
+                    yield sse_event("done", {
+                        **spam,
+                        "response": None,
+                        "message": "Email classified as spam. No response generated.",
+                        "success": True
+                    })
+                    return
+
+            async for event, payload in astream_email(email_text, sender_email=sender):
+                yield sse_event(event, payload)
+
+        except Exception as e:
+            print(f"Server error: {e}")
+            yield sse_event("done", {"response": None, "success": False, "error": f"Server error: {str(e)}"})
+
+    response = await make_response(events(), SSE_HEADERS)
+    response.mimetype = 'text/event-stream'
+    # Long generations must not hit Quart's default response timeout
+    response.timeout = None
+    return response
+
+
+@app.route('/process-emails/bulk', methods=['POST'])
+async def process_emails_bulk():
+    """Process a whole inbox; streams one NDJSON record per email as it finishes.
+
+    Body: {"emails": [str | {"id": ..., "email": str, "sender": str}], "mode": ..., "concurrency": n}
+    Spam is filtered in one vectorized pass and returned first, without LLM work.
+    """
+    data = await request.get_json(silent=True)
+
+    try:
+        emails, mode, concurrency = parse_bulk_request(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    async def records():
+        async for record in aprocess_bulk(emails, mode, concurrency):
+            yield ndjson_line(record)
+
+    response = await make_response(records(), SSE_HEADERS)
+    response.mimetype = 'application/x-ndjson'
+    response.timeout = None
+    return response
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    port = int(os.getenv('FLASK_PORT', 5000))
+
+    print("\n" + "="*70)
+    print("Gmail Customer Service Backend Server (async)")
+    print("="*70)
+    print(f"Server running on: http://localhost:{port}")
+    print("="*70 + "\n")
+
+    uvicorn.run(app, host='0.0.0.0', port=port)
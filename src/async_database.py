@@ -0,0 +1,192 @@
+import asyncio
+import os
+from typing import Dict, Any, List, Optional
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+
+from .database import (
+    DatabaseConnector, ORDER_PROJECTION, SERVER_SELECTION_TIMEOUT_MS, get_database, name_prefix_query,
+    recent_orders_pipeline
+)
+
+load_dotenv()
+
+
+class AsyncDatabaseConnector(DatabaseConnector):
+    """DatabaseConnector over motor, for the async workflow.
+
+    MongoDB lookups are coroutines; the pure helpers (refund maths, damage
+    protocols, defaults) are inherited unchanged.
+    """
+
+    def __init__(self):
+        self.mongo_uri = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
+        self.db_name = os.getenv('MONGODB_DATABASE', 'customer_service_db')
+
+        try:
+            self.client = AsyncIOMotorClient(self.mongo_uri, serverSelectionTimeoutMS=SERVER_SELECTION_TIMEOUT_MS)
+            self.db = self.client[self.db_name]
+
+            # Collections
+            self.products = self.db['products']
+            self.policies = self.db['policies']
+            self.orders = self.db['orders']
+
+            print(f"Connected to MongoDB (async): {self.db_name}")
+        except Exception as e:
+            print(f"MongoDB connection error: {e}")
+            self.client = None
+            self.db = None
+
+        # Snapshot lookups never touch the network, so share the sync connector's
+        self.snapshot = get_database().snapshot
+
+    async def get_return_policy(self, product_category: str = None) -> Dict[str, Any]:
+
+        if self.db is None:
+            return self._get_default_return_policy()
+
+        try:
+            query = {"policy_type": "return"}
+            if product_category:
+                query["category"] = product_category
+
+            if self._use_snapshot():
+                policy = self.snapshot.return_policy(product_category)
+            else:
+                policy = await self.policies.find_one(query)
+
+            if policy:
+                return {
+                    "policy_type": "return",
+                    "days_allowed": policy.get('days_allowed', 30),
+                    "conditions": policy.get('conditions', []),
+                    "refund_percentage": policy.get('refund_percentage', 100),
+                    "details": policy.get('details', '')
+                }
+        except Exception as e:
+            print(f"Error fetching return policy: {e}")
+
+        return self._get_default_return_policy()
+
+    async def check_product_returnable(self, product_id: str = None, product_category: str = None) -> Dict[str, Any]:
+
+        if self.db is None:
+            return {"returnable": True, "conditions": ["Within 30 days", "Unused condition"]}
+
+        try:
+            query = {}
+            if product_id:
+                query["product_id"] = product_id
+            elif product_category:
+                query["category"] = product_category
+
+            if self._use_snapshot():
+                product = self.snapshot.product(product_id, product_category)
+            else:
+                product = await self.products.find_one(query)
+
+            if product:
+                return {
+                    "returnable": product.get('returnable', True),
+                    "return_window_days": product.get('return_window', 30),
+                    "conditions": product.get('return_conditions', []),
+                    "restocking_fee": product.get('restocking_fee', 0)
+                }
+        except Exception as e:
+            print(f"Error checking product returnability: {e}")
+
+        return {"returnable": True, "return_window_days": 30, "conditions": []}
+
+    async def get_product_info(self, product_id: str = None,
+                               product_name: str = None) -> Optional[Dict[str, Any]]:
+
+        if self.db is None:
+            return None
+
+        try:
+            query = {}
+            if product_id:
+                query["product_id"] = product_id
+            elif product_name:
+                query = name_prefix_query(product_name)
+                if query is None:
+                    return None
+
+            if self._use_snapshot():
+                product = self.snapshot.product(product_id) if product_id else \
+                    self.snapshot.product_by_name(product_name) if product_name else self.snapshot.product()
+            else:
+                product = await self.products.find_one(query, sort=[("name_lower", 1)] if "name_lower" in query else None)
+
+            if product:
+                return {
+                    "product_id": product.get('product_id'),
+                    "name": product.get('name'),
+                    "category": product.get('category'),
+                    "price": product.get('price'),
+                    "warranty_months": product.get('warranty_months', 12),
+                    "returnable": product.get('returnable', True)
+                }
+        except Exception as e:
+            print(f"Error fetching product info: {e}")
+
+        return None
+
+    async def get_orders(self, order_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+
+        order_ids = list(dict.fromkeys(oid for oid in order_ids if oid))
+        results = dict.fromkeys(order_ids)
+
+        if self.db is None or not order_ids:
+            return results
+
+        try:
+            async for order in self.orders.find({"order_id": {"$in": order_ids}}, ORDER_PROJECTION):
+                if results.get(order.get('order_id')) is None:
+                    results[order['order_id']] = order
+        except Exception as e:
+            print(f"Error fetching orders: {e}")
+
+        return results
+
+    async def get_orders_by_customer(self, customer_emails: List[str], limit: int = 5) -> Dict[str, List[Dict[str, Any]]]:
+
+        customer_emails = list(dict.fromkeys(email.lower() for email in customer_emails if email))
+        results = {email: [] for email in customer_emails}
+
+        if self.db is None or not customer_emails:
+            return results
+
+        try:
+            async for group in self.orders.aggregate(recent_orders_pipeline(customer_emails, limit)):
+                if group["_id"] in results:
+                    results[group["_id"]] = group["orders"]
+        except Exception as e:
+            print(f"Error fetching orders by customer: {e}")
+            return {}
+
+        return results
+
+    def close(self):
+        """Close database connection; the shared snapshot stays with the sync connector."""
+        if self.client:
+            self.client.close()
+            print("MongoDB connection closed (async)")
+
+
+# Singleton instance
+_async_db_connector = None
+
+def get_async_database():
+    """Get or create the async database connector for the running event loop.
+
+    motor clients are bound to the loop they were first used on, so scripts
+    that call asyncio.run() more than once get a fresh connector per loop.
+    """
+    global _async_db_connector
+    loop = asyncio.get_running_loop()
+    if _async_db_connector is None or _async_db_connector.loop is not loop:
+        _async_db_connector = AsyncDatabaseConnector()
+        _async_db_connector.loop = loop
+    return _async_db_connector
@@ -0,0 +1,247 @@
+import asyncio
+
+from langchain_core.messages import HumanMessage, AIMessage
+
+from .async_database import get_async_database
+from .instrumentation import timed_call
+from .orders import order_lookup
+from .workflow import (
+    EmailProcessingState, EmailWorkflow, NODES, WORKFLOW_MODE, DATABASE_LOOKUP_TYPES,
+    LOOKUPS, RETRIEVAL_PLAN, PREFETCH_LOOKUPS, lookup_default, prefetched_context,
+    llm, intent_classifier, classification_chain, classify_and_respond_chain, semantic_cache,
+    classify_with_intent_model, needs_llm_classification, build_response_prompt,
+    build_email_response, validate_response_node, lookup_cached_response, remember_response,
+    cacheable_response
+)
+
+
+async def classify_with_llm(email: str):
+    with timed_call("llm.classify"):
+        classification = await classification_chain.ainvoke({"email_content": email})
+
+    classification.requires_database_lookup = classification.query_type in DATABASE_LOOKUP_TYPES
+    return classification
+
+
+async def classify_query_node(state: EmailProcessingState) -> EmailProcessingState:
+
+    email = state['email_content']
+    classification = None
+
+    try:
+        # The local model is sub-millisecond CPU work, cheaper inline than in a thread
+        if intent_classifier:
+            classification = classify_with_intent_model(email)
+
+        if needs_llm_classification(classification):
+            if classification_chain:
+                try:
+                    classification = await classify_with_llm(email)
+                except Exception as e:
+                    if classification is None:
+                        raise
+                    print(f"LLM classification failed, keeping local prediction: {e}")
+            elif classification is None:
+                state['error'] = "LLM not initialized. Check API keys OPENAI_API_KEY"
+                return state
+
+        state['classification'] = classification
+        state['messages'] = state.get('messages', []) + [
+            HumanMessage(content=email),
+            AIMessage(content="Classified email")
+        ]
+
+    except Exception as e:
+        error_msg = f"Error classifying email: {str(e)}"
+        print(f"Error classifying email: {error_msg}")
+        state['error'] = error_msg
+
+    return state
+
+
+async def get_damage_protocol(adb, damage_type: str = "general"):
+    return adb.get_damage_protocol(damage_type)
+
+
+# Async counterparts of workflow.LOOKUPS (called with the email and sender); timeouts and defaults are shared
+ASYNC_LOOKUPS = {
+    "return_policy": ("mongo.get_return_policy", lambda adb, email, sender: adb.get_return_policy()),
+    "damage_protocol": ("mongo.get_damage_protocol", lambda adb, email, sender: get_damage_protocol(adb, "general")),
+    "order": ("mongo.get_order_context", lambda adb, email, sender: order_lookup.alookup(email, adb, sender)),
+}
+
+
+async def run_lookup(name: str, adb, email: str = None, sender: str = None):
+    call_name, lookup = ASYNC_LOOKUPS[name]
+    try:
+        with timed_call(call_name):
+            return await asyncio.wait_for(lookup(adb, email, sender), timeout=LOOKUPS[name][2])
+    except asyncio.TimeoutError:
+        return lookup_default(name, "timed out")
+    except Exception as e:
+        return lookup_default(name, e)
+
+
+async def fan_out_lookups(names: list, email: str = None, sender: str = None) -> dict:
+    """Await every lookup at once, so retrieval costs the slowest one."""
+    adb = get_async_database()
+    prefetched = prefetched_context.get() or {}
+    context = {name: prefetched[name] for name in names if prefetched.get(name) is not None}
+
+    pending = [name for name in names if name not in context]
+    results = await asyncio.gather(*(run_lookup(name, adb, email, sender) for name in pending))
+    context.update(zip(pending, results))
+    return context
+
+
+async def retrieve_context_node(state: EmailProcessingState) -> EmailProcessingState:
+
+    query_type = state['classification'].query_type
+    context = await fan_out_lookups(
+        RETRIEVAL_PLAN.get(query_type, []), state['email_content'], state.get('sender_email')
+    )
+
+    state['retrieved_context'] = context
+    state['database_info'] = context
+    return state
+
+
+async def embed_for_cache(email: str):
+    if not semantic_cache:
+        return None
+    try:
+        with timed_call("embeddings.embed"):
+            return await semantic_cache.aembed(email)
+    except Exception as e:
+        print(f"Semantic cache embedding failed: {e}")
+        return None
+
+
+async def generate_response_node(state: EmailProcessingState) -> EmailProcessingState:
+
+    try:
+        email = state['email_content']
+        context = state.get('retrieved_context') or {}
+
+        vector = await embed_for_cache(email) if cacheable_response(state) else None
+        response_text = lookup_cached_response(state, vector) if vector is not None else None
+        state['cache_hit'] = response_text is not None
+
+        if response_text is None:
+            with timed_call("llm.generate"):
+                message = await llm.ainvoke(build_response_prompt(email, context))
+            response_text = message.content
+
+            if vector is not None:
+                remember_response(state, vector, response_text)
+
+        response = build_email_response(response_text)
+
+        state['generated_response'] = response
+        state['final_response'] = response_text
+
+    except Exception as e:
+        error_msg = f"Error generating response: {str(e)}"
+        print(f"Error generating response: {error_msg}")
+        state['error'] = error_msg
+        state['final_response'] = "Sorry, we encountered an error generating a response. Please try again later."
+
+    return state
+
+
+async def prefetch_context_node(state: EmailProcessingState) -> EmailProcessingState:
+    """Single-call mode: fetch every policy the reply might need before classifying."""
+
+    context = await fan_out_lookups(PREFETCH_LOOKUPS, state['email_content'], state.get('sender_email'))
+
+    state['retrieved_context'] = context
+    state['database_info'] = context
+    return state
+
+
+async def classify_and_generate_node(state: EmailProcessingState) -> EmailProcessingState:
+    """Single-call mode: one structured LLM call returns the classification and the reply."""
+
+    if not classify_and_respond_chain:
+        state['error'] = "LLM not initialized. Check API keys OPENAI_API_KEY"
+        return state
+
+    try:
+        email = state['email_content']
+        context = state.get('retrieved_context') or {}
+
+        with timed_call("llm.classify_and_generate"):
+            result = await classify_and_respond_chain.ainvoke({
+                "email_content": email,
+                "policy_info": str(context)
+            })
+
+        classification = result.classification
+        classification.requires_database_lookup = classification.query_type in DATABASE_LOOKUP_TYPES
+
+        state['classification'] = classification
+        state['generated_response'] = result.response
+        state['final_response'] = result.response.full_response
+        state['messages'] = state.get('messages', []) + [
+            HumanMessage(content=email),
+            AIMessage(content=result.response.full_response)
+        ]
+
+    except Exception as e:
+        error_msg = f"Error generating response: {str(e)}"
+        print(f"Error generating response: {error_msg}")
+        state['error'] = error_msg
+        state['final_response'] = "Sorry, we encountered an error generating a response. Please try again later."
+
+    return state
+
+
+async def async_validate_response_node(state: EmailProcessingState) -> EmailProcessingState:
+    # Pure CPU; awaiting it directly avoids a hop through LangGraph's thread pool
+    return validate_response_node(state)
+
+
+ASYNC_NODES = {
+    **NODES,
+    "classify": classify_query_node,
+    "retrieve": retrieve_context_node,
+    "generate": generate_response_node,
+    "validate": async_validate_response_node,
+    "prefetch": prefetch_context_node,
+    "classify_and_generate": classify_and_generate_node,
+}
+
+
+_async_workflows = {}
+
+
+def get_async_workflow(mode: str = None) -> EmailWorkflow:
+    """Get or create the compiled async workflow for a mode; call ainvoke() on it."""
+    mode = mode or WORKFLOW_MODE
+    workflow = _async_workflows.get(mode)
+    if workflow is None:
+        workflow = _async_workflows[mode] = EmailWorkflow(mode, nodes=ASYNC_NODES)
+    return workflow
+
+
+async def aprocess_email(email_content: str, mode: str = None, sender_email: str = None) -> dict:
+    return await get_async_workflow(mode).ainvoke(email_content, sender_email)
+
+
+def astream_email(email_content: str, mode: str = None, sender_email: str = None):
+    """Async generator of (event, data) pairs; see EmailWorkflow.astream()."""
+    return get_async_workflow(mode).astream(email_content, sender_email)
+
+
+async def aprocess_emails(emails: list, mode: str = None, concurrency: int = 100) -> list:
+    """Process many emails on one event loop with at most `concurrency` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(email):
+        async with semaphore:
+            return await aprocess_email(email, mode)
+
+    return await asyncio.gather(*(run(email) for email in emails))
+
+
+__all__ = ['aprocess_email', 'astream_email', 'aprocess_emails', 'get_async_workflow', 'ASYNC_NODES']
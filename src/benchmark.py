@@ -0,0 +1,126 @@
+import argparse
+import json
+import os
+import time
+import numpy as np
+from dotenv import load_dotenv
+
+# Cached answers cost no LLM calls or tokens and would hide the difference
+# between the modes, so both caches stay off (set before the workflow
+# module builds them; load_dotenv does not override these)
+os.environ['LLM_CACHE'] = 'False'
+os.environ['SEMANTIC_CACHE'] = 'False'
+
+from . import workflow as workflow_module
+from .workflow import GRAPH_BUILDERS, get_workflow
+
+load_dotenv()
+
+
+SAMPLE_EMAILS = [
+    "I would like to return my laptop that I purchased last week. It has a screen issue.",
+    "My order arrived yesterday and the phone screen is cracked. What should I do?",
+    "I returned the headphones two weeks ago and still haven't received my refund.",
+    "Can you tell me if the wireless mouse is compatible with a Mac?",
+    "Hi, what are your customer service hours on weekends?",
+]
+
+
+def require_uncached():
+    """Fail if the workflow module was imported with caching on before this one."""
+    enabled = [name for name in ('llm_cache', 'semantic_cache') if getattr(workflow_module, name)]
+    if enabled:
+        raise RuntimeError(
+            f"Benchmark needs uncached workflows but {', '.join(enabled)} is enabled; "
+            "run it as its own process (python -m src.benchmark)"
+        )
+
+
+def run_mode(mode, emails, runs=1):
+    """Process every email `runs` times in one workflow mode and collect per-request stats."""
+    from langchain_community.callbacks import get_openai_callback
+
+    require_uncached()
+    workflow = get_workflow(mode)
+    records = []
+
+    for _ in range(runs):
+        for email in emails:
+            with get_openai_callback() as usage:
+                started = time.perf_counter()
+                result = workflow.invoke(email)
+                latency_ms = (time.perf_counter() - started) * 1000
+
+            calls = (result.get('timings') or {}).get('external_calls', {})
+            records.append({
+                "success": result.get('success', False),
+                "latency_ms": latency_ms,
+                "llm_calls": sum(call['count'] for name, call in calls.items() if name.startswith('llm.')),
+                "prompt_tokens": usage.prompt_tokens,
+                "completion_tokens": usage.completion_tokens,
+                "cost_usd": usage.total_cost,
+                "query_type": (result.get('classification') or {}).get('query_type')
+            })
+
+    return records
+
+
+def summarize(records):
+    latencies = [r['latency_ms'] for r in records]
+
+    return {
+        "requests": len(records),
+        "success_rate": float(np.mean([r['success'] for r in records])),
+        "latency_mean_ms": float(np.mean(latencies)),
+        "latency_p50_ms": float(np.percentile(latencies, 50)),
+        "latency_p95_ms": float(np.percentile(latencies, 95)),
+        "llm_calls_per_email": float(np.mean([r['llm_calls'] for r in records])),
+        "prompt_tokens_per_email": float(np.mean([r['prompt_tokens'] for r in records])),
+        "completion_tokens_per_email": float(np.mean([r['completion_tokens'] for r in records])),
+        "cost_per_email_usd": float(np.mean([r['cost_usd'] for r in records]))
+    }
+
+
+def benchmark_modes(emails=SAMPLE_EMAILS, runs=1, modes=None):
+    """Compare the two-call and single-call workflows on the same emails."""
+    modes = modes or list(GRAPH_BUILDERS)
+    report = {}
+
+    for mode in modes:
+        print(f"\nBenchmarking {mode}, uncached ({len(emails)} emails x {runs} runs)...")
+        report[mode] = summarize(run_mode(mode, emails, runs))
+
+    return report
+
+
+def print_report(report):
+    print("\n" + "="*92)
+    print(f"{'mode':<14}{'ok':>7}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'LLM calls':>11}{'prompt tok':>12}{'compl tok':>11}{'$/email':>9}")
+    print("="*92)
+    for mode, m in report.items():
+        print(
+            f"{mode:<14}{m['success_rate']:>7.0%}{m['latency_mean_ms']:>10.0f}{m['latency_p50_ms']:>10.0f}"
+            f"{m['latency_p95_ms']:>10.0f}{m['llm_calls_per_email']:>11.2f}{m['prompt_tokens_per_email']:>12.0f}"
+            f"{m['completion_tokens_per_email']:>11.0f}{m['cost_per_email_usd']:>9.4f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the email workflow modes.")
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--emails', help="Text file with one email per line (default: built-in samples)")
+    parser.add_argument('--output', help="Write the report as JSON to this path")
+    args = parser.parse_args()
+
+    emails = SAMPLE_EMAILS
+    if args.emails:
+        with open(args.emails) as f:
+            emails = [line.strip() for line in f if line.strip()]
+
+    report = benchmark_modes(emails, args.runs)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport saved to: {args.output}")
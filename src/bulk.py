@@ -0,0 +1,224 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+
+from .workflow import (
+    TWO_CALL_MODE, SINGLE_CALL_MODE, WORKFLOW_MODE, GRAPH_BUILDERS, process_email, prefetch_batch, prefetched_context
+)
+
+load_dotenv()
+
+
+BULK_CONCURRENCY = int(os.getenv('BULK_CONCURRENCY', '16'))
+BULK_MAX_EMAILS = int(os.getenv('BULK_MAX_EMAILS', '5000'))
+BULK_MAX_CONCURRENCY = int(os.getenv('BULK_MAX_CONCURRENCY', '64'))
+LLM_RATE_LIMIT_PER_MINUTE = float(os.getenv('LLM_RATE_LIMIT_PER_MINUTE', '500'))
+
+# Worst-case LLM calls per email, reserved from the budget before it starts
+LLM_CALLS_PER_EMAIL = {
+    TWO_CALL_MODE: 2,
+    SINGLE_CALL_MODE: 1,
+}
+
+
+class RateBudget:
+    """Token bucket over LLM calls per minute, shared by every bulk job.
+
+    Bursts up to ``burst`` calls, then refills at ``rate_per_minute``. Both
+    the thread pool (acquire) and the event loop (aacquire) draw from it.
+    """
+
+    def __init__(self, rate_per_minute: float = LLM_RATE_LIMIT_PER_MINUTE, burst: float = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = burst or max(rate_per_minute / 10.0, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self, n: float) -> float:
+        """Take n tokens if available; otherwise return how long to wait."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+            if self.tokens >= n:
+                self.tokens -= n
+                return 0.0
+            return (n - self.tokens) / self.rate
+
+    def acquire(self, n: float = 1):
+        n = min(n, self.capacity)
+        while (wait := self._take(n)) > 0:
+            time.sleep(wait)
+
+    async def aacquire(self, n: float = 1):
+        n = min(n, self.capacity)
+        while (wait := self._take(n)) > 0:
+            await asyncio.sleep(wait)
+
+
+llm_budget = RateBudget()
+
+
+def parse_bulk_emails(items: list) -> list:
+    """Accept plain strings or {"id": ..., "email": ..., "sender": ...} objects; return (id, email, sender) triples."""
+    emails = []
+    for index, item in enumerate(items):
+        if isinstance(item, dict):
+            email_id, email, sender = item.get('id', index), item.get('email'), item.get('sender')
+        else:
+            email_id, email, sender = index, item, None
+
+        if not isinstance(email, str):
+            raise ValueError(f"Item {index}: 'email' must be a string")
+        if sender is not None and not isinstance(sender, str):
+            raise ValueError(f"Item {index}: 'sender' must be a string")
+        emails.append((email_id, email, sender))
+    return emails
+
+
+def parse_bulk_request(data) -> tuple:
+    """Validate a bulk request body up front; returns (emails, mode, concurrency) or raises ValueError.
+
+    Everything that could fail per email is checked here, because once the
+    NDJSON stream has started an error can only cut it short.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get('emails'), list):
+        raise ValueError("'emails' must be a list")
+
+    if len(data['emails']) > BULK_MAX_EMAILS:
+        raise ValueError(f"At most {BULK_MAX_EMAILS} emails per request")
+
+    mode = data.get('mode') or None
+    if mode is not None and mode not in GRAPH_BUILDERS:
+        raise ValueError(f"Unknown mode '{mode}'. Choose from: {', '.join(GRAPH_BUILDERS)}")
+
+    concurrency = data.get('concurrency') or BULK_CONCURRENCY
+    if not isinstance(concurrency, int) or isinstance(concurrency, bool) or concurrency < 1:
+        raise ValueError("'concurrency' must be a positive integer")
+
+    return parse_bulk_emails(data['emails']), mode, min(concurrency, BULK_MAX_CONCURRENCY)
+
+
+def spam_pass(emails: list) -> list:
+    """One vectorized spam prediction over the whole inbox (None when no classifier)."""
+    # Imported here so the offline CLI can keep the model out of its parent process
+    from .spam import SPAM_BATCH_SIZE, spam_classifier
+
+    if not spam_classifier:
+        return [None] * len(emails)
+    return spam_classifier.predict_batch([email for _, email, _ in emails], SPAM_BATCH_SIZE)
+
+
+def spam_record(email_id, spam_result) -> dict:
+    return {
+        "id": email_id,
+        "is_spam": True,
+        "spam_confidence": spam_result['confidence'],
+        "response": None,
+        "success": True
+    }
+
+
+def ham_record(email_id, spam_result, result: dict) -> dict:
+    return {
+        "id": email_id,
+        "is_spam": False,
+        "spam_confidence": 1 - spam_result.get('spam_probability', 0.5) if spam_result else None,
+        **result
+    }
+
+
+def split_spam(emails: list, spam_results: list = None):
+    """Run the spam pass (unless results are given); return spam records and the (id, email, sender, spam_result) survivors."""
+    if spam_results is None:
+        spam_results = spam_pass(emails)
+    spam, survivors = [], []
+
+    for (email_id, email, sender), spam_result in zip(emails, spam_results):
+        if spam_result and spam_result['prediction'] == 'spam':
+            spam.append(spam_record(email_id, spam_result))
+        else:
+            survivors.append((email_id, email, sender, spam_result))
+
+    return spam, survivors
+
+
+def process_bulk(emails: list, mode: str = None, concurrency: int = BULK_CONCURRENCY,
+                 budget: RateBudget = llm_budget):
+    """Yield one record per email, in completion order; spam is yielded first."""
+    spam, survivors = split_spam(emails)
+    yield from spam
+    yield from process_survivors(survivors, mode, concurrency, budget)
+
+
+def process_survivors(survivors: list, mode: str = None, concurrency: int = BULK_CONCURRENCY,
+                      budget: RateBudget = llm_budget):
+    """Run non-spam (id, email, sender, spam_result) survivors through the workflow; yield records as they finish."""
+    mode = mode or WORKFLOW_MODE
+    # One query per lookup for the whole batch instead of one per email
+    contexts = prefetch_batch(
+        [email for _, email, _, _ in survivors], senders=[sender for _, _, sender, _ in survivors]
+    )
+
+    def run(email_id, email, sender, spam_result, context):
+        budget.acquire(LLM_CALLS_PER_EMAIL.get(mode, 2))
+        token = prefetched_context.set(context)
+        try:
+            return ham_record(email_id, spam_result, process_email(email, mode, sender))
+        finally:
+            prefetched_context.reset(token)
+
+    pool = ThreadPoolExecutor(max_workers=max(concurrency, 1), thread_name_prefix="bulk")
+    try:
+        futures = [
+            pool.submit(run, *survivor, context) for survivor, context in zip(survivors, contexts)
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        # A client that disconnects mid-stream should not keep spending LLM budget
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def aprocess_bulk(emails: list, mode: str = None, concurrency: int = BULK_CONCURRENCY,
+                        budget: RateBudget = llm_budget):
+    """Async process_bulk over the async workflow; an async generator of records."""
+    from .async_workflow import aprocess_email
+
+    mode = mode or WORKFLOW_MODE
+    spam, survivors = await asyncio.to_thread(split_spam, emails)
+    for record in spam:
+        yield record
+
+    contexts = await asyncio.to_thread(
+        prefetch_batch,
+        [email for _, email, _, _ in survivors], senders=[sender for _, _, sender, _ in survivors]
+    )
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+    async def run(email_id, email, sender, spam_result, context):
+        # Each task runs in its own copy of the context, so this never leaks
+        prefetched_context.set(context)
+        async with semaphore:
+            await budget.aacquire(LLM_CALLS_PER_EMAIL.get(mode, 2))
+            return ham_record(email_id, spam_result, await aprocess_email(email, mode, sender))
+
+    tasks = [
+        asyncio.ensure_future(run(*survivor, context)) for survivor, context in zip(survivors, contexts)
+    ]
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def ndjson_line(record: dict) -> str:
+    return json.dumps(record, default=str) + "\n"
@@ -1,18 +1,63 @@
 import os
+import re
 from typing import Dict, List, Optional, Any
 from pymongo import MongoClient
 from dotenv import load_dotenv
 
+from .snapshot import CatalogSnapshot, SNAPSHOT_ENABLED, PRODUCT_NAME_CANDIDATES
+from .product_index import normalize
+from .refunds import calculate_refunds
+
 load_dotenv()
 
 
+# Fail fast when MongoDB is unreachable instead of pymongo's 30s default
+SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGODB_SERVER_SELECTION_TIMEOUT_MS', '2000'))
+
+# Fields the batch lookups fetch; everything else stays on the server
+PRODUCT_PROJECTION = {
+    "_id": 0, "product_id": 1, "name": 1, "category": 1, "price": 1,
+    "warranty_months": 1, "returnable": 1
+}
+POLICY_PROJECTION = {"_id": 0}
+ORDER_PROJECTION = {
+    "_id": 0, "order_id": 1, "customer_email": 1, "product_id": 1,
+    "order_date": 1, "amount": 1, "status": 1
+}
+
+
+def name_prefix_query(product_name: str) -> Optional[Dict[str, Any]]:
+    """Anchored prefix match on the indexed ``name_lower`` field, or None for an empty name.
+    
+    Unanchored or case-insensitive regexes on ``name`` cannot use an index
+    and scan the whole collection.
+    """
+    prefix = normalize(product_name)
+    return {"name_lower": {"$regex": '^' + re.escape(prefix)}} if prefix else None
+
+
+def recent_orders_pipeline(customer_emails: List[str], limit: int) -> List[Dict[str, Any]]:
+    """Each customer's newest ``limit`` orders, cut on the server.
+    
+    $match and $sort walk the (customer_email, order_date) index, so the
+    per-customer limit no longer means streaming every order to the client.
+    """
+    return [
+        {"$match": {"customer_email": {"$in": customer_emails}}},
+        {"$sort": {"customer_email": 1, "order_date": -1}},
+        {"$project": ORDER_PROJECTION},
+        {"$group": {"_id": "$customer_email", "orders": {"$push": "$$ROOT"}}},
+        {"$project": {"orders": {"$slice": ["$orders", limit]}}},
+    ]
+
+
 class DatabaseConnector:
     def __init__(self):
         self.mongo_uri = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
         self.db_name = os.getenv('MONGODB_DATABASE', 'customer_service_db')
         
         try:
-            self.client = MongoClient(self.mongo_uri)
+            self.client = MongoClient(self.mongo_uri, serverSelectionTimeoutMS=SERVER_SELECTION_TIMEOUT_MS)
             self.db = self.client[self.db_name]
             
             # Collections
@@ -25,10 +70,19 @@ class DatabaseConnector:
             print(f"MongoDB connection error: {e}")
             self.client = None
             self.db = None
+        
+        # Policies and products change rarely; serve them from memory once the
+        # background load finishes (MongoDB answers until then)
+        self.snapshot = None
+        if SNAPSHOT_ENABLED and self.db is not None:
+            self.snapshot = CatalogSnapshot(self.db).start()
+    
+    def _use_snapshot(self) -> bool:
+        return self.snapshot is not None and self.snapshot.ready()
     
     def get_return_policy(self, product_category: str = None) -> Dict[str, Any]:
         
-        if not self.db:
+        if self.db is None:
             return self._get_default_return_policy()
         
         try:
@@ -36,16 +90,13 @@ class DatabaseConnector:
             if product_category:
                 query["category"] = product_category
             
-            policy = self.policies.find_one(query)
+            if self._use_snapshot():
+                policy = self.snapshot.return_policy(product_category)
+            else:
+                policy = self.policies.find_one(query)
             
             if policy:
-                return {
-                    "policy_type": "return",
-                    "days_allowed": policy.get('days_allowed', 30),
-                    "conditions": policy.get('conditions', []),
-                    "refund_percentage": policy.get('refund_percentage', 100),
-                    "details": policy.get('details', '')
-                }
+                return self._format_return_policy(policy)
         except Exception as e:
             print(f"Error fetching return policy: {e}")
         
@@ -53,7 +104,7 @@ class DatabaseConnector:
     
     def check_product_returnable(self, product_id: str = None, product_category: str = None) -> Dict[str, Any]:
         
-        if not self.db:
+        if self.db is None:
             return {"returnable": True, "conditions": ["Within 30 days", "Unused condition"]}
         
         try:
@@ -63,7 +114,10 @@ class DatabaseConnector:
             elif product_category:
                 query["category"] = product_category
             
-            product = self.products.find_one(query)
+            if self._use_snapshot():
+                product = self.snapshot.product(product_id, product_category)
+            else:
+                product = self.products.find_one(query)
             
             if product:
                 return {
@@ -103,10 +157,18 @@ class DatabaseConnector:
             "reason": self._get_refund_reason(days_since_purchase, product_condition)
         }
     
+    def calculate_refunds(self, order_amounts, days_since_purchase, product_conditions) -> Dict[str, Any]:
+        """calculate_refund over columns of returns at once (NumPy arrays out).
+        
+        Reasons come back as codes; refunds.refund_reasons() turns them into
+        the strings calculate_refund uses.
+        """
+        return calculate_refunds(order_amounts, days_since_purchase, product_conditions)
+    
     def get_product_info(self, product_id: str = None, 
                         product_name: str = None) -> Optional[Dict[str, Any]]:
         
-        if not self.db:
+        if self.db is None:
             return None
         
         try:
@@ -114,23 +176,199 @@ class DatabaseConnector:
             if product_id:
                 query["product_id"] = product_id
             elif product_name:
-                query["name"] = {"$regex": product_name, "$options": "i"}
+                query = name_prefix_query(product_name)
+                if query is None:
+                    return None
             
-            product = self.products.find_one(query)
+            if self._use_snapshot():
+                product = self.snapshot.product(product_id) if product_id else \
+                    self.snapshot.product_by_name(product_name) if product_name else self.snapshot.product()
+            else:
+                product = self.products.find_one(query, sort=[("name_lower", 1)] if "name_lower" in query else None)
             
             if product:
-                return {
+                return self._format_product(product)
+        except Exception as e:
+            print(f"Error fetching product info: {e}")
+        
+        return None
+    
+    # --- batch lookups: one $in query per collection, results keyed by request ---
+    
+    def get_products_by_ids(self, product_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Product info for many ids at once; unknown ids map to None."""
+        
+        product_ids = list(dict.fromkeys(pid for pid in product_ids if pid))
+        results = dict.fromkeys(product_ids)
+        
+        if self.db is None or not product_ids:
+            return results
+        
+        try:
+            if self._use_snapshot():
+                found = [self.snapshot.product(pid) for pid in product_ids]
+            else:
+                found = self.products.find({"product_id": {"$in": product_ids}}, PRODUCT_PROJECTION)
+            
+            for product in found:
+                # First document wins, as with find_one
+                if product and results.get(product.get('product_id')) is None:
+                    results[product['product_id']] = self._format_product(product)
+        except Exception as e:
+            print(f"Error fetching products by id: {e}")
+        
+        return results
+    
+    def get_products_by_names(self, product_names: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Product info for many names at once; misses map to None.
+        
+        The snapshot's name index answers when it is loaded. Otherwise names
+        are matched as anchored prefixes of the indexed ``name_lower`` field
+        (see seed_database), so MongoDB walks the index instead of scanning
+        every product with an unanchored regex.
+        """
+        
+        product_names = list(dict.fromkeys(name for name in product_names if name))
+        results = dict.fromkeys(product_names)
+        
+        if self.db is None or not product_names:
+            return results
+        
+        try:
+            if self._use_snapshot():
+                for name in product_names:
+                    product = self.snapshot.product_by_name(name)
+                    results[name] = self._format_product(product) if product else None
+                return results
+            
+            prefixes = {name: normalize(name) for name in product_names if normalize(name)}
+            if not prefixes:
+                return results
+            
+            cursor = self.products.find(
+                {"name_lower": {"$in": [re.compile('^' + re.escape(prefix)) for prefix in set(prefixes.values())]}},
+                {**PRODUCT_PROJECTION, "name_lower": 1}
+            ).sort("name_lower", 1).limit(PRODUCT_NAME_CANDIDATES * len(prefixes))
+            
+            # One document can answer several names; each name keeps its first match
+            fetched = 0
+            for product in cursor:
+                fetched += 1
+                for name, prefix in prefixes.items():
+                    if results[name] is None and (product.get('name_lower') or '').startswith(prefix):
+                        results[name] = self._format_product(product)
+            
+            # A broad prefix can fill the limit on its own; look the rest up one by one
+            if fetched == PRODUCT_NAME_CANDIDATES * len(prefixes):
+                for name, prefix in prefixes.items():
+                    if results[name] is None:
+                        product = self.products.find_one(
+                            name_prefix_query(prefix), PRODUCT_PROJECTION, sort=[("name_lower", 1)]
+                        )
+                        results[name] = self._format_product(product) if product else None
+        except Exception as e:
+            print(f"Error fetching products by name: {e}")
+        
+        return results
+    
+    def get_policies(self, keys: List[tuple]) -> Dict[tuple, Optional[Dict[str, Any]]]:
+        """Policies for many (policy_type, category) pairs; category None matches any.
+        
+        Return policies are formatted and defaulted like get_return_policy;
+        other types come back as stored, or None.
+        """
+        
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        
+        if self.db is not None and keys:
+            try:
+                if self._use_snapshot():
+                    found = {key: self.snapshot.policy(*key) for key in keys}
+                else:
+                    policy_types = list({policy_type for policy_type, _ in keys})
+                    for policy in self.policies.find({"policy_type": {"$in": policy_types}}, POLICY_PROJECTION):
+                        policy_type = policy.get('policy_type')
+                        found.setdefault((policy_type, None), policy)
+                        found.setdefault((policy_type, policy.get('category')), policy)
+            except Exception as e:
+                print(f"Error fetching policies: {e}")
+        
+        results = {}
+        for key in keys:
+            policy = found.get(key)
+            if key[0] == "return":
+                results[key] = self._format_return_policy(policy) if policy else self._get_default_return_policy()
+            else:
+                results[key] = {k: v for k, v in policy.items() if k != '_id'} if policy else None
+        return results
+    
+    def get_orders(self, order_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Orders for many order ids at once; unknown ids map to None."""
+        
+        order_ids = list(dict.fromkeys(oid for oid in order_ids if oid))
+        results = dict.fromkeys(order_ids)
+        
+        if self.db is None or not order_ids:
+            return results
+        
+        try:
+            for order in self.orders.find({"order_id": {"$in": order_ids}}, ORDER_PROJECTION):
+                if results.get(order.get('order_id')) is None:
+                    results[order['order_id']] = order
+        except Exception as e:
+            print(f"Error fetching orders: {e}")
+        
+        return results
+    
+    def get_orders_by_customer(self, customer_emails: List[str], limit: int = 5) -> Dict[str, List[Dict[str, Any]]]:
+        """Each customer's most recent orders (newest first), from one aggregation on the customer_email index."""
+        
+        customer_emails = list(dict.fromkeys(email.lower() for email in customer_emails if email))
+        results = {email: [] for email in customer_emails}
+        
+        if self.db is None or not customer_emails:
+            return results
+        
+        try:
+            for group in self.orders.aggregate(recent_orders_pipeline(customer_emails, limit)):
+                if group["_id"] in results:
+                    results[group["_id"]] = group["orders"]
+        except Exception as e:
+            print(f"Error fetching orders by customer: {e}")
+            # Nothing rather than empty lists, so callers don't cache "no orders"
+            return {}
+        
+        return results
+    
+    def search_products(self, product_name: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Products whose names best match product_name, best first, with a similarity score."""
+        
+        if self.db is None or not product_name:
+            return []
+        
+        try:
+            if self._use_snapshot():
+                matches = self.snapshot.search_products(product_name, limit)
+            else:
+                query = name_prefix_query(product_name)
+                cursor = self.products.find(query).sort("name_lower", 1).limit(limit) if query else []
+                matches = [(product, None) for product in cursor]
+            
+            return [
+                {
                     "product_id": product.get('product_id'),
                     "name": product.get('name'),
                     "category": product.get('category'),
                     "price": product.get('price'),
-                    "warranty_months": product.get('warranty_months', 12),
-                    "returnable": product.get('returnable', True)
+                    "score": score
                 }
+                for product, score in matches
+            ]
         except Exception as e:
-            print(f"Error fetching product info: {e}")
+            print(f"Error searching products: {e}")
         
-        return None
+        return []
     
     def get_damage_protocol(self, damage_type: str = "general") -> Dict[str, Any]:
         
@@ -167,6 +405,25 @@ class DatabaseConnector:
         
         return protocols.get(damage_type, protocols["general"])
     
+    def _format_return_policy(self, policy: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "policy_type": "return",
+            "days_allowed": policy.get('days_allowed', 30),
+            "conditions": policy.get('conditions', []),
+            "refund_percentage": policy.get('refund_percentage', 100),
+            "details": policy.get('details', '')
+        }
+    
+    def _format_product(self, product: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "product_id": product.get('product_id'),
+            "name": product.get('name'),
+            "category": product.get('category'),
+            "price": product.get('price'),
+            "warranty_months": product.get('warranty_months', 12),
+            "returnable": product.get('returnable', True)
+        }
+    
     def _get_default_return_policy(self) -> Dict[str, Any]:
         return {
             "policy_type": "return",
@@ -193,8 +450,15 @@ class DatabaseConnector:
         else:
             return "Full refund eligible"
     
+    def invalidate_snapshot(self):
+        """Reload cached policies and products now, e.g. right after editing them."""
+        if self.snapshot is not None:
+            self.snapshot.invalidate()
+    
     def close(self):
         """Close database connection."""
+        if self.snapshot is not None:
+            self.snapshot.stop()
         if self.client:
             self.client.close()
             print("MongoDB connection closed")
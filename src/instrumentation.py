@@ -0,0 +1,96 @@
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+# Timer of the request whose node is running in this thread/context
+_current_timer: ContextVar = ContextVar('request_timer', default=None)
+
+
+class RequestTimer:
+    """Collects wall time per graph node and per external call for one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.nodes = {}
+        self.calls = {}
+        self._lock = threading.Lock()
+
+    def record_node(self, name: str, elapsed_ms: float):
+        with self._lock:
+            self.nodes[name] = self.nodes.get(name, 0.0) + elapsed_ms
+
+    def record_call(self, name: str, elapsed_ms: float):
+        with self._lock:
+            call = self.calls.setdefault(name, {"count": 0, "total_ms": 0.0})
+            call["count"] += 1
+            call["total_ms"] += elapsed_ms
+
+    def breakdown(self) -> dict:
+        total_ms = (time.perf_counter() - self.started) * 1000
+
+        with self._lock:
+            nodes = {name: round(ms, 3) for name, ms in self.nodes.items()}
+            calls = {
+                name: {"count": call["count"], "total_ms": round(call["total_ms"], 3)}
+                for name, call in self.calls.items()
+            }
+            node_ms = sum(self.nodes.values())
+
+        return {
+            "total_ms": round(total_ms, 3),
+            "nodes": nodes,
+            "external_calls": calls,
+            # Routing, state copies and everything else LangGraph does between nodes
+            "graph_overhead_ms": round(max(total_ms - node_ms, 0.0), 3)
+        }
+
+
+@contextmanager
+def timed_call(name: str):
+    """Time an external call (LLM, MongoDB) against the current request, if any."""
+    timer = _current_timer.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timer is not None:
+            timer.record_call(name, (time.perf_counter() - started) * 1000)
+
+
+def timed_node(name: str, node):
+    """Wrap a graph node so it reports its wall time to the request's timer.
+
+    The timer travels in ``config["configurable"]["timer"]``; LangGraph passes
+    the config to any node that declares a ``config`` parameter. Coroutine
+    nodes get a coroutine wrapper so the graph still awaits them.
+    """
+    def start(config):
+        timer = ((config or {}).get("configurable") or {}).get("timer")
+        return timer, _current_timer.set(timer), time.perf_counter()
+
+    def finish(timer, token, started):
+        if timer is not None:
+            timer.record_node(name, (time.perf_counter() - started) * 1000)
+        _current_timer.reset(token)
+
+    if inspect.iscoroutinefunction(node):
+        async def wrapper(state, config=None):
+            timer, token, started = start(config)
+            try:
+                return await node(state)
+            finally:
+                finish(timer, token, started)
+    else:
+        def wrapper(state, config=None):
+            timer, token, started = start(config)
+            try:
+                return node(state)
+            finally:
+                finish(timer, token, started)
+
+    wrapper.__name__ = node.__name__
+    wrapper.__doc__ = node.__doc__
+    return wrapper
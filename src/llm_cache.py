@@ -0,0 +1,214 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from langchain_core.caches import BaseCache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+LLM_CACHE_PATH = os.getenv('LLM_CACHE_PATH', 'data/llm_cache.sqlite')
+LLM_CACHE_TTL_SECONDS = float(os.getenv('LLM_CACHE_TTL_SECONDS', str(24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '50000'))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    generations TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS llm_cache_last_access ON llm_cache (last_access);
+"""
+
+
+def dump_generations(generations) -> str:
+    """Serialize generations as plain JSON (messages via message_to_dict)."""
+    return json.dumps([
+        {"message": message_to_dict(g.message)} if isinstance(g, ChatGeneration) else {"text": g.text}
+        for g in generations
+    ])
+
+
+def load_generations(payload: str) -> list:
+    return [
+        ChatGeneration(message=messages_from_dict([g["message"]])[0]) if "message" in g else Generation(text=g["text"])
+        for g in json.loads(payload)
+    ]
+
+
+class SQLiteLLMCache(BaseCache):
+    """Exact-match LLM response cache on SQLite, shared by every server worker.
+
+    LangChain calls lookup()/update() with the prompt and an ``llm_string``
+    that encodes the model name and every call parameter (temperature,
+    max_tokens, bound tools for structured output), so the key is a hash of
+    both. WAL mode lets readers in other processes proceed while one writes.
+    Entries expire after ``ttl_seconds``; past ``max_entries`` the least
+    recently used rows are deleted.
+    """
+
+    def __init__(self, path: str = LLM_CACHE_PATH, ttl_seconds: float = LLM_CACHE_TTL_SECONDS,
+                 max_entries: int = LLM_CACHE_MAX_ENTRIES, touch_interval: float = 60.0):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # Hits refresh last_access at most this often per row, so hot keys don't serialize on writes
+        self.touch_interval = touch_interval
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "expired": 0, "evicted": 0}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode('utf-8')).hexdigest()
+
+    def _count(self, name: str, n: int = 1):
+        with self._lock:
+            self._stats[name] += n
+
+    def lookup(self, prompt: str, llm_string: str):
+        key = self.key(prompt, llm_string)
+        now = time.time()
+
+        # A locked, full or corrupt cache file must never fail the LLM call; treat it as a miss
+        try:
+            conn = self._conn()
+            row = conn.execute(
+                "SELECT generations, created_at, last_access FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"LLM cache lookup failed, treating as a miss: {e}")
+            self._count("misses")
+            return None
+
+        if row is None:
+            self._count("misses")
+            return None
+
+        generations, created_at, last_access = row
+
+        if now - created_at > self.ttl_seconds:
+            try:
+                conn.execute("DELETE FROM llm_cache WHERE key = ? AND created_at = ?", (key, created_at))
+            except sqlite3.Error as e:
+                print(f"LLM cache could not delete expired entry: {e}")
+            self._count("expired")
+            self._count("misses")
+            return None
+
+        if now - last_access > self.touch_interval:
+            try:
+                conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+            except sqlite3.Error as e:
+                # Only the LRU order suffers; the entry itself is still good
+                print(f"LLM cache could not refresh last access: {e}")
+
+        try:
+            result = load_generations(generations)
+        except Exception as e:
+            print(f"LLM cache entry unreadable, ignoring: {e}")
+            self._count("misses")
+            return None
+
+        self._count("hits")
+        return result
+
+    def update(self, prompt: str, llm_string: str, return_val) -> None:
+        key = self.key(prompt, llm_string)
+        now = time.time()
+
+        try:
+            generations = dump_generations(return_val)
+        except Exception as e:
+            print(f"LLM cache could not serialize response: {e}")
+            return
+
+        conn = None
+        try:
+            conn = self._conn()
+            # IMMEDIATE takes the write lock up front, so concurrent workers queue
+            # on busy_timeout instead of failing mid-transaction
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, generations, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, generations, now, now)
+            )
+            overflow = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN "
+                    "(SELECT key FROM llm_cache ORDER BY last_access LIMIT ?)",
+                    (overflow,)
+                )
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            # A failed store only costs a future hit; never fail the LLM call over it
+            print(f"LLM cache store skipped: {e}")
+            self._rollback(conn)
+            return
+        except Exception:
+            self._rollback(conn)
+            raise
+
+        self._count("stores")
+        if overflow > 0:
+            self._count("evicted", overflow)
+
+    @staticmethod
+    def _rollback(conn):
+        try:
+            if conn is not None and conn.in_transaction:
+                conn.execute("ROLLBACK")
+        except sqlite3.Error as e:
+            print(f"LLM cache rollback failed: {e}")
+
+    def clear(self, **kwargs) -> None:
+        self._conn().execute("DELETE FROM llm_cache")
+
+    def purge_expired(self) -> int:
+        cursor = self._conn().execute(
+            "DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+        )
+        self._count("expired", cursor.rowcount)
+        return cursor.rowcount
+
+    def stats(self) -> dict:
+        # /metrics must keep answering when the cache file is locked or damaged
+        try:
+            size = self._conn().execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        except sqlite3.Error as e:
+            print(f"LLM cache size unavailable: {e}")
+            size = None
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+                "size": size,
+                "max_entries": self.max_entries
+            }
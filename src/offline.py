@@ -0,0 +1,239 @@
+import argparse
+import json
+import mailbox
+import multiprocessing
+import os
+import re
+import time
+from email import policy
+from email.parser import BytesParser
+from itertools import islice
+from dotenv import load_dotenv
+
+from .bulk import BULK_CONCURRENCY, split_spam, process_survivors, ndjson_line
+
+load_dotenv()
+
+
+CHUNK_SIZE = 256
+HTML_TAG = re.compile(r'<[^>]+>')
+
+
+def message_text(message) -> str:
+    """Subject plus the plain-text body (HTML stripped when there is no text part)."""
+    subject = str(message.get('Subject', '') or '')
+
+    try:
+        part = message.get_body(preferencelist=('plain', 'html'))
+        body = part.get_content() if part is not None else ''
+        if part is not None and part.get_content_type() == 'text/html':
+            body = HTML_TAG.sub(' ', body)
+    except Exception:
+        payload = message.get_payload(decode=True) or b''
+        body = payload.decode('utf-8', errors='replace') if isinstance(payload, bytes) else str(payload)
+
+    return f"{subject}\n\n{body}".strip()
+
+
+def _record(message, source: str, index: int) -> dict:
+    return {
+        "id": str(message.get('Message-ID') or f"{source}#{index}").strip(),
+        "source": source,
+        "email": message_text(message),
+        # Taken from the header, so orders are looked up for the real sender, not addresses in the body
+        "sender": str(message.get('From', '') or '') or None,
+    }
+
+
+def iter_messages(paths: list):
+    """Yield {"id", "source", "email", "sender"} one message at a time.
+
+    mbox files are read through mailbox.mbox, which only indexes message
+    offsets; directories are walked for .eml files in sorted order so the
+    sequence (and therefore checkpoints) is stable across runs.
+    """
+    parser = BytesParser(policy=policy.default)
+
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith('.eml'):
+                        eml_path = os.path.join(root, name)
+                        with open(eml_path, 'rb') as f:
+                            yield _record(parser.parse(f), eml_path, 0)
+
+        elif path.lower().endswith('.eml'):
+            with open(path, 'rb') as f:
+                yield _record(parser.parse(f), path, 0)
+
+        else:
+            box = mailbox.mbox(path, factory=lambda f: parser.parse(f), create=False)
+            try:
+                for index, key in enumerate(box.iterkeys()):
+                    yield _record(box[key], path, index)
+            finally:
+                box.close()
+
+
+def iter_chunks(iterable, size: int):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+# --- spam workers (one model per process) ----------------------------------
+
+def _classify_shard(texts: list) -> list:
+    from .spam import SPAM_BATCH_SIZE, spam_classifier
+
+    if not spam_classifier:
+        return [None] * len(texts)
+    return spam_classifier.predict_batch(texts, SPAM_BATCH_SIZE)
+
+
+def classify_chunk_async(pool, chunk: list, workers: int):
+    """Split a chunk across the spam workers; returns an AsyncResult of per-shard lists."""
+    shard_size = max(-(-len(chunk) // workers), 1)
+    shards = [
+        [message['email'] for message in chunk[i:i + shard_size]]
+        for i in range(0, len(chunk), shard_size)
+    ]
+    return pool.map_async(_classify_shard, shards)
+
+
+# --- checkpoints -----------------------------------------------------------
+
+def checkpoint_path(output_path: str) -> str:
+    return output_path + '.checkpoint.json'
+
+
+def load_checkpoint(output_path: str, inputs: list) -> dict:
+    path = checkpoint_path(output_path)
+    if not os.path.exists(path):
+        return {"messages_done": 0, "output_bytes": 0}
+
+    with open(path) as f:
+        checkpoint = json.load(f)
+
+    if checkpoint.get('inputs') != inputs:
+        raise ValueError(
+            f"Checkpoint {path} was written for different inputs; "
+            "use --restart or a different --output"
+        )
+    return checkpoint
+
+
+def save_checkpoint(output_path: str, inputs: list, messages_done: int, output_bytes: int, stats: dict):
+    path = checkpoint_path(output_path)
+    tmp_path = path + '.tmp'
+
+    with open(tmp_path, 'w') as f:
+        json.dump({
+            "inputs": inputs,
+            "messages_done": messages_done,
+            "output_bytes": output_bytes,
+            "stats": stats,
+            "updated_at": time.time()
+        }, f)
+        f.flush()
+        os.fsync(f.fileno())
+
+    # Atomic on POSIX, so a crash leaves either the old or the new checkpoint
+    os.replace(tmp_path, path)
+
+
+# --- driver ------------------------------------------------------------------
+
+def run(inputs: list, output_path: str, mode: str = None, spam_workers: int = 2,
+        concurrency: int = BULK_CONCURRENCY, chunk_size: int = CHUNK_SIZE,
+        restart: bool = False, limit: int = None) -> dict:
+    """Process every message under `inputs` into JSONL, resuming from the last checkpoint.
+
+    Chunks are committed whole: records are appended and fsynced, then the
+    checkpoint records the message count and output size. On resume the
+    output is truncated to that size, dropping records of a half-written
+    chunk, and that many messages are skipped.
+    """
+    inputs = [os.path.abspath(path) for path in inputs]
+
+    if restart:
+        for path in (output_path, checkpoint_path(output_path)):
+            if os.path.exists(path):
+                os.remove(path)
+
+    checkpoint = load_checkpoint(output_path, inputs)
+    messages_done = checkpoint['messages_done']
+    stats = checkpoint.get('stats') or {"messages": 0, "spam": 0, "processed": 0, "failed": 0}
+
+    if messages_done:
+        print(f"Resuming after {messages_done} messages")
+
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    messages = islice(iter_messages(inputs), messages_done, limit)
+    chunks = iter_chunks(messages, chunk_size)
+
+    # spawn: TensorFlow does not survive fork, and each worker loads its own model
+    context = multiprocessing.get_context('spawn')
+    started = time.perf_counter()
+
+    with context.Pool(processes=spam_workers) as pool, open(output_path, 'ab') as out:
+        out.truncate(checkpoint['output_bytes'])
+        out.seek(checkpoint['output_bytes'])
+
+        chunk = next(chunks, None)
+        pending = classify_chunk_async(pool, chunk, spam_workers) if chunk else None
+
+        while chunk:
+            spam_results = [result for shard in pending.get() for result in shard]
+
+            # Classify the next chunk while this one goes through the LLM
+            next_chunk = next(chunks, None)
+            pending = classify_chunk_async(pool, next_chunk, spam_workers) if next_chunk else None
+
+            emails = [(message['id'], message['email'], message['sender']) for message in chunk]
+            spam, survivors = split_spam(emails, spam_results)
+            sources = {message['id']: message['source'] for message in chunk}
+
+            for record in spam + list(process_survivors(survivors, mode, concurrency)):
+                record['source'] = sources.get(record['id'])
+                out.write(ndjson_line(record).encode('utf-8'))
+                stats['spam' if record.get('is_spam') else 'processed' if record.get('success') else 'failed'] += 1
+
+            out.flush()
+            os.fsync(out.fileno())
+
+            messages_done += len(chunk)
+            stats['messages'] += len(chunk)
+            save_checkpoint(output_path, inputs, messages_done, out.tell(), stats)
+
+            elapsed = time.perf_counter() - started
+            print(f"{messages_done} messages done ({stats['spam']} spam, {stats['failed']} failed, {elapsed:.0f}s)")
+
+            chunk = next_chunk
+
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Process mbox files or .eml directories offline into JSONL.")
+    parser.add_argument('inputs', nargs='+', help="mbox files, .eml files or directories of .eml files")
+    parser.add_argument('--output', '-o', required=True, help="JSONL results path (a .checkpoint.json is kept beside it)")
+    parser.add_argument('--mode', help="Workflow mode (default: WORKFLOW_MODE)")
+    parser.add_argument('--spam-workers', type=int, default=max((os.cpu_count() or 2) // 2, 1))
+    parser.add_argument('--concurrency', type=int, default=BULK_CONCURRENCY, help="Emails in the workflow at once")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="Messages per checkpoint")
+    parser.add_argument('--limit', type=int, help="Stop after this many messages in total")
+    parser.add_argument('--restart', action='store_true', help="Ignore and delete any existing checkpoint and output")
+    args = parser.parse_args()
+
+    stats = run(
+        args.inputs, args.output, mode=args.mode, spam_workers=args.spam_workers,
+        concurrency=args.concurrency, chunk_size=args.chunk_size,
+        restart=args.restart, limit=args.limit
+    )
+    print(f"\nDone: {json.dumps(stats)}")
@@ -0,0 +1,277 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import parseaddr
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+ORDER_CACHE_TTL_SECONDS = float(os.getenv('ORDER_CACHE_TTL_SECONDS', '300'))
+ORDER_CACHE_MAX_CUSTOMERS = int(os.getenv('ORDER_CACHE_MAX_CUSTOMERS', '10000'))
+ORDERS_PER_CUSTOMER = int(os.getenv('ORDERS_PER_CUSTOMER', '5'))
+
+ORDER_ID_PATTERN = re.compile(r'\bORD-?\d{3,}\b', re.IGNORECASE)
+EMAIL_ADDRESS_PATTERN = re.compile(r'[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}')
+
+# Words that move calculate_refund off the "unused" rate, most severe first
+CONDITION_KEYWORDS = [
+    ("damaged", re.compile(r'\b(damaged|broken|cracked|defective|dented|scratched)\b', re.IGNORECASE)),
+    ("used", re.compile(r'\b(used|opened|worn|tried (it|them) on)\b', re.IGNORECASE)),
+]
+
+
+def normalize_order_id(order_id: str) -> str:
+    digits = re.sub(r'\D', '', order_id)
+    return f"ORD-{digits}"
+
+
+def extract_order_ids(text: str) -> tuple:
+    """Order ids mentioned in an email, normalized and sorted."""
+    return tuple(sorted({normalize_order_id(match) for match in ORDER_ID_PATTERN.findall(text or '')}))
+
+
+def normalize_sender(sender: str | None) -> str | None:
+    """Bare lower-case address from a From: value ("Jo <jo@x.com>"), or None if it is not one."""
+    address = parseaddr(sender or '')[1].strip().lower()
+    return address if EMAIL_ADDRESS_PATTERN.fullmatch(address) else None
+
+
+def product_condition(text: str) -> str:
+    for condition, pattern in CONDITION_KEYWORDS:
+        if pattern.search(text or ''):
+            return condition
+    return "unused"
+
+
+def order_key(text: str, sender: str = None) -> tuple:
+    """Everything the order context depends on; hashable, so it can key batch lookups.
+
+    ``sender`` must come from a trusted field (the mail client or the
+    message headers), never from the body: addresses typed into an email
+    say nothing about who sent it, so they are not looked up.
+    """
+    sender = normalize_sender(sender)
+    return extract_order_ids(text), (sender,) if sender else (), product_condition(text)
+
+
+def days_since(order_date, now: datetime = None) -> int | None:
+    if not isinstance(order_date, datetime):
+        return None
+    now = now or datetime.now(timezone.utc)
+    # pymongo returns naive datetimes in UTC
+    if order_date.tzinfo is None:
+        order_date = order_date.replace(tzinfo=timezone.utc)
+    return max((now - order_date).days, 0)
+
+
+class CustomerOrderCache:
+    """Recent orders per customer address, with a TTL and an LRU bound.
+
+    Orders change status but rarely move between customers, so a short TTL
+    keeps a follow-up email in the same thread from querying MongoDB again.
+    """
+
+    def __init__(self, ttl_seconds: float = ORDER_CACHE_TTL_SECONDS,
+                 max_customers: int = ORDER_CACHE_MAX_CUSTOMERS):
+        self.ttl_seconds = ttl_seconds
+        self.max_customers = max_customers
+        self._entries = OrderedDict()
+        # order_id -> customer address, so cached orders can be found by id
+        self._owners = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def _drop(self, customer_email: str):
+        """Remove an entry and its order-id owners; the caller holds the lock."""
+        entry = self._entries.pop(customer_email, None)
+        if entry is not None:
+            for order in entry[0]:
+                if self._owners.get(order.get('order_id')) == customer_email:
+                    del self._owners[order.get('order_id')]
+
+    def get(self, customer_email: str):
+        with self._lock:
+            entry = self._entries.get(customer_email)
+            if entry is None or time.time() - entry[1] > self.ttl_seconds:
+                self._drop(customer_email)
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(customer_email)
+            self._stats["hits"] += 1
+            return entry[0]
+
+    def put(self, customer_email: str, orders: list):
+        with self._lock:
+            self._drop(customer_email)
+            self._entries[customer_email] = (orders, time.time())
+            for order in orders:
+                self._owners[order.get('order_id')] = customer_email
+            while len(self._entries) > self.max_customers:
+                self._drop(next(iter(self._entries)))
+
+    def find_order(self, order_id: str):
+        """An order already cached under some customer, if it has not expired."""
+        with self._lock:
+            owner = self._owners.get(order_id)
+            entry = self._entries.get(owner)
+            if entry is None or time.time() - entry[1] > self.ttl_seconds:
+                if owner is not None:
+                    self._drop(owner)
+                return None
+            return next((order for order in entry[0] if order.get('order_id') == order_id), None)
+
+    def invalidate(self, customer_email: str = None):
+        with self._lock:
+            if customer_email:
+                self._drop(customer_email)
+            else:
+                self._entries.clear()
+                self._owners.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+                "customers": len(self._entries)
+            }
+
+
+def empty_order_context() -> dict:
+    return {"found": False, "order_ids": [], "customer_emails": [], "orders": [], "refund": None}
+
+
+def build_order_context(key: tuple, orders_by_id: dict, orders_by_customer: dict, db) -> dict:
+    """Shape resolved orders into retrieval context with exact refund inputs.
+
+    Nothing is resolved without a trusted sender: an order id typed into
+    the body says nothing about who is asking. Orders named in the email
+    win if the sender owns them; otherwise the sender's most recent order
+    is used. Orders placed under another address are never disclosed.
+    """
+    order_ids, customer_emails, condition = key
+    if not customer_emails:
+        return empty_order_context()
+
+    context = empty_order_context()
+    context["order_ids"] = list(order_ids)
+    context["customer_emails"] = list(customer_emails)
+
+    orders = [orders_by_id[oid] for oid in order_ids if orders_by_id.get(oid)]
+    orders = [o for o in orders if (o.get('customer_email') or '').lower() in customer_emails]
+    if not orders:
+        recent = [o for email in customer_emails for o in orders_by_customer.get(email) or []]
+        orders = sorted(recent, key=lambda o: o.get('order_date') or datetime.min, reverse=True)[:1]
+
+    if not orders:
+        return context
+
+    for order in orders:
+        days = days_since(order.get('order_date'))
+        context["orders"].append({
+            "order_id": order.get('order_id'),
+            "product_id": order.get('product_id'),
+            "status": order.get('status'),
+            "amount": order.get('amount'),
+            "order_date": order['order_date'].date().isoformat() if isinstance(order.get('order_date'), datetime) else None,
+            "days_since_purchase": days,
+        })
+
+    primary = context["orders"][0]
+    context["found"] = True
+    if primary["amount"] is not None and primary["days_since_purchase"] is not None:
+        context["refund"] = {
+            "order_id": primary["order_id"],
+            "product_condition": condition,
+            **db.calculate_refund(primary["amount"], primary["days_since_purchase"], condition)
+        }
+    return context
+
+
+class OrderLookup:
+    """Resolves the orders an email refers to without an LLM extraction step.
+
+    Order ids are pulled from the text with a regex and the sender's
+    address is passed in by the caller; both are resolved with indexed
+    queries on ``order_id`` and ``customer_email``. Emails without a
+    trusted sender get no order context. Each customer's recent orders are
+    cached.
+    """
+
+    def __init__(self, cache: CustomerOrderCache = None, orders_per_customer: int = ORDERS_PER_CUSTOMER):
+        self.cache = cache or CustomerOrderCache()
+        self.orders_per_customer = orders_per_customer
+
+    def _from_cache(self, order_ids: set, customer_emails: set):
+        orders_by_customer = {}
+        for email in customer_emails:
+            cached = self.cache.get(email)
+            if cached is not None:
+                orders_by_customer[email] = cached
+
+        orders_by_id = {}
+        for order_id in order_ids:
+            cached = self.cache.find_order(order_id)
+            if cached is not None:
+                orders_by_id[order_id] = cached
+
+        return orders_by_id, orders_by_customer
+
+    def _remember(self, by_customer: dict):
+        for email, orders in by_customer.items():
+            self.cache.put(email, orders)
+
+    def resolve_many(self, keys: list, db) -> dict:
+        """Order context for many order_key()s with at most two queries in total."""
+        # Order ids only count for emails with a trusted sender to check ownership against
+        order_ids = {oid for key in keys if key[1] for oid in key[0]}
+        customer_emails = {email for key in keys for email in key[1]}
+        orders_by_id, orders_by_customer = self._from_cache(order_ids, customer_emails)
+
+        missing_customers = sorted(customer_emails - orders_by_customer.keys())
+        if missing_customers:
+            fetched = db.get_orders_by_customer(missing_customers, self.orders_per_customer)
+            self._remember(fetched)
+            orders_by_customer.update(fetched)
+
+        missing_ids = sorted(order_ids - orders_by_id.keys())
+        if missing_ids:
+            orders_by_id.update({k: v for k, v in db.get_orders(missing_ids).items() if v})
+
+        return {
+            key: build_order_context(key, orders_by_id, orders_by_customer, db) if key[1]
+            else empty_order_context()
+            for key in keys
+        }
+
+    def lookup(self, text: str, db, sender: str = None) -> dict:
+        key = order_key(text, sender)
+        return self.resolve_many([key], db)[key]
+
+    async def alookup(self, text: str, adb, sender: str = None) -> dict:
+        key = order_key(text, sender)
+        order_ids, customer_emails, _ = key
+        if not customer_emails:
+            return empty_order_context()
+
+        orders_by_id, orders_by_customer = self._from_cache(set(order_ids), set(customer_emails))
+
+        missing_customers = sorted(set(customer_emails) - orders_by_customer.keys())
+        if missing_customers:
+            fetched = await adb.get_orders_by_customer(missing_customers, self.orders_per_customer)
+            self._remember(fetched)
+            orders_by_customer.update(fetched)
+
+        missing_ids = sorted(set(order_ids) - orders_by_id.keys())
+        if missing_ids:
+            orders_by_id.update({k: v for k, v in (await adb.get_orders(missing_ids)).items() if v})
+
+        return build_order_context(key, orders_by_id, orders_by_customer, adb)
+
+
+order_lookup = OrderLookup()
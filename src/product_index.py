@@ -0,0 +1,250 @@
+import argparse
+import re
+import time
+import numpy as np
+
+NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+
+def normalize(text: str) -> str:
+    return NON_ALNUM.sub(' ', (text or '').lower()).strip()
+
+
+def token_trigrams(token: str) -> list:
+    padded = f"  {token} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def trigrams(text: str) -> set:
+    """Character trigrams of each token, padded so short words still get grams."""
+    grams = set()
+    for token in normalize(text).split():
+        grams.update(token_trigrams(token))
+    return grams
+
+
+class ProductNameIndex:
+    """Trigram index over product names with ranked fuzzy lookup.
+
+    Each trigram maps to a sorted int32 array of product positions. A search
+    seeds candidates from the postings of the query's selective trigrams
+    (those in at most ``max_df`` of the catalog), best seeds first, or from
+    the rarest trigram's list when every trigram is common. Seeds are
+    verified ``max_candidates`` at a time by binary-searching the common
+    trigrams' postings, keeping names that cover at least ``min_score`` of
+    the query's trigrams; the scan stops once ``limit`` names contain every
+    query trigram, or after ``max_scan`` seeds. Results are ranked with names
+    containing the query (what the old $regex matched) first, then by how
+    much of the query they cover, then by Dice similarity
+    2 * overlap / (query grams + product grams). Query work depends on the
+    postings touched, not on catalog size.
+    """
+
+    def __init__(self, names: list, max_df: float = 0.01, max_candidates: int = 500,
+                 max_scan: int = 20000):
+        started = time.perf_counter()
+
+        self.names = list(names)
+        self.normalized = [normalize(name) for name in self.names]
+        self.max_postings = max(int(len(self.names) * max_df), 1000)
+        self.max_candidates = max_candidates
+        self.max_scan = max_scan
+
+        vocab = {}
+        token_grams = {}
+        gram_ids, product_ids, counts = [], [], np.zeros(len(self.names), dtype=np.int32)
+
+        for position, name in enumerate(self.normalized):
+            ids = set()
+            # Catalog names reuse a small vocabulary of words, so grams are computed once per token
+            for token in name.split():
+                cached = token_grams.get(token)
+                if cached is None:
+                    cached = token_grams[token] = [
+                        vocab.setdefault(gram, len(vocab)) for gram in token_trigrams(token)
+                    ]
+                ids.update(cached)
+            counts[position] = len(ids)
+            gram_ids.extend(ids)
+            product_ids.extend([position] * len(ids))
+
+        gram_ids = np.asarray(gram_ids, dtype=np.int32)
+        product_ids = np.asarray(product_ids, dtype=np.int32)
+
+        # Group pairs by gram once; postings are then views into one array
+        order = np.argsort(gram_ids, kind='stable')
+        self._postings = product_ids[order]
+        bounds = np.searchsorted(gram_ids[order], np.arange(len(vocab) + 1))
+        self._spans = {gram: (bounds[i], bounds[i + 1]) for gram, i in vocab.items()}
+        self._gram_counts = counts
+
+        self.build_ms = (time.perf_counter() - started) * 1000
+
+    def __len__(self):
+        return len(self.names)
+
+    def _postings_for(self, gram: str) -> np.ndarray:
+        start, end = self._spans[gram]
+        return self._postings[start:end]
+
+    def search(self, query: str, limit: int = 5, min_score: float = 0.6) -> list:
+        """Ranked [(position, similarity)] of names matching at least `min_score` of the query's trigrams."""
+        query_grams = trigrams(query)
+        postings = sorted(
+            (self._postings_for(gram) for gram in query_grams if gram in self._spans), key=len
+        )
+        if not postings:
+            return []
+
+        selective = [p for p in postings if len(p) <= self.max_postings]
+        needed = int(np.ceil(min_score * len(query_grams)))
+
+        if selective:
+            rest = postings[len(selective):]
+            seeds, seed_overlap = np.unique(np.concatenate(selective), return_counts=True)
+
+            # Best seeds first, so the scan below can stop early
+            order = np.argsort(-seed_overlap, kind='stable')
+            seeds, seed_overlap = seeds[order], seed_overlap[order]
+        else:
+            # Only common words: scan the rarest list in catalog (find_one) order
+            rest = postings[1:]
+            seeds = postings[0]
+            seed_overlap = np.ones(len(seeds), dtype=np.int64)
+
+        wanted = limit * 4
+        complete = 0
+        found, found_overlap = [], []
+        full_seed = max(len(selective), 1)
+        for start in range(0, min(len(seeds), self.max_scan), self.max_candidates):
+            # Seeds are sorted by seed hits: past this point none can contain every gram
+            if seed_overlap[start] < full_seed and sum(len(c) for c in found) >= wanted:
+                break
+
+            candidates, overlap = self._verify(
+                seeds[start:start + self.max_candidates],
+                seed_overlap[start:start + self.max_candidates],
+                rest, needed
+            )
+            found.append(candidates)
+            found_overlap.append(overlap)
+            complete += int(np.count_nonzero(overlap == len(query_grams)))
+            if complete >= limit:
+                break
+
+        candidates, overlap = np.concatenate(found), np.concatenate(found_overlap)
+        if len(candidates) == 0:
+            return []
+
+        dice = 2.0 * overlap / (len(query_grams) + self._gram_counts[candidates])
+        # Most of the query covered first; Dice breaks ties in favour of tighter names
+        top = np.lexsort((-dice, -overlap))[:wanted]
+        needle = normalize(query)
+        ranked = sorted(
+            ((int(candidates[i]), int(overlap[i]), float(dice[i])) for i in top),
+            key=lambda item: (self._match_rank(needle, self.normalized[item[0]]), -item[1], -item[2])
+        )
+        return [(position, score) for position, _, score in ranked[:limit]]
+
+    def _verify(self, candidates, overlap, rest, needed):
+        """Add the common grams' hits by binary search, dropping hopeless candidates as it goes."""
+        keep = overlap + len(rest) >= needed
+        candidates, overlap = candidates[keep], overlap[keep]
+
+        # Shortest lists first, so pruning removes the most candidates earliest
+        for i, posting in enumerate(rest):
+            if len(candidates) == 0:
+                break
+            found = np.searchsorted(posting, candidates)
+            found[found == len(posting)] = 0
+            overlap = overlap + (posting[found] == candidates)
+
+            keep = overlap + (len(rest) - i - 1) >= needed
+            candidates, overlap = candidates[keep], overlap[keep]
+
+        return candidates, overlap
+
+    @staticmethod
+    def _match_rank(needle: str, name: str) -> int:
+        # Whole-word hits beat substrings, which beat fuzzy matches
+        if f" {needle} " in f" {name} ":
+            return 0
+        if needle in name:
+            return 1
+        return 2
+
+
+def synthetic_catalog(n: int, seed: int = 42) -> list:
+    rng = np.random.default_rng(seed)
+    brands = ["Acme", "Globex", "Initech", "Umbrella", "Stark", "Wayne", "Hooli", "Vandelay", "Soylent", "Tyrell"]
+    kinds = ["Laptop", "Smartphone", "Headphones", "Smart Watch", "Running Shoes", "Tablet", "Monitor",
+             "Keyboard", "Mouse", "Speaker", "Camera", "Backpack", "Charger", "Router", "Jacket"]
+    variants = ["Pro", "Max", "Mini", "Sport Edition", "Premium", "Lite", "Ultra", "Plus", "Air", "X"]
+
+    b = rng.integers(len(brands), size=n)
+    k = rng.integers(len(kinds), size=n)
+    v = rng.integers(len(variants), size=n)
+    sizes = rng.integers(10, 99, size=n)
+    codes = rng.integers(100000, 999999, size=n)
+
+    return [
+        f"{brands[b[i]]} {kinds[k[i]]} {variants[v[i]]} {sizes[i]} inch {codes[i]}"
+        for i in range(n)
+    ]
+
+
+def benchmark(n: int = 1_000_000, queries: int = 200, seed: int = 42) -> dict:
+    """Compare trigram search with a case-insensitive regex scan (what $regex does without an index)."""
+    names = synthetic_catalog(n, seed)
+    index = ProductNameIndex(names)
+    rng = np.random.default_rng(seed + 1)
+
+    # Mix of exact codes, partial names and misspelt names
+    targets = rng.integers(n, size=queries)
+    probes = []
+    for i, name in enumerate(names[t] for t in targets):
+        parts = name.split()
+        if i % 3 == 0:
+            probes.append(parts[-1])
+        elif i % 3 == 1:
+            probes.append(f"{parts[1]} {parts[-1]}")
+        else:
+            # Transposed letters in the product word
+            word = parts[1]
+            probes.append(f"{word[:2]}{word[3]}{word[2]}{word[4:]} {parts[-1]}")
+
+    started = time.perf_counter()
+    results = [index.search(probe, limit=5) for probe in probes]
+    index_ms = (time.perf_counter() - started) * 1000 / len(probes)
+
+    # Did the product the probe was cut from come back in the top 5?
+    found = [
+        any(names[position] == names[target] for position, _ in result)
+        for target, result in zip(targets, results)
+    ]
+
+    regex_probes = probes[:max(queries // 20, 5)]
+    started = time.perf_counter()
+    for probe in regex_probes:
+        pattern = re.compile(re.escape(probe), re.IGNORECASE)
+        next((name for name in names if pattern.search(name)), None)
+    regex_ms = (time.perf_counter() - started) * 1000 / len(regex_probes)
+
+    return {
+        "products": n,
+        "build_s": round(index.build_ms / 1000, 2),
+        "index_ms_per_query": round(index_ms, 4),
+        "regex_scan_ms_per_query": round(regex_ms, 2),
+        "speedup": round(regex_ms / index_ms, 1) if index_ms else None,
+        "index_recall_at_5": sum(found) / len(found)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the product-name trigram index against a regex scan.")
+    parser.add_argument('--products', type=int, default=1_000_000)
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+
+    for key, value in benchmark(args.products, args.queries).items():
+        print(f"{key:>26}: {value}")
@@ -23,3 +23,16 @@ Policy Info: {policy_info}
 
 Create a helpful response with greeting, acknowledgment, solution, and action items.""")
 ])
+
+CLASSIFY_AND_RESPOND_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", SYSTEM_PROMPT),
+    ("human", """Classify this customer email and write the reply in one step.
+
+Email: {email_content}
+
+Categories: product_return, refund_request, product_damage, delivery_issue, product_inquiry, warranty_claim, general, other
+
+Policy Info: {policy_info}
+
+Use only the policy information relevant to the category you choose. Return the classification (query_type, confidence, keywords, requires_database_lookup, reasoning) and a professional response with greeting, acknowledgment, solution, and action items.""")
+])
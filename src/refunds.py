@@ -0,0 +1,103 @@
+import argparse
+import time
+import numpy as np
+
+# Reason codes returned by calculate_refunds, in the order the scalar rules test them
+REFUND_REASONS = [
+    "Return window expired (30 days)",
+    "Partial refund - beyond 14-day full refund window",
+    "Slight reduction due to used condition",
+    "Reduced refund due to damage",
+    "Full refund eligible",
+]
+EXPIRED, PARTIAL, USED, DAMAGED, FULL = range(len(REFUND_REASONS))
+
+CONDITION_FACTORS = {"used": 0.9, "damaged": 0.7}
+
+
+def round_cents(values: np.ndarray) -> np.ndarray:
+    """Elementwise round(x, 2) with Python's exact semantics.
+
+    np.round scales by 100 and rounds the scaled value, which can land on
+    the other side of a half-cent than Python's correctly-rounded round().
+    Values whose scaled form sits within two ulps of a half-cent are
+    recomputed with round(); they are rare, so the rest stays vectorized.
+    """
+    scaled = values * 100.0
+    rounded = np.rint(scaled)
+
+    near_half = np.abs(np.abs(scaled - np.floor(scaled)) - 0.5) <= 2 * np.spacing(np.abs(scaled))
+    result = rounded / 100.0
+
+    for i in np.flatnonzero(near_half):
+        result[i] = round(float(values[i]), 2)
+    return result
+
+
+def calculate_refunds(amounts, days_since_purchase, conditions) -> dict:
+    """Vectorized DatabaseConnector.calculate_refund over columnar inputs.
+
+    Takes equal-length sequences (or arrays) of order amounts, days since
+    purchase and product conditions. Returns arrays of original and refund
+    amounts, refund percentages, eligibility and indexes into REFUND_REASONS;
+    row i equals calculate_refund(amounts[i], days_since_purchase[i], conditions[i]).
+    """
+    amounts = np.asarray(amounts, dtype=np.float64)
+    days = np.asarray(days_since_purchase)
+    conditions = np.asarray(conditions, dtype=object)
+
+    if not (amounts.shape == days.shape == conditions.shape) or amounts.ndim != 1:
+        raise ValueError("amounts, days_since_purchase and conditions must be 1-D and the same length")
+
+    used = conditions == "used"
+    damaged = conditions == "damaged"
+
+    # Time rule, then the condition factor, in the same order and precision as the scalar code
+    percentage = np.select([days > 30, days > 14], [0.0, 80.0], default=100.0)
+    factor = np.ones(len(amounts))
+    factor[used] = CONDITION_FACTORS["used"]
+    factor[damaged] = CONDITION_FACTORS["damaged"]
+    percentage = percentage * factor
+
+    reason = np.select(
+        [days > 30, days > 14, used, damaged],
+        [EXPIRED, PARTIAL, USED, DAMAGED],
+        default=FULL
+    ).astype(np.int8)
+
+    return {
+        "original_amount": amounts,
+        "refund_amount": round_cents(amounts * (percentage / 100)),
+        "refund_percentage": percentage,
+        "eligible": percentage > 0,
+        "reason_code": reason,
+    }
+
+
+def refund_reasons(reason_codes) -> list:
+    return [REFUND_REASONS[code] for code in reason_codes]
+
+
+def random_returns(n: int, seed: int = 0) -> tuple:
+    """Returns with awkward values: half-cent amounts, window boundaries, unknown conditions."""
+    rng = np.random.default_rng(seed)
+    amounts = np.concatenate([
+        rng.uniform(0, 5000, n // 2),
+        rng.integers(0, 1_000_000, n - n // 2) / 1000.0 + 0.005,
+    ])
+    days = rng.choice(np.array([-1, 0, 13, 14, 15, 29, 30, 31, 365]), n)
+    days = np.where(rng.random(n) < 0.5, rng.integers(-5, 60, n), days)
+    conditions = rng.choice(np.array(["unused", "used", "damaged", "opened", ""], dtype=object), n)
+    return rng.permutation(amounts), days, conditions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time bulk refunds; tests/test_refunds.py checks them against the scalar calculation.")
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    amounts, days, conditions = random_returns(args.rows, args.seed)
+    started = time.perf_counter()
+    calculate_refunds(amounts, days, conditions)
+    print(f"{args.rows} refunds in {(time.perf_counter() - started) * 1000:.1f} ms")
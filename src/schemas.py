@@ -146,3 +146,12 @@ class ValidationResult(BaseModel):
         ge=0.0,
         le=1.0
     )
+
+
+class ClassifiedResponse(BaseModel):
+    classification: EmailClassification = Field(
+        description="Classification of the customer email"
+    )
+    response: EmailResponse = Field(
+        description="Reply to the customer, using only the policy information provided"
+    )
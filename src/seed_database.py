@@ -3,6 +3,13 @@ from pymongo import MongoClient
 from dotenv import load_dotenv
 from datetime import datetime
 
+try:
+    from .snapshot import bump_catalog_version
+    from .product_index import normalize
+except ImportError:
+    from snapshot import bump_catalog_version
+    from product_index import normalize
+
 load_dotenv()
 
 
@@ -153,6 +160,10 @@ def seed_database():
         }
     ]
     
+    # Normalized names back the indexed prefix lookup in get_products_by_names
+    for product in products:
+        product["name_lower"] = normalize(product["name"])
+    
     # Insert data
     db.products.insert_many(products)
     print(f"✅ Inserted {len(products)} products")
@@ -166,11 +177,17 @@ def seed_database():
     # Create indexes
     db.products.create_index("product_id")
     db.products.create_index("category")
+    db.products.create_index("name_lower")
     db.policies.create_index([("policy_type", 1), ("category", 1)])
     db.orders.create_index("order_id")
+    db.orders.create_index([("customer_email", 1), ("order_date", -1)])
     
     print("✅ Created indexes")
     
+    # Running servers reload their policy/product snapshot on the next check
+    version = bump_catalog_version(db)
+    print(f"✅ Catalog version bumped to {version}")
+    
     print("\n" + "="*60)
     print("DATABASE SEEDED SUCCESSFULLY!")
     print("="*60)
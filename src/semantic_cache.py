@@ -0,0 +1,243 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+SEMANTIC_CACHE_DIR = os.getenv('SEMANTIC_CACHE_DIR', 'data/semantic_cache')
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.92'))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv('SEMANTIC_CACHE_MAX_ENTRIES', '2000'))
+SEMANTIC_CACHE_TTL_SECONDS = float(os.getenv('SEMANTIC_CACHE_TTL_SECONDS', str(7 * 24 * 3600)))
+EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', 'text-embedding-3-small')
+
+METADATA_NAME = 'entries.json'
+
+
+def context_fingerprint(context: dict | None) -> str:
+    """Hash of the policy context a reply was written against.
+
+    Replies are only reused while the policies behind them are unchanged, so
+    editing a policy in MongoDB invalidates every reply that quoted it.
+    """
+    payload = json.dumps(context or {}, sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class SemanticResponseCache:
+    """Reuses past replies for emails that mean the same thing.
+
+    One FAISS inner-product index per (QueryType, policy fingerprint) holds
+    L2-normalized email embeddings, so scores are cosine similarities. A
+    lookup searches only the index matching its own context and returns
+    the stored reply of the nearest email above ``threshold``; replies
+    written against other contexts are never consulted, and never evict
+    each other. Entries expire after ``ttl_seconds``, and each query type
+    keeps at most ``max_entries`` across its contexts, evicting least
+    recently used. Policy edits call invalidate().
+    """
+
+    def __init__(self, embeddings, cache_dir: str = SEMANTIC_CACHE_DIR,
+                 threshold: float = SEMANTIC_CACHE_THRESHOLD,
+                 max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES,
+                 ttl_seconds: float = SEMANTIC_CACHE_TTL_SECONDS,
+                 search_k: int = 5, persist_every: int = 20):
+        import faiss
+
+        self.faiss = faiss
+        self.embeddings = embeddings
+        self.cache_dir = cache_dir
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.search_k = search_k
+        self.persist_every = persist_every
+
+        # "<query_type>-<fingerprint>" -> index
+        self.indexes = {}
+        self.entries = {}
+        self.next_id = 0
+        self._dirty = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0, "misses": 0, "stores": 0,
+            "expired": 0, "evicted": 0, "invalidated": 0
+        }
+
+        self.load()
+
+    @staticmethod
+    def _scope(query_type: str, fingerprint: str) -> str:
+        return f"{query_type}-{fingerprint}"
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32).reshape(1, -1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def embed(self, email: str) -> np.ndarray:
+        return self._normalize(self.embeddings.embed_query(email))
+
+    async def aembed(self, email: str) -> np.ndarray:
+        return self._normalize(await self.embeddings.aembed_query(email))
+
+    def _index(self, scope: str, dim: int):
+        index = self.indexes.get(scope)
+        if index is None:
+            index = self.indexes[scope] = self.faiss.IndexIDMap2(self.faiss.IndexFlatIP(dim))
+        return index
+
+    def _remove(self, ids: list, reason: str):
+        """Remove entries from whichever scoped indexes hold them; empty indexes are dropped."""
+        by_scope = {}
+        for entry_id in ids:
+            entry = self.entries.pop(entry_id, None)
+            if entry is not None:
+                by_scope.setdefault(self._scope(entry['query_type'], entry['fingerprint']), []).append(entry_id)
+
+        for scope, scope_ids in by_scope.items():
+            index = self.indexes[scope]
+            index.remove_ids(np.asarray(scope_ids, dtype=np.int64))
+            if index.ntotal == 0:
+                del self.indexes[scope]
+
+        removed = sum(len(scope_ids) for scope_ids in by_scope.values())
+        if removed:
+            self._stats[reason] += removed
+            self._dirty += 1
+
+    def lookup(self, vector: np.ndarray, query_type: str, context: dict | None = None) -> str | None:
+        """Return a cached reply for this email embedding, or None."""
+        scope = self._scope(query_type, context_fingerprint(context))
+        now = time.time()
+
+        with self._lock:
+            index = self.indexes.get(scope)
+            if index is None or index.ntotal == 0:
+                self._stats["misses"] += 1
+                return None
+
+            scores, ids = index.search(vector, min(self.search_k, index.ntotal))
+            expired = []
+            response = None
+
+            for score, entry_id in zip(scores[0], ids[0]):
+                entry = self.entries.get(int(entry_id))
+                if entry is None:
+                    continue
+                if now - entry['created_at'] > self.ttl_seconds:
+                    expired.append(int(entry_id))
+                elif response is None and score >= self.threshold:
+                    entry['last_used'] = now
+                    entry['hits'] += 1
+                    response = entry['response']
+
+            self._remove(expired, "expired")
+            self._stats["hits" if response is not None else "misses"] += 1
+
+        return response
+
+    def put(self, vector: np.ndarray, query_type: str, context: dict | None,
+            email: str, response: str):
+        """Store a generated reply under its email embedding."""
+        fingerprint = context_fingerprint(context)
+        now = time.time()
+
+        with self._lock:
+            index = self._index(self._scope(query_type, fingerprint), vector.shape[1])
+
+            entry_id = self.next_id
+            self.next_id += 1
+            index.add_with_ids(vector, np.asarray([entry_id], dtype=np.int64))
+            self.entries[entry_id] = {
+                "query_type": query_type,
+                "fingerprint": fingerprint,
+                "email": email,
+                "response": response,
+                "created_at": now,
+                "last_used": now,
+                "hits": 0
+            }
+            self._stats["stores"] += 1
+            self._dirty += 1
+
+            # Replies under an outdated context are never hit again, so they age out first
+            same_type = [(e['last_used'], i) for i, e in self.entries.items() if e['query_type'] == query_type]
+            overflow = len(same_type) - self.max_entries
+            if overflow > 0:
+                self._remove([i for _, i in sorted(same_type)[:overflow]], "evicted")
+
+            if self._dirty >= self.persist_every:
+                self._save_locked()
+
+    def invalidate(self, query_type: str = None) -> int:
+        """Drop every cached reply, or only those of one query type."""
+        with self._lock:
+            ids = [i for i, e in self.entries.items() if query_type is None or e['query_type'] == query_type]
+            self._remove(ids, "invalidated")
+            self._save_locked()
+
+        print(f"Semantic cache invalidated {len(ids)} entries ({query_type or 'all types'})")
+        return len(ids)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+                "threshold": self.threshold,
+                "size": dict(Counter(e['query_type'] for e in self.entries.values())),
+                "contexts": len(self.indexes)
+            }
+
+    def _save_locked(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        for scope, index in self.indexes.items():
+            self.faiss.write_index(index, os.path.join(self.cache_dir, f"{scope}.faiss"))
+
+        # Indexes of scopes that emptied since the last save
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.faiss') and name[:-len('.faiss')] not in self.indexes:
+                os.remove(os.path.join(self.cache_dir, name))
+
+        with open(os.path.join(self.cache_dir, METADATA_NAME), 'w') as f:
+            json.dump({
+                "next_id": self.next_id,
+                "entries": {str(i): e for i, e in self.entries.items()}
+            }, f)
+
+        self._dirty = 0
+
+    def save(self):
+        with self._lock:
+            self._save_locked()
+
+    def load(self):
+        metadata_path = os.path.join(self.cache_dir, METADATA_NAME)
+        if not os.path.exists(metadata_path):
+            return
+
+        try:
+            with open(metadata_path) as f:
+                metadata = json.load(f)
+
+            entries = {int(i): e for i, e in metadata['entries'].items()}
+            indexes = {}
+            for scope in {self._scope(e['query_type'], e['fingerprint']) for e in entries.values()}:
+                index_path = os.path.join(self.cache_dir, f"{scope}.faiss")
+                indexes[scope] = self.faiss.read_index(index_path)
+
+            self.entries, self.indexes = entries, indexes
+            self.next_id = metadata['next_id']
+            print(f"Semantic cache loaded: {len(entries)} entries from {self.cache_dir}")
+
+        except Exception as e:
+            print(f"Semantic cache not loaded, starting empty: {e}")
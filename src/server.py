@@ -1,26 +1,23 @@
 import os
 import sys
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 from dotenv import load_dotenv
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from model_training.model.model import SpamClassifier
-from src.workflow import process_email
+from src.spam import SPAM_BATCH_SIZE, spam_classifier, spam_batcher, predict_spam
+from src.workflow import process_email, stream_email, semantic_cache, llm_cache
+from src.sse import SSE_HEADERS, sse_event, spam_event
+from src.database import get_database
+from src.orders import order_lookup
+from src.bulk import parse_bulk_request, process_bulk, ndjson_line
 
 load_dotenv()
 
 app = Flask(__name__)
 CORS(app)  
 
-try:
-    spam_classifier = SpamClassifier()
-    print("Spam classifier loaded successfully")
-except Exception as e:
-    print(f"Error loading spam classifier: {e}")
-    spam_classifier = None
-
 
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -32,6 +29,47 @@ def health_check():
     })
 
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Runtime stats for tuning the inference path."""
+    return jsonify({
+        "spam_batcher": spam_batcher.stats() if spam_batcher else None,
+        "spam_classifier": spam_classifier.stats() if spam_classifier else None,
+        "semantic_cache": semantic_cache.stats() if semantic_cache else None,
+        "llm_cache": llm_cache.stats() if llm_cache else None,
+        "catalog_snapshot": get_database().snapshot.stats() if get_database().snapshot else None,
+        "order_cache": order_lookup.cache.stats()
+    })
+
+
+@app.route('/cache/invalidate', methods=['POST'])
+def invalidate_cache():
+    """Drop cached replies, e.g. after editing policies outside MongoDB.
+
+    Body (optional): {"query_type": "refund_request"} to clear one type only.
+    """
+    if not semantic_cache:
+        return jsonify({"error": "Semantic cache not enabled"}), 400
+    
+    data = request.get_json(silent=True) or {}
+    removed = semantic_cache.invalidate(data.get('query_type'))
+    
+    return jsonify({"invalidated": removed})
+
+
+@app.route('/catalog/invalidate', methods=['POST'])
+def invalidate_catalog():
+    """Reload the in-memory policy/product snapshot after editing MongoDB."""
+    db = get_database()
+    
+    if db.snapshot is None:
+        return jsonify({"error": "Catalog snapshot not enabled"}), 400
+    
+    db.invalidate_snapshot()
+    
+    return jsonify({"catalog_snapshot": db.snapshot.stats()})
+
+
 @app.route('/classify-email', methods=['POST'])
 def classify_email():
     
@@ -47,7 +85,7 @@ def classify_email():
             return jsonify({"error": "Spam classifier not initialized"}), 500
         
         # Classify email
-        result = spam_classifier.predict(email_text)
+        result = predict_spam(email_text)
         
         return jsonify(result)
     
@@ -55,6 +93,41 @@ def classify_email():
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/classify-email/batch', methods=['POST'])
+def classify_email_batch():
+    
+    try:
+        data = request.get_json()
+        
+        if not data or 'emails' not in data:
+            return jsonify({"error": "Missing 'emails' in request body"}), 400
+        
+        emails = data['emails']
+        
+        if not isinstance(emails, list):
+            return jsonify({"error": "'emails' must be a list"}), 400
+        
+        if not spam_classifier:
+            return jsonify({"error": "Spam classifier not initialized"}), 500
+        
+        batch_size = data.get('batch_size')
+        if batch_size is None:
+            batch_size = SPAM_BATCH_SIZE
+        elif not isinstance(batch_size, int) or isinstance(batch_size, bool) or batch_size < 1:
+            return jsonify({"error": "'batch_size' must be a positive integer"}), 400
+        
+        # Results come back in the same order as the submitted emails
+        results = spam_classifier.predict_batch(emails, batch_size=batch_size)
+        
+        return jsonify({
+            "results": results,
+            "count": len(results)
+        })
+    
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 @app.route('/generate-response', methods=['POST'])
 def generate_response():
     
@@ -64,11 +137,16 @@ def generate_response():
         if not data or 'email' not in data:
             return jsonify({"error": "Missing 'email' in request body"}), 400
         
+        if not isinstance(data.get('sender') or '', str):
+            return jsonify({"error": "'sender' must be a string"}), 400
+        
         email_text = data['email']
+        # The sender's address from the mail client, used to look up their orders
+        sender = data.get('sender')
         
         # Step 1: Check if spam
         if spam_classifier:
-            spam_result = spam_classifier.predict(email_text)
+            spam_result = predict_spam(email_text)
             
             if spam_result['prediction'] == 'spam':
                 return jsonify({
@@ -82,7 +160,7 @@ def generate_response():
             spam_result = {"prediction": "ham", "confidence": 0.5}
         
         print(f"Generating response for email: {email_text[:100]}...")
-        result = process_email(email_text)
+        result = process_email(email_text, sender_email=sender)
         
         if not result.get('success'):
             error_msg = result.get('error', 'Unknown error during response generation')
@@ -92,7 +170,8 @@ def generate_response():
                 "spam_confidence": 1 - spam_result.get('spam_probability', 0.5),
                 "response": None,
                 "success": False,
-                "error": error_msg
+                "error": error_msg,
+                "timings": result.get('timings')
             }), 500
         
         print(f"Response generated successfully")
@@ -102,6 +181,7 @@ def generate_response():
             "response": result.get('response'),
             "classification": result.get('classification'),
             "validation": result.get('validation'),
+            "timings": result.get('timings'),
             "success": True
         })
     
@@ -116,6 +196,70 @@ def generate_response():
         }), 500
 
 
+@app.route('/generate-response/stream', methods=['POST'])
+def generate_response_stream():
+    """Server-sent events: spam, classification, token..., validation, done.
+    
+    The "done" event carries the same body /generate-response returns, so
+    clients can fall back to it when they cannot render tokens.
+    """
+    data = request.get_json(silent=True)
+    
+    if not data or 'email' not in data:
+        return jsonify({"error": "Missing 'email' in request body"}), 400
+    
+    if not isinstance(data.get('sender') or '', str):
+        return jsonify({"error": "'sender' must be a string"}), 400
+    
+    email_text = data['email']
+    sender = data.get('sender')
+    
+    def events():
+        try:
+            if spam_classifier:
+                event, spam = spam_event(predict_spam(email_text))
+                yield sse_event(event, spam)
+                
+                if spam['is_spam']:
+                    yield sse_event("done", {
+                        **spam,
+                        "response": None,
+                        "message": "Email classified as spam. No response generated.",
+                        "success": True
+                    })
+                    return
+            
+            for event, payload in stream_email(email_text, sender_email=sender):
+                yield sse_event(event, payload)
+        
+        except Exception as e:
+            print(f"Server error: {e}")
+            yield sse_event("done", {"response": None, "success": False, "error": f"Server error: {str(e)}"})
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream', headers=SSE_HEADERS)
+
+
+@app.route('/process-emails/bulk', methods=['POST'])
+def process_emails_bulk():
+    """Process a whole inbox; streams one NDJSON record per email as it finishes.
+
+    Body: {"emails": [str | {"id": ..., "email": str, "sender": str}], "mode": ..., "concurrency": n}
+    Spam is filtered in one vectorized pass and returned first, without LLM work.
+    """
+    data = request.get_json(silent=True)
+    
+    try:
+        emails, mode, concurrency = parse_bulk_request(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    def records():
+        for record in process_bulk(emails, mode, concurrency):
+            yield ndjson_line(record)
+    
+    return Response(stream_with_context(records()), mimetype='application/x-ndjson', headers=SSE_HEADERS)
+
+
 @app.route('/test', methods=['GET'])
 def test_endpoint():
     sample_email = "I would like to return my laptop that I purchased last week. It has a screen issue."
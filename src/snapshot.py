@@ -0,0 +1,251 @@
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+try:
+    from .product_index import ProductNameIndex, normalize
+except ImportError:
+    from product_index import ProductNameIndex, normalize
+
+load_dotenv()
+
+
+SNAPSHOT_ENABLED = os.getenv('CATALOG_SNAPSHOT', 'True') == 'True'
+SNAPSHOT_TTL_SECONDS = float(os.getenv('CATALOG_SNAPSHOT_TTL_SECONDS', '3600'))
+SNAPSHOT_CHECK_SECONDS = float(os.getenv('CATALOG_SNAPSHOT_CHECK_SECONDS', '30'))
+SNAPSHOT_WATCH = os.getenv('CATALOG_SNAPSHOT_WATCH', 'True') == 'True'
+SNAPSHOT_DEBOUNCE_SECONDS = float(os.getenv('CATALOG_SNAPSHOT_DEBOUNCE_SECONDS', '2'))
+# Candidates considered per name by the exact product lookups
+PRODUCT_NAME_CANDIDATES = int(os.getenv('PRODUCT_NAME_CANDIDATES', '5'))
+
+# Document whose `version` field is bumped whenever policies or products change
+VERSION_COLLECTION = 'meta'
+VERSION_ID = 'catalog'
+
+
+def bump_catalog_version(db) -> int:
+    """Mark the catalog as changed so every running snapshot reloads on its next check."""
+    doc = db[VERSION_COLLECTION].find_one_and_update(
+        {"_id": VERSION_ID},
+        {"$inc": {"version": 1}, "$set": {"updated_at": time.time()}},
+        upsert=True,
+        return_document=True
+    )
+    return doc['version'] if doc else 1
+
+
+class _Catalog:
+    """Immutable, indexed copy of the policies and products collections.
+
+    Indexes keep find_one semantics: the first document in natural order
+    wins, so answers match what MongoDB would have returned.
+    """
+
+    def __init__(self, policies: list, products: list, version, loaded_at: float):
+        self.version = version
+        self.loaded_at = loaded_at
+        self.products = products
+
+        self.policy_by_type = {}
+        self.policy_by_type_category = {}
+        for policy in policies:
+            policy_type = policy.get('policy_type')
+            self.policy_by_type.setdefault(policy_type, policy)
+            self.policy_by_type_category.setdefault((policy_type, policy.get('category')), policy)
+
+        self.product_by_id = {}
+        self.product_by_category = {}
+        for product in products:
+            self.product_by_id.setdefault(product.get('product_id'), product)
+            self.product_by_category.setdefault(product.get('category'), product)
+
+        # Rebuilt with every reload, so name search always matches the catalog
+        self.name_index = ProductNameIndex([product.get('name') or '' for product in products])
+
+        self.counts = {"policies": len(policies), "products": len(products)}
+
+
+class CatalogSnapshot:
+    """Serves policy and product lookups from memory instead of find_one.
+
+    The whole catalog is loaded in the background after start() and swapped
+    in as one object, so readers never lock and never see a half-built
+    snapshot; until the first load finishes, ready() is False and callers
+    query MongoDB. It is refreshed in the background when:
+
+    - the ``meta.catalog`` version document changes (checked every
+      ``check_interval`` seconds),
+    - the snapshot is older than ``ttl_seconds``,
+    - a change stream on either collection reports a write (replica sets
+      only); a burst of writes is debounced into one reload,
+    - or invalidate() is called, which reloads immediately.
+    """
+
+    def __init__(self, db, ttl_seconds: float = SNAPSHOT_TTL_SECONDS,
+                 check_interval: float = SNAPSHOT_CHECK_SECONDS, watch: bool = SNAPSHOT_WATCH,
+                 debounce_seconds: float = SNAPSHOT_DEBOUNCE_SECONDS):
+        self.db = db
+        self.ttl_seconds = ttl_seconds
+        self.check_interval = check_interval
+        self.watch = watch
+        self.debounce_seconds = debounce_seconds
+
+        self.catalog = None
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._reload_requested = threading.Event()
+        self._threads = []
+        self._stats = {"reloads": 0, "reload_errors": 0, "hits": 0}
+        # Lookups count hits from every request thread
+        self._stats_lock = threading.Lock()
+
+    # --- lifecycle ---------------------------------------------------------
+
+    def start(self):
+        """Load the catalog and keep it fresh from background threads; returns without waiting."""
+        refresher = threading.Thread(target=self._refresh_loop, name="catalog-refresh", daemon=True)
+        refresher.start()
+        self._threads.append(refresher)
+
+        if self.watch:
+            watcher = threading.Thread(target=self._watch_loop, name="catalog-watch", daemon=True)
+            watcher.start()
+            self._threads.append(watcher)
+
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._reload_requested.set()
+
+    def ready(self) -> bool:
+        return self.catalog is not None
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def _version(self):
+        doc = self.db[VERSION_COLLECTION].find_one({"_id": VERSION_ID})
+        return doc.get('version') if doc else None
+
+    def reload(self):
+        with self._reload_lock:
+            try:
+                version = self._version()
+                policies = list(self.db['policies'].find({}))
+                products = list(self.db['products'].find({}))
+                self.catalog = _Catalog(policies, products, version, time.time())
+                self._count("reloads")
+                print(f"Catalog snapshot loaded: {len(policies)} policies, {len(products)} products (version {version})")
+            except Exception as e:
+                # Keep serving the previous snapshot; lookups fall back to MongoDB if there is none
+                self._count("reload_errors")
+                print(f"Catalog snapshot reload failed: {e}")
+
+    def invalidate(self):
+        """Reload from MongoDB now; if that fails, the previous snapshot keeps serving."""
+        self.reload()
+
+    def request_reload(self):
+        """Reload soon; requests within ``debounce_seconds`` of each other share one reload."""
+        self._reload_requested.set()
+
+    def is_stale(self) -> bool:
+        catalog = self.catalog
+        if catalog is None or time.time() - catalog.loaded_at > self.ttl_seconds:
+            return True
+        return self._version() != catalog.version
+
+    def _refresh_loop(self):
+        # First load happens here, off the import path
+        self.reload()
+
+        while not self._stop.is_set():
+            requested = self._reload_requested.wait(self.check_interval)
+            if self._stop.is_set():
+                break
+
+            if requested:
+                # Let a burst of writes settle, then rebuild once
+                self._stop.wait(self.debounce_seconds)
+                self._reload_requested.clear()
+                self.reload()
+                continue
+
+            try:
+                if self.is_stale():
+                    self.reload()
+            except Exception as e:
+                print(f"Catalog snapshot check failed: {e}")
+
+    def _watch_loop(self):
+        pipeline = [{"$match": {"ns.coll": {"$in": ["policies", "products", VERSION_COLLECTION]}}}]
+        while not self._stop.is_set():
+            try:
+                with self.db.watch(pipeline, max_await_time_ms=1000) as stream:
+                    while not self._stop.is_set():
+                        if stream.try_next() is not None:
+                            self.request_reload()
+            except Exception as e:
+                # Standalone servers and mocks have no change streams; the version/TTL check still runs
+                print(f"Catalog change stream unavailable, relying on version/TTL checks: {e}")
+                return
+
+    # --- lookups (find_one equivalents) ------------------------------------
+
+    def policy(self, policy_type: str, category: str = None):
+        catalog = self.catalog
+        self._count("hits")
+        if category:
+            return catalog.policy_by_type_category.get((policy_type, category))
+        return catalog.policy_by_type.get(policy_type)
+
+    def return_policy(self, product_category: str = None):
+        return self.policy("return", product_category)
+
+    def product(self, product_id: str = None, product_category: str = None):
+        catalog = self.catalog
+        self._count("hits")
+        if product_id:
+            return catalog.product_by_id.get(product_id)
+        if product_category:
+            return catalog.product_by_category.get(product_category)
+        return catalog.products[0] if catalog.products else None
+
+    def search_products(self, product_name: str, limit: int = 5) -> list:
+        """Ranked [(product, similarity)] from the trigram name index."""
+        catalog = self.catalog
+        self._count("hits")
+        return [
+            (catalog.products[position], score)
+            for position, score in catalog.name_index.search(product_name, limit=limit)
+        ]
+
+    def product_by_name(self, product_name: str):
+        """Exact lookup: the best-ranked product whose name contains product_name, else None.
+
+        Fuzzy near-misses stay in search_products; answering a named lookup
+        with a different product would put the wrong details in a reply.
+        """
+        needle = normalize(product_name)
+        if not needle:
+            return None
+        for product, _ in self.search_products(product_name, limit=PRODUCT_NAME_CANDIDATES):
+            if needle in normalize(product.get('name')):
+                return product
+        return None
+
+    def stats(self) -> dict:
+        catalog = self.catalog
+        with self._stats_lock:
+            counts = dict(self._stats)
+        return {
+            **counts,
+            "version": catalog.version if catalog else None,
+            "age_seconds": round(time.time() - catalog.loaded_at, 1) if catalog else None,
+            "name_index_build_ms": round(catalog.name_index.build_ms, 1) if catalog else None,
+            **(catalog.counts if catalog else {})
+        }
+
@@ -0,0 +1,63 @@
+import asyncio
+import os
+import sys
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model_training.model.model import SpamClassifier
+from model_training.model.batching import MicroBatcher
+
+load_dotenv()
+
+SPAM_BACKEND = os.getenv('SPAM_BACKEND', 'keras')
+SPAM_BATCH_SIZE = int(os.getenv('SPAM_BATCH_SIZE', 256))
+SPAM_MAX_INPUT_CHARS = int(os.getenv('SPAM_MAX_INPUT_CHARS', 0)) or None
+SPAM_MICRO_BATCHING = os.getenv('SPAM_MICRO_BATCHING', 'True') == 'True'
+SPAM_MICRO_BATCH_SIZE = int(os.getenv('SPAM_MICRO_BATCH_SIZE', 32))
+SPAM_MICRO_BATCH_WAIT_MS = float(os.getenv('SPAM_MICRO_BATCH_WAIT_MS', 5))
+SPAM_CASCADE = os.getenv('SPAM_CASCADE', 'False') == 'True'
+SPAM_CASCADE_BAND = (
+    float(os.getenv('SPAM_CASCADE_LOW', 0.05)),
+    float(os.getenv('SPAM_CASCADE_HIGH', 0.95))
+)
+SPAM_CACHE_SIZE = int(os.getenv('SPAM_CACHE_SIZE', 10000))
+SPAM_CACHE_TTL_SECONDS = float(os.getenv('SPAM_CACHE_TTL_SECONDS', 3600))
+
+try:
+    spam_classifier = SpamClassifier(
+        batch_size=SPAM_BATCH_SIZE,
+        backend=SPAM_BACKEND,
+        max_input_length=SPAM_MAX_INPUT_CHARS,
+        cascade=SPAM_CASCADE,
+        cascade_band=SPAM_CASCADE_BAND,
+        cache_size=SPAM_CACHE_SIZE,
+        cache_ttl=SPAM_CACHE_TTL_SECONDS
+    )
+    print("Spam classifier loaded successfully")
+except Exception as e:
+    print(f"Error loading spam classifier: {e}")
+    spam_classifier = None
+
+# Single-email requests go through the micro-batcher so concurrent callers
+# share one forward pass instead of each paying for model.predict
+spam_batcher = None
+if spam_classifier and SPAM_MICRO_BATCHING:
+    spam_batcher = MicroBatcher(
+        spam_classifier,
+        max_batch_size=SPAM_MICRO_BATCH_SIZE,
+        max_wait_ms=SPAM_MICRO_BATCH_WAIT_MS
+    )
+
+
+def predict_spam(email_text):
+    if spam_batcher:
+        return spam_batcher.predict(email_text)
+    return spam_classifier.predict(email_text)
+
+
+async def apredict_spam(email_text):
+    """predict_spam for the event loop: awaits the micro-batcher future, or runs inference in a thread."""
+    if spam_batcher:
+        return await asyncio.wrap_future(spam_batcher.submit(email_text))
+    return await asyncio.to_thread(spam_classifier.predict, email_text)
@@ -0,0 +1,22 @@
+import json
+
+
+# Headers that keep proxies (nginx in particular) from buffering the stream
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
+
+
+def sse_event(event: str, data) -> str:
+    """Format one server-sent event frame."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def spam_event(spam_result: dict) -> tuple:
+    """The first event of every stream: the spam verdict."""
+    is_spam = spam_result['prediction'] == 'spam'
+    return ("spam", {
+        "is_spam": is_spam,
+        "spam_confidence": spam_result['confidence'] if is_spam else 1 - spam_result.get('spam_probability', 0.5)
+    })
@@ -1,4 +1,9 @@
+import atexit
+import contextvars
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
 from typing import TypedDict, Annotated, Sequence
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
@@ -8,15 +13,18 @@ from dotenv import load_dotenv
 
 from .schemas import (
     EmailClassification, ProductQuery, EmailResponse, 
-    PolicyInfo, ValidationResult
+    PolicyInfo, ValidationResult, QueryType, ClassifiedResponse
 )
-from .prompts import EMAIL_CLASSIFICATION_PROMPT, RESPONSE_GENERATION_PROMPT
+from .prompts import EMAIL_CLASSIFICATION_PROMPT, RESPONSE_GENERATION_PROMPT, CLASSIFY_AND_RESPOND_PROMPT
 from .database import get_database
+from .orders import order_lookup, order_key, empty_order_context
+from .instrumentation import RequestTimer, timed_call, timed_node
 
 load_dotenv()
 
 class EmailProcessingState(TypedDict):
     email_content: str
+    sender_email: str | None
     classification: EmailClassification | None
     product_query: ProductQuery | None
     retrieved_context: dict | None
@@ -25,9 +33,20 @@ class EmailProcessingState(TypedDict):
     validation: ValidationResult | None
     messages: Annotated[Sequence[BaseMessage], "Messages"]
     final_response: str | None
+    cache_hit: bool | None
     error: str | None
 
 
+LLM_CACHE = os.getenv('LLM_CACHE', 'True') == 'True'
+
+try:
+    from .llm_cache import SQLiteLLMCache
+    llm_cache = SQLiteLLMCache() if LLM_CACHE else None
+except Exception as e:
+    print(f"LLM call cache unavailable: {e}")
+    llm_cache = None
+
+
 def get_llm():
     llm_model = os.getenv('LLM_MODEL', 'gpt-3.5-turbo')
     temperature = float(os.getenv('LLM_TEMPERATURE', '0.3'))
@@ -41,7 +60,9 @@ def get_llm():
         model=llm_model,
         api_key=api_key,
         temperature=temperature,
-        max_tokens=max_tokens
+        max_tokens=max_tokens,
+        # Identical prompts with identical parameters are answered from disk
+        cache=llm_cache if llm_cache else False
     )
 
 try:
@@ -51,58 +72,267 @@ except Exception as e:
     print(f"Error initializing LLM: {e}")
     llm = None
 
+# Structured-output fallback for emails the local intent model is unsure about
+classification_chain = EMAIL_CLASSIFICATION_PROMPT | llm.with_structured_output(EmailClassification) if llm else None
+
+# Single-call mode: classification and reply from one structured-output call
+classify_and_respond_chain = CLASSIFY_AND_RESPOND_PROMPT | llm.with_structured_output(ClassifiedResponse) if llm else None
+
+TWO_CALL_MODE = "two_call"
+SINGLE_CALL_MODE = "single_call"
+WORKFLOW_MODE = os.getenv('WORKFLOW_MODE', TWO_CALL_MODE)
+
+INTENT_CONFIDENCE_THRESHOLD = float(os.getenv('INTENT_CONFIDENCE_THRESHOLD', '0.7'))
+
+try:
+    from model_training.model.intent import IntentClassifier
+    intent_classifier = IntentClassifier()
+    print(f"Intent classifier loaded: {', '.join(intent_classifier.labels)}")
+except Exception as e:
+    print(f"Intent classifier unavailable, classifying with the LLM: {e}")
+    intent_classifier = None
+
+SEMANTIC_CACHE = os.getenv('SEMANTIC_CACHE', 'True') == 'True'
+
+
+def get_semantic_cache():
+    from langchain_openai import OpenAIEmbeddings
+    from .semantic_cache import SemanticResponseCache, EMBEDDING_MODEL
+    
+    cache = SemanticResponseCache(OpenAIEmbeddings(model=EMBEDDING_MODEL))
+    atexit.register(cache.save)
+    return cache
+
+try:
+    semantic_cache = get_semantic_cache() if SEMANTIC_CACHE else None
+    if semantic_cache:
+        print(f"Semantic response cache enabled (threshold {semantic_cache.threshold})")
+except Exception as e:
+    print(f"Semantic response cache unavailable: {e}")
+    semantic_cache = None
+
+# Query types whose answer depends on a policy or protocol lookup
+DATABASE_LOOKUP_TYPES = {
+    QueryType.PRODUCT_RETURN,
+    QueryType.REFUND_REQUEST,
+    QueryType.PRODUCT_DAMAGE
+}
+
 db = get_database()
 
 @tool
 def get_return_policy_tool(product_category: str = None) -> dict:
     """Get return policy from database."""
-    return db.get_return_policy(product_category)
+    with timed_call("mongo.get_return_policy"):
+        return db.get_return_policy(product_category)
 
 
 @tool
 def check_product_returnable_tool(product_id: str = None, product_category: str = None) -> dict:
     """Check if product is returnable."""
-    return db.check_product_returnable(product_id, product_category)
+    with timed_call("mongo.check_product_returnable"):
+        return db.check_product_returnable(product_id, product_category)
 
 
 @tool
 def calculate_refund_tool(order_amount: float, days_since_purchase: int, 
                          product_condition: str = "unused") -> dict:
     """Calculate refund amount."""
-    return db.calculate_refund(order_amount, days_since_purchase, product_condition)
+    with timed_call("mongo.calculate_refund"):
+        return db.calculate_refund(order_amount, days_since_purchase, product_condition)
 
 
 @tool
 def get_damage_protocol_tool(damage_type: str = "general") -> dict:
     """Get damage handling protocol."""
-    return db.get_damage_protocol(damage_type)
+    with timed_call("mongo.get_damage_protocol"):
+        return db.get_damage_protocol(damage_type)
+
+
+@tool
+def get_order_context_tool(email_content: str, sender_email: str = None) -> dict:
+    """Find the orders an email refers to and the refund they qualify for."""
+    with timed_call("mongo.get_order_context"):
+        return order_lookup.lookup(email_content, db, sender_email)
 
 tools = [get_return_policy_tool, check_product_returnable_tool, 
-         calculate_refund_tool, get_damage_protocol_tool]
+         calculate_refund_tool, get_damage_protocol_tool, get_order_context_tool]
+
+
+RETRIEVAL_TIMEOUT_SECONDS = float(os.getenv('RETRIEVAL_TIMEOUT_SECONDS', '2.0'))
+RETRIEVAL_MAX_WORKERS = int(os.getenv('RETRIEVAL_MAX_WORKERS', '8'))
+
+# Context lookups by name: (tool, tool input or a function of (email, sender), timeout in seconds, default on failure)
+LOOKUPS = {
+    "return_policy": (
+        get_return_policy_tool, {}, RETRIEVAL_TIMEOUT_SECONDS,
+        lambda: db._get_default_return_policy()
+    ),
+    "damage_protocol": (
+        get_damage_protocol_tool, {"damage_type": "general"}, RETRIEVAL_TIMEOUT_SECONDS,
+        lambda: db.get_damage_protocol("general")
+    ),
+    "order": (
+        get_order_context_tool, lambda email, sender: {"email_content": email, "sender_email": sender},
+        RETRIEVAL_TIMEOUT_SECONDS,
+        empty_order_context
+    ),
+}
+
+# Lookups each query type needs; retrieve_context_node issues them all at once
+RETRIEVAL_PLAN = {
+    QueryType.PRODUCT_RETURN: ["return_policy", "order"],
+    QueryType.REFUND_REQUEST: ["return_policy", "order"],
+    QueryType.PRODUCT_DAMAGE: ["damage_protocol", "order"],
+}
+
+# Single-call mode does not know the query type yet, so it fetches everything
+PREFETCH_LOOKUPS = ["return_policy", "damage_protocol", "order"]
+
+retrieval_pool = ThreadPoolExecutor(max_workers=RETRIEVAL_MAX_WORKERS, thread_name_prefix="retrieve")
+
+# Batched form of each lookup: (key one email and its sender need, resolve many keys in one query)
+BATCH_LOOKUPS = {
+    "return_policy": (
+        lambda email, sender: ("return", None),
+        db.get_policies
+    ),
+    "damage_protocol": (
+        lambda email, sender: "general",
+        lambda keys: {key: db.get_damage_protocol(key) for key in keys}
+    ),
+    "order": (
+        order_key,
+        lambda keys: order_lookup.resolve_many(keys, db)
+    ),
+}
+
+# Context already resolved for the current email by prefetch_batch; fan_out_lookups skips these
+prefetched_context = contextvars.ContextVar('prefetched_context', default=None)
+
+
+def prefetch_batch(emails: list, names: list = PREFETCH_LOOKUPS, senders: list = None) -> list:
+    """Resolve lookups for a batch of emails together; returns one context dict per email.
+    
+    Keys are collected across the batch and each lookup is resolved with a
+    single query, instead of one round-trip per email per lookup. Run each
+    email under ``prefetched_context.set(context)`` so its retrieval step
+    reuses the result. ``senders`` holds each email's trusted sender
+    address (or None).
+    """
+    contexts = [{} for _ in emails]
+    senders = senders or [None] * len(emails)
+    
+    for name in names:
+        key_for, resolve = BATCH_LOOKUPS[name]
+        
+        try:
+            keys = [key_for(email, sender) for email, sender in zip(emails, senders)]
+            with timed_call(f"mongo.batch.{name}"):
+                resolved = resolve(list(dict.fromkeys(keys)))
+        except Exception as e:
+            print(f"Batch lookup '{name}' failed ({e}), emails will look it up individually")
+            continue
+        
+        for context, key in zip(contexts, keys):
+            context[name] = resolved.get(key)
+    
+    return contexts
+
+
+def lookup_default(name: str, reason) -> dict:
+    print(f"Lookup '{name}' failed ({reason}), using default")
+    return LOOKUPS[name][3]()
+
+
+def fan_out_lookups(names: list, email: str = None, sender: str = None) -> dict:
+    """Run context lookups concurrently; each gets its own timeout and default.
+    
+    Retrieval takes as long as the slowest lookup instead of their sum. A
+    timed-out lookup keeps its pool thread until MongoDB gives up, so the
+    pool is sized above the number of lookups per request. Lookups already
+    resolved by prefetch_batch are reused without a query.
+    """
+    started = time.perf_counter()
+    futures = {}
+    
+    prefetched = prefetched_context.get() or {}
+    context = {name: prefetched[name] for name in names if prefetched.get(name) is not None}
+    
+    for name in names:
+        if name in context:
+            continue
+        tool, tool_input, _, _ = LOOKUPS[name]
+        if callable(tool_input):
+            tool_input = tool_input(email, sender)
+        # copy_context carries the request timer into the pool thread
+        futures[name] = retrieval_pool.submit(contextvars.copy_context().run, tool.invoke, tool_input)
+    
+    for name, future in futures.items():
+        remaining = LOOKUPS[name][2] - (time.perf_counter() - started)
+        try:
+            context[name] = future.result(timeout=max(remaining, 0))
+        except FuturesTimeout:
+            future.cancel()
+            context[name] = lookup_default(name, "timed out")
+        except Exception as e:
+            context[name] = lookup_default(name, e)
+    
+    return context
+
+
+def classify_with_intent_model(email: str) -> EmailClassification:
+    with timed_call("intent_model"):
+        intent = intent_classifier.predict(email)
+    
+    query_type = QueryType(intent['intent'])
+    
+    return EmailClassification(
+        query_type=query_type,
+        confidence=intent['confidence'],
+        keywords=intent['keywords'],
+        requires_database_lookup=query_type in DATABASE_LOOKUP_TYPES,
+        reasoning=f"Local intent model ({intent['confidence']:.0%} confidence)"
+    )
+
+
+def classify_with_llm(email: str) -> EmailClassification:
+    with timed_call("llm.classify"):
+        classification = classification_chain.invoke({"email_content": email})
+    
+    # Routing follows the query type, whichever model produced it
+    classification.requires_database_lookup = classification.query_type in DATABASE_LOOKUP_TYPES
+    return classification
+
+
+def needs_llm_classification(classification: EmailClassification | None) -> bool:
+    # Only low-confidence (or missing) local predictions pay for an LLM round-trip
+    return classification is None or classification.confidence < INTENT_CONFIDENCE_THRESHOLD
 
 
 def classify_query_node(state: EmailProcessingState) -> EmailProcessingState:
     
-    if not llm:
-        state['error'] = "LLM not initialized. Check API keys OPENAI_API_KEY"
-        return state
+    email = state['email_content']
+    classification = None
     
     try:
-        print("DEBUG: Entered classify_query_node")
-        email = state['email_content']
-        
-        prompt = f"Classify this customer email into one category: product_return, refund_request, product_damage, or general_inquiry.\n\nEmail: {email}\n\nCategory:"
+        if intent_classifier:
+            classification = classify_with_intent_model(email)
+            print(f"DEBUG: Intent model: {classification.query_type.value} ({classification.confidence:.2f})")
         
-        result = llm.invoke(prompt)
+        if needs_llm_classification(classification):
+            if classification_chain:
+                try:
+                    classification = classify_with_llm(email)
+                    print(f"DEBUG: LLM classification: {classification.query_type.value}")
+                except Exception as e:
+                    if classification is None:
+                        raise
+                    print(f"LLM classification failed, keeping local prediction: {e}")
+            elif classification is None:
+                state['error'] = "LLM not initialized. Check API keys OPENAI_API_KEY"
+                return state
         
-        from .schemas import QueryType
-        classification = EmailClassification(
-            query_type=QueryType.GENERAL,
-            confidence=0.9,
-            keywords=["general", "inquiry"],
-            requires_database_lookup=False,
-            reasoning="Default classification for simplified workflow"
-        )
         print(f"DEBUG: Created classification: requires_database_lookup={classification.requires_database_lookup}")
         
         state['classification'] = classification
@@ -123,51 +353,117 @@ def retrieve_context_node(state: EmailProcessingState) -> EmailProcessingState:
     
     classification = state['classification']
     
-    context = {}
-    
-    if classification.query_type.value in ["product_return", "refund_request"]:
-        policy = get_return_policy_tool.invoke({})
-        context['return_policy'] = policy
-    
-    if classification.query_type.value == "product_damage":
-        protocol = get_damage_protocol_tool.invoke({"damage_type": "general"})
-        context['damage_protocol'] = protocol
+    context = fan_out_lookups(
+        RETRIEVAL_PLAN.get(classification.query_type, []), state['email_content'], state.get('sender_email')
+    )
     
     state['retrieved_context'] = context
     state['database_info'] = context 
     return state
 
-def generate_response_node(state: EmailProcessingState) -> EmailProcessingState:
+def build_response_prompt(email: str, context: dict) -> str:
+    policy_info = str(context.get('return_policy', 'Standard policies apply'))
     
-    try:
-        print("🔍 DEBUG: Entered generate_response_node")
-        email = state['email_content']
-        classification = state['classification']
-        context = state.get('retrieved_context') or {}
-        
-        policy_info = str(context.get('return_policy', 'Standard policies apply'))
-        
-        prompt = f"""You are a customer service assistant. Write a professional, helpful response to this customer email.
+    order = context.get('order') or {}
+    order_info = ""
+    if order.get('found'):
+        order_info = f"""
+Customer Order (from our records; use these exact figures):
+{order['orders']}
+Refund calculation: {order.get('refund')}
+"""
+    
+    return f"""You are a customer service assistant. Write a professional, helpful response to this customer email.
 
 Customer Email:
 {email}
 
 Company Policy:
 {policy_info}
-
+{order_info}
 Write a professional response:"""
+
+
+def build_email_response(response_text: str) -> EmailResponse:
+    return EmailResponse(
+        greeting="Dear Customer,",
+        acknowledgment="Thank you for contacting us.",
+        main_response=response_text,
+        action_items=["We will assist you with your request."],
+        closing="Best regards,\nCustomer Service Team",
+        tone="friendly",
+        full_response=response_text
+    )
+
+
+# Lookups that are the same for every customer; only these scope cached replies
+POLICY_LOOKUPS = ("return_policy", "damage_protocol")
+
+
+def cacheable_response(state: EmailProcessingState) -> bool:
+    """Replies quoting one customer's order figures must never be reused for another."""
+    order = (state.get('retrieved_context') or {}).get('order') or {}
+    return not order.get('found')
+
+
+def policy_context(state: EmailProcessingState) -> dict:
+    context = state.get('retrieved_context') or {}
+    return {name: context[name] for name in POLICY_LOOKUPS if name in context}
+
+
+def lookup_cached_response(state: EmailProcessingState, vector) -> str | None:
+    """Semantic cache lookup scoped by the email's query type and policy context."""
+    try:
+        return semantic_cache.lookup(
+            vector, state['classification'].query_type.value, policy_context(state)
+        )
+    except Exception as e:
+        print(f"Semantic cache lookup failed: {e}")
+        return None
+
+
+def remember_response(state: EmailProcessingState, vector, response_text: str):
+    try:
+        semantic_cache.put(
+            vector, state['classification'].query_type.value, policy_context(state),
+            state['email_content'], response_text
+        )
+    except Exception as e:
+        print(f"Semantic cache store failed: {e}")
+
+
+def embed_for_cache(email: str):
+    if not semantic_cache:
+        return None
+    try:
+        with timed_call("embeddings.embed"):
+            return semantic_cache.embed(email)
+    except Exception as e:
+        print(f"Semantic cache embedding failed: {e}")
+        return None
+
+
+def generate_response_node(state: EmailProcessingState) -> EmailProcessingState:
+    
+    try:
+        print("🔍 DEBUG: Entered generate_response_node")
+        email = state['email_content']
+        context = state.get('retrieved_context') or {}
         
-        response_text = llm.invoke(prompt).content
+        vector = embed_for_cache(email) if cacheable_response(state) else None
+        response_text = lookup_cached_response(state, vector) if vector is not None else None
+        state['cache_hit'] = response_text is not None
         
-        response = EmailResponse(
-            greeting="Dear Customer,",
-            acknowledgment="Thank you for contacting us.",
-            main_response=response_text,
-            action_items=["We will assist you with your request."],
-            closing="Best regards,\nCustomer Service Team",
-            tone="friendly",
-            full_response=response_text
-        )
+        if response_text is None:
+            prompt = build_response_prompt(email, context)
+            
+            with timed_call("llm.generate"):
+                response_text = llm.invoke(prompt).content
+            
+            if vector is not None:
+                remember_response(state, vector, response_text)
+        
+        response = build_email_response(response_text)
         
         state['generated_response'] = response
         state['final_response'] = response_text
@@ -183,6 +479,53 @@ Write a professional response:"""
     return state
 
 
+def prefetch_context_node(state: EmailProcessingState) -> EmailProcessingState:
+    """Single-call mode: fetch every policy the reply might need before classifying."""
+    
+    context = fan_out_lookups(PREFETCH_LOOKUPS, state['email_content'], state.get('sender_email'))
+    
+    state['retrieved_context'] = context
+    state['database_info'] = context
+    return state
+
+
+def classify_and_generate_node(state: EmailProcessingState) -> EmailProcessingState:
+    """Single-call mode: one structured LLM call returns the classification and the reply."""
+    
+    if not classify_and_respond_chain:
+        state['error'] = "LLM not initialized. Check API keys OPENAI_API_KEY"
+        return state
+    
+    try:
+        email = state['email_content']
+        context = state.get('retrieved_context') or {}
+        
+        with timed_call("llm.classify_and_generate"):
+            result = classify_and_respond_chain.invoke({
+                "email_content": email,
+                "policy_info": str(context)
+            })
+        
+        classification = result.classification
+        classification.requires_database_lookup = classification.query_type in DATABASE_LOOKUP_TYPES
+        
+        state['classification'] = classification
+        state['generated_response'] = result.response
+        state['final_response'] = result.response.full_response
+        state['messages'] = state.get('messages', []) + [
+            HumanMessage(content=email),
+            AIMessage(content=result.response.full_response)
+        ]
+    
+    except Exception as e:
+        error_msg = f"Error generating response: {str(e)}"
+        print(f"Error generating response: {error_msg}")
+        state['error'] = error_msg
+        state['final_response'] = "Sorry, we encountered an error generating a response. Please try again later."
+    
+    return state
+
+
 def validate_response_node(state: EmailProcessingState) -> EmailProcessingState:
     
     response = state['generated_response']
@@ -235,14 +578,27 @@ def should_validate(state: EmailProcessingState) -> str:
         return "end"
 
 
-def create_email_processing_graph():
+# Node implementations by name; the async workflow swaps in coroutine versions
+NODES = {
+    "classify": classify_query_node,
+    "retrieve": retrieve_context_node,
+    "generate": generate_response_node,
+    "validate": validate_response_node,
+    "prefetch": prefetch_context_node,
+    "classify_and_generate": classify_and_generate_node,
+}
+
+
+def create_email_processing_graph(nodes: dict = None):
+    nodes = nodes or NODES
     
     workflow = StateGraph(EmailProcessingState)
     
-    workflow.add_node("classify", classify_query_node)
-    workflow.add_node("retrieve", retrieve_context_node)
-    workflow.add_node("generate", generate_response_node)
-    workflow.add_node("validate", validate_response_node)
+    # Each node reports its wall time to the per-request timer in the config
+    workflow.add_node("classify", timed_node("classify", nodes["classify"]))
+    workflow.add_node("retrieve", timed_node("retrieve", nodes["retrieve"]))
+    workflow.add_node("generate", timed_node("generate", nodes["generate"]))
+    workflow.add_node("validate", timed_node("validate", nodes["validate"]))
     
     workflow.set_entry_point("classify")
     
@@ -271,25 +627,71 @@ def create_email_processing_graph():
     
     return workflow.compile()
 
-def process_email(email_content: str) -> dict:
-    graph = create_email_processing_graph()
-    
-    initial_state = EmailProcessingState(
-        email_content=email_content,
-        classification=None,
-        product_query=None,
-        retrieved_context=None,
-        database_info=None,
-        generated_response=None,
-        validation=None,
-        messages=[],
-        final_response=None,
-        error=None
+
+def create_single_call_graph(nodes: dict = None):
+    nodes = nodes or NODES
+    
+    workflow = StateGraph(EmailProcessingState)
+    
+    workflow.add_node("retrieve", timed_node("retrieve", nodes["prefetch"]))
+    workflow.add_node("classify_and_generate", timed_node("classify_and_generate", nodes["classify_and_generate"]))
+    workflow.add_node("validate", timed_node("validate", nodes["validate"]))
+    
+    workflow.set_entry_point("retrieve")
+    workflow.add_edge("retrieve", "classify_and_generate")
+    
+    workflow.add_conditional_edges(
+        "classify_and_generate",
+        should_validate,
+        {
+            "validate": "validate",
+            "end": END
+        }
     )
     
-    try:
-        final_state = graph.invoke(initial_state)
+    workflow.add_edge("validate", END)
+    
+    return workflow.compile()
+
+
+GRAPH_BUILDERS = {
+    TWO_CALL_MODE: create_email_processing_graph,
+    SINGLE_CALL_MODE: create_single_call_graph,
+}
+
+class EmailWorkflow:
+    """Compiled email-processing graph, built once and shared by all requests.
+
+    The compiled graph holds no per-request state, so concurrent invoke()
+    calls from server threads (or ainvoke() calls on one event loop) are safe. Each call gets its own RequestTimer
+    and returns a per-node and per-external-call timing breakdown.
+    """
+    
+    def __init__(self, mode: str = TWO_CALL_MODE, nodes: dict = None):
+        if mode not in GRAPH_BUILDERS:
+            raise ValueError(f"Unknown workflow mode '{mode}'. Choose from: {', '.join(GRAPH_BUILDERS)}")
         
+        self.mode = mode
+        self.graph = GRAPH_BUILDERS[mode](nodes)
+    
+    @staticmethod
+    def _initial_state(email_content: str, sender_email: str = None) -> EmailProcessingState:
+        return EmailProcessingState(
+            email_content=email_content,
+            sender_email=sender_email,
+            classification=None,
+            product_query=None,
+            retrieved_context=None,
+            database_info=None,
+            generated_response=None,
+            validation=None,
+            messages=[],
+            final_response=None,
+            cache_hit=None,
+            error=None
+        )
+    
+    def _result(self, final_state: EmailProcessingState, timer: RequestTimer) -> dict:
         print(f"DEBUG: final_response = {final_state.get('final_response')}")
         print(f"DEBUG: error = {final_state.get('error')}")
         
@@ -297,7 +699,8 @@ def process_email(email_content: str) -> dict:
              return {
                 "success": False,
                 "error": final_state.get('error'),
-                "response": "Sorry, we encountered an error processing your request."
+                "response": "Sorry, we encountered an error processing your request.",
+                "timings": timer.breakdown()
             }
         
         classification = final_state.get('classification')
@@ -307,25 +710,151 @@ def process_email(email_content: str) -> dict:
             "success": True,
             "response": final_state.get('final_response'),
             "classification": classification.model_dump() if classification else None,
-            "validation": validation.model_dump() if validation else None
+            "validation": validation.model_dump() if validation else None,
+            "cached": bool(final_state.get('cache_hit')),
+            "mode": self.mode,
+            "timings": timer.breakdown()
         }
     
-    except Exception as e:
+    @staticmethod
+    def _error_result(error: Exception, timer: RequestTimer) -> dict:
         return {
             "success": False,
-            "error": str(e),
-            "response": "Sorry, we encountered an error processing your request."
+            "error": str(error),
+            "response": "Sorry, we encountered an error processing your request.",
+            "timings": timer.breakdown()
         }
+    
+    def invoke(self, email_content: str, sender_email: str = None) -> dict:
+        timer = RequestTimer()
+        
+        try:
+            final_state = self.graph.invoke(
+                self._initial_state(email_content, sender_email),
+                config={"configurable": {"timer": timer}}
+            )
+            return self._result(final_state, timer)
+        
+        except Exception as e:
+            return self._error_result(e, timer)
+    
+    async def ainvoke(self, email_content: str, sender_email: str = None) -> dict:
+        """Same as invoke(), for graphs built from coroutine nodes (see async_workflow)."""
+        timer = RequestTimer()
+        
+        try:
+            final_state = await self.graph.ainvoke(
+                self._initial_state(email_content, sender_email),
+                config={"configurable": {"timer": timer}}
+            )
+            return self._result(final_state, timer)
+        
+        except Exception as e:
+            return self._error_result(e, timer)
+    
+    def _stream_events(self, stream_mode: str, payload, state: dict) -> list:
+        """Turn one LangGraph stream item into (event, data) pairs for the client."""
+        if stream_mode == "messages":
+            chunk, metadata = payload
+            # Only reply tokens; the classifier's structured-output chunks stay internal
+            if metadata.get("langgraph_node") == "generate" and chunk.content:
+                return [("token", {"text": chunk.content})]
+            return []
+        
+        events = []
+        for node, update in payload.items():
+            state.update(update or {})
+            
+            if node in ("classify", "classify_and_generate") and state.get('classification'):
+                events.append(("classification", state['classification'].model_dump()))
+            
+            # Cached replies and the single structured call arrive whole
+            if (node == "classify_and_generate" or (node == "generate" and state.get('cache_hit'))) \
+                    and state.get('final_response'):
+                events.append(("token", {"text": state['final_response']}))
+            
+            if node == "validate" and state.get('validation'):
+                events.append(("validation", state['validation'].model_dump()))
+        
+        return events
+    
+    def stream(self, email_content: str, sender_email: str = None):
+        """Yield ("classification" | "token" | "validation" | "done", data) events as the graph runs.
+        
+        The "done" event carries the same dict invoke() returns.
+        """
+        timer = RequestTimer()
+        state = dict(self._initial_state(email_content, sender_email))
+        
+        try:
+            for stream_mode, payload in self.graph.stream(
+                self._initial_state(email_content, sender_email),
+                config={"configurable": {"timer": timer}},
+                stream_mode=["updates", "messages"]
+            ):
+                yield from self._stream_events(stream_mode, payload, state)
+            result = self._result(state, timer)
+        
+        except Exception as e:
+            result = self._error_result(e, timer)
+        
+        yield ("done", result)
+    
+    async def astream(self, email_content: str, sender_email: str = None):
+        """Same as stream(), for graphs built from coroutine nodes (see async_workflow)."""
+        timer = RequestTimer()
+        state = dict(self._initial_state(email_content, sender_email))
+        
+        try:
+            async for stream_mode, payload in self.graph.astream(
+                self._initial_state(email_content, sender_email),
+                config={"configurable": {"timer": timer}},
+                stream_mode=["updates", "messages"]
+            ):
+                for event in self._stream_events(stream_mode, payload, state):
+                    yield event
+            result = self._result(state, timer)
+        
+        except Exception as e:
+            result = self._error_result(e, timer)
+        
+        yield ("done", result)
+
+
+_workflows = {}
+_workflow_lock = threading.Lock()
+
+
+def get_workflow(mode: str = None) -> EmailWorkflow:
+    """Get or create the process-wide compiled workflow for a mode (WORKFLOW_MODE by default)."""
+    mode = mode or WORKFLOW_MODE
+    workflow = _workflows.get(mode)
+    if workflow is None:
+        with _workflow_lock:
+            workflow = _workflows.get(mode)
+            if workflow is None:
+                workflow = _workflows[mode] = EmailWorkflow(mode)
+    return workflow
+
+
+def process_email(email_content: str, mode: str = None, sender_email: str = None) -> dict:
+    """Run one email through the workflow; sender_email (from the mail client or headers) enables order lookup by customer."""
+    return get_workflow(mode).invoke(email_content, sender_email)
+
+
+def stream_email(email_content: str, mode: str = None, sender_email: str = None):
+    """Generator of (event, data) pairs; see EmailWorkflow.stream()."""
+    return get_workflow(mode).stream(email_content, sender_email)
 
 
 # Export
-__all__ = ['process_email', 'create_email_processing_graph', 'EmailProcessingState']
+__all__ = ['process_email', 'stream_email', 'prefetch_batch', 'create_email_processing_graph', 'create_single_call_graph', 'get_workflow', 'EmailWorkflow', 'EmailProcessingState']
 
 
 def visualize_graph():
     print("Generating graph visualization...")
     try:
-        graph = create_email_processing_graph()
+        graph = get_workflow().graph
         png_data = graph.get_graph().draw_mermaid_png()
         
         output_path = "workflow_graph/workflow_graph.png"
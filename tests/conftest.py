@@ -0,0 +1,9 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# src/ is imported as a package; the training modules import each other by bare name
+for path in (ROOT, os.path.join(ROOT, 'model_training', 'model')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
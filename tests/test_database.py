@@ -0,0 +1,54 @@
+import mongomock
+import pytest
+
+from src.database import DatabaseConnector, name_prefix_query
+from src.product_index import normalize
+
+
+PRODUCTS = [
+    {"product_id": "LAPTOP-001", "name": "Premium Laptop 15 inch", "category": "electronics", "price": 899.99},
+    {"product_id": "BOOK-001", "name": "C++ Guide (refurb)", "category": "books", "price": 19.99},
+    {"product_id": "WATCH-001", "name": "Smart Watch Series 5", "category": "electronics", "price": 299.99},
+]
+
+
+@pytest.fixture
+def db():
+    """A connector over mongomock with no snapshot, so every lookup takes the MongoDB path."""
+    mongo = mongomock.MongoClient()['database_test']
+    mongo.products.insert_many([{**product, "name_lower": normalize(product["name"])} for product in PRODUCTS])
+
+    connector = DatabaseConnector.__new__(DatabaseConnector)
+    connector.db = mongo
+    connector.products = mongo.products
+    connector.snapshot = None
+    return connector
+
+
+def test_name_prefix_query_is_anchored_and_escaped():
+    assert name_prefix_query("C++ Guide") == {"name_lower": {"$regex": r"^c\ guide"}}
+    assert name_prefix_query("  (!) ") is None
+
+
+@pytest.mark.parametrize("name, product_id", [
+    ("premium laptop", "LAPTOP-001"),
+    ("C++ guide", "BOOK-001"),
+    ("c++ guide (refurb)", "BOOK-001"),
+    ("laptop", None),
+    ("(refurb)", None),
+])
+def test_get_product_info_by_name(db, name, product_id):
+    product = db.get_product_info(product_name=name)
+    assert (product or {}).get("product_id") == product_id
+
+
+def test_search_products_uses_prefix(db):
+    assert [p["product_id"] for p in db.search_products("Smart")] == ["WATCH-001"]
+    assert db.search_products("+++") == []
+
+
+def test_get_products_by_names(db):
+    results = db.get_products_by_names(["Premium Laptop", "c++", "Smart Watch", "Tablet"])
+    assert {name: (p or {}).get("product_id") for name, p in results.items()} == {
+        "Premium Laptop": "LAPTOP-001", "c++": "BOOK-001", "Smart Watch": "WATCH-001", "Tablet": None
+    }
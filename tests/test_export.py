@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+tf = pytest.importorskip("tensorflow")
+from tensorflow.keras import Sequential
+from tensorflow.keras.layers import (
+    BatchNormalization, Conv1D, Dense, Dropout, Embedding, GlobalMaxPooling1D, Input, MaxPooling1D
+)
+
+from export import check_parity, export_numpy_weights, sample_sequences
+from inference import NumpyBackend
+
+
+MAX_LENGTH = 100
+
+
+@pytest.fixture(scope="module")
+def model():
+    """The spam CNN's layer stack at toy size, with non-trivial batch norm statistics."""
+    tf.keras.utils.set_random_seed(0)
+    model = Sequential([
+        Input(shape=(MAX_LENGTH,), dtype='int32'),
+        Embedding(input_dim=200, output_dim=8, name='embedding'),
+        Conv1D(filters=12, kernel_size=5, activation='relu', name='conv1d_1'),
+        MaxPooling1D(pool_size=2, name='maxpool_1'),
+        Dropout(0.5, name='dropout_1'),
+        Conv1D(filters=12, kernel_size=5, activation='relu', name='conv1d_2'),
+        GlobalMaxPooling1D(name='global_maxpool'),
+        Dense(16, activation='relu', name='dense_1'),
+        BatchNormalization(name='batch_norm'),
+        Dropout(0.5, name='dropout_2'),
+        Dense(1, activation='sigmoid', name='output')
+    ])
+
+    rng = np.random.default_rng(0)
+    batch_norm = model.get_layer('batch_norm')
+    gamma, beta, mean, variance = batch_norm.get_weights()
+    batch_norm.set_weights([
+        rng.uniform(0.5, 1.5, gamma.shape), rng.normal(0, 0.1, beta.shape),
+        rng.normal(0, 0.2, mean.shape), rng.uniform(0.5, 2.0, variance.shape)
+    ])
+    return model
+
+
+def test_numpy_backend_matches_keras(model, tmp_path):
+    backend = NumpyBackend(export_numpy_weights(model, str(tmp_path / "model.npz")), max_length=MAX_LENGTH)
+    sequences = sample_sequences(model, count=64, max_length=MAX_LENGTH)
+
+    assert check_parity(model, backend, sequences, atol=1e-5)
+
+
+def test_numpy_backend_handles_all_padding(model, tmp_path):
+    backend = NumpyBackend(export_numpy_weights(model, str(tmp_path / "model.npz")), max_length=MAX_LENGTH)
+    sequences = np.zeros((3, MAX_LENGTH), dtype=np.int32)
+
+    expected = np.asarray(model.predict(sequences, verbose=0)).reshape(-1)
+    np.testing.assert_allclose(backend.predict(sequences), expected, atol=1e-5)
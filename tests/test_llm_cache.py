@@ -0,0 +1,46 @@
+import sqlite3
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, Generation
+
+from src.llm_cache import SQLiteLLMCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SQLiteLLMCache(str(tmp_path / "llm_cache.sqlite"))
+
+
+def test_round_trip(cache):
+    generations = [ChatGeneration(message=AIMessage(content="hello")), Generation(text="plain")]
+    cache.update("prompt", "model", generations)
+
+    assert cache.lookup("prompt", "model") == generations
+    assert cache.lookup("prompt", "other model") is None
+    assert cache.stats()["size"] == 1
+
+
+def test_store_is_skipped_while_the_file_is_locked(cache):
+    other = sqlite3.connect(cache.path, isolation_level=None)
+    other.execute("BEGIN EXCLUSIVE")
+    cache._conn().execute("PRAGMA busy_timeout=50")
+    try:
+        cache.update("prompt", "model", [Generation(text="reply")])
+        assert not cache._conn().in_transaction
+    finally:
+        other.execute("ROLLBACK")
+
+    assert cache.lookup("prompt", "model") is None
+
+
+def test_broken_cache_is_a_miss_and_stats_still_answer(cache):
+    cache._conn().execute("DROP TABLE llm_cache")
+
+    assert cache.lookup("prompt", "model") is None
+    cache.update("prompt", "model", [Generation(text="reply")])
+
+    stats = cache.stats()
+    assert stats["size"] is None
+    assert stats["misses"] == 1
+    assert stats["stores"] == 0
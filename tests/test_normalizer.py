@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+from normalizer import TextNormalizer, clean_texts, reference_clean_text, verify_golden
+
+
+FIXTURES = [
+    "WINNER!! You have won a £1000 prize. Call 09061701461 now",
+    "Visit http://spam.example.com/claim?id=1 or www.free-stuff.co.uk today",
+    "email me at john.doe@example.com, or call 555-123-4567",
+    "Reply to someone@x. Nothing @here but @ and a@ and @b",
+    "prefixhttp://x and textwww.y and httpnothing www",
+    "https:// http www. wwwx http:x",
+    "Ok lar... Joking wif u oni...\n\tSee you at 10:30pm",
+    "Your code is 1234567890123; ref 123.456.7890",
+    "ÀÉÎ café naïve — “quoted” text",
+    "",
+    "   ",
+    None,
+    42,
+]
+
+# Characters that exercise every branch of the token rules
+ALPHABET = "abcHTPW@.:/-_ 0123456789\t\nwshx£é!"
+
+
+def random_texts(count, seed=0):
+    rng = random.Random(seed)
+    pieces = ["http", "https://", "www", "@", "a@b", ".com", "555-123-4567", "12345678901", " ", "\n"]
+    texts = []
+    for _ in range(count):
+        parts = [
+            rng.choice(pieces) if rng.random() < 0.3 else "".join(rng.choices(ALPHABET, k=rng.randint(1, 8)))
+            for _ in range(rng.randint(0, 12))
+        ]
+        texts.append("".join(parts))
+    return texts
+
+
+def test_fixtures_match_reference():
+    assert verify_golden(FIXTURES) == []
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_random_texts_match_reference(seed):
+    assert verify_golden(random_texts(20_000, seed)) == []
+
+
+def test_batch_matches_single():
+    texts = [text for text in FIXTURES if isinstance(text, str)]
+    assert clean_texts(texts) == [reference_clean_text(text) for text in texts]
+
+
+def test_max_input_length_truncates_before_normalizing():
+    normalizer = TextNormalizer(max_input_length=12)
+    text = "hello world http://example.com"
+    assert normalizer.normalize(text) == reference_clean_text(text[:12])
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.database import DatabaseConnector
+from src.orders import OrderLookup, CustomerOrderCache, empty_order_context
+
+
+ORDERS = [
+    {"order_id": "ORD-12345", "customer_email": "alice@example.com", "product_id": "LAPTOP-001",
+     "order_date": datetime.now(timezone.utc) - timedelta(days=3), "amount": 899.99, "status": "delivered"},
+    {"order_id": "ORD-12346", "customer_email": "bob@example.com", "product_id": "PHONE-001",
+     "order_date": datetime.now(timezone.utc) - timedelta(days=20), "amount": 1199.99, "status": "delivered"},
+]
+
+
+class FakeOrders(DatabaseConnector):
+    """calculate_refund from the real connector; order queries answered from ORDERS."""
+
+    def __init__(self):
+        self.queries = []
+
+    def get_orders(self, order_ids):
+        self.queries.append(("orders", list(order_ids)))
+        return {oid: next((o for o in ORDERS if o["order_id"] == oid), None) for oid in order_ids}
+
+    def get_orders_by_customer(self, customer_emails, limit=5):
+        self.queries.append(("customers", list(customer_emails)))
+        return {email: [o for o in ORDERS if o["customer_email"] == email][:limit] for email in customer_emails}
+
+
+@pytest.fixture
+def lookup():
+    return OrderLookup(CustomerOrderCache())
+
+
+def test_order_id_without_sender_is_not_resolved(lookup):
+    db = FakeOrders()
+    assert lookup.lookup("Where is my refund for ORD-12345?", db) == empty_order_context()
+    assert db.queries == []
+
+
+def test_order_id_owned_by_sender_is_resolved(lookup):
+    context = lookup.lookup("Where is my refund for ORD-12345?", FakeOrders(), "Alice <Alice@example.com>")
+    assert context["found"]
+    assert context["orders"][0]["order_id"] == "ORD-12345"
+    assert context["refund"]["refund_amount"] == 899.99
+
+
+def test_order_id_owned_by_someone_else_falls_back_to_sender_orders(lookup):
+    context = lookup.lookup("Refund ORD-12346 please", FakeOrders(), "alice@example.com")
+    assert [order["order_id"] for order in context["orders"]] == ["ORD-12345"]
+
+
+def test_resolve_many_skips_order_ids_of_anonymous_emails(lookup):
+    from src.orders import order_key
+
+    db = FakeOrders()
+    keys = [order_key("ORD-12346 is late"), order_key("ORD-12345 is late", "alice@example.com")]
+    contexts = lookup.resolve_many(keys, db)
+
+    assert contexts[keys[0]] == empty_order_context()
+    assert contexts[keys[1]]["orders"][0]["order_id"] == "ORD-12345"
+    assert ("orders", ["ORD-12346"]) not in db.queries
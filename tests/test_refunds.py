@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from src.database import DatabaseConnector
+from src.refunds import REFUND_REASONS, calculate_refunds, random_returns, refund_reasons
+
+
+@pytest.fixture(scope="module")
+def scalar():
+    # calculate_refund is pure; skip __init__ so no MongoDB connection is opened
+    return DatabaseConnector.__new__(DatabaseConnector)
+
+
+def assert_matches_scalar(scalar, amounts, days, conditions):
+    bulk = calculate_refunds(amounts, days, conditions)
+    reasons = refund_reasons(bulk["reason_code"])
+
+    for i in range(len(amounts)):
+        expected = scalar.calculate_refund(float(amounts[i]), int(days[i]), conditions[i])
+        actual = {
+            "original_amount": float(bulk["original_amount"][i]),
+            "refund_amount": float(bulk["refund_amount"][i]),
+            "refund_percentage": float(bulk["refund_percentage"][i]),
+            "eligible": bool(bulk["eligible"][i]),
+            "reason": reasons[i],
+        }
+        assert actual == expected, f"row {i}: amount={amounts[i]!r} days={days[i]} condition={conditions[i]!r}"
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_matches_scalar_on_random_returns(scalar, seed):
+    amounts, days, conditions = random_returns(20_000, seed)
+    assert_matches_scalar(scalar, amounts, days, conditions)
+
+
+def test_matches_scalar_on_boundaries(scalar):
+    boundary_days = [-1, 0, 13, 14, 15, 29, 30, 31, 365]
+    conditions = ["unused", "used", "damaged", "opened", "", "DAMAGED"]
+    amounts = [0.0, 0.005, 0.015, 1.005, 2.675, 19.995, 899.99, 1199.99]
+
+    grid = [(a, d, c) for a in amounts for d in boundary_days for c in conditions]
+    amounts, days, conditions = (np.array(column, dtype=object) for column in zip(*grid))
+    assert_matches_scalar(scalar, amounts.astype(np.float64), days.astype(np.int64), conditions)
+
+
+def test_reason_codes_cover_every_rule():
+    bulk = calculate_refunds([100.0] * 5, [40, 20, 5, 5, 5], ["unused", "unused", "used", "damaged", "unused"])
+    assert refund_reasons(bulk["reason_code"]) == REFUND_REASONS
+
+
+def test_rejects_mismatched_lengths():
+    with pytest.raises(ValueError):
+        calculate_refunds([1.0, 2.0], [1], ["unused", "used"])
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("faiss")
+
+from src.semantic_cache import SemanticResponseCache
+
+
+RETURN_POLICY = {"return_policy": {"days_allowed": 30}}
+OTHER_CONTEXT = {"return_policy": {"days_allowed": 30}, "damage_protocol": {"steps": ["photo"]}}
+
+
+def vector(seed, dim=16):
+    return SemanticResponseCache._normalize(np.random.default_rng(seed).normal(size=dim))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SemanticResponseCache(embeddings=None, cache_dir=str(tmp_path), threshold=0.9, max_entries=4)
+
+
+def test_hit_requires_same_context(cache):
+    cache.put(vector(1), "product_return", RETURN_POLICY, "email", "reply")
+
+    assert cache.lookup(vector(1), "product_return", RETURN_POLICY) == "reply"
+    assert cache.lookup(vector(1), "product_return", OTHER_CONTEXT) is None
+    assert cache.lookup(vector(1), "general", RETURN_POLICY) is None
+    assert cache.lookup(vector(2), "product_return", RETURN_POLICY) is None
+
+
+def test_contexts_do_not_evict_each_other(cache):
+    cache.put(vector(1), "product_return", RETURN_POLICY, "a", "reply a")
+    cache.put(vector(2), "product_return", OTHER_CONTEXT, "b", "reply b")
+    cache.put(vector(3), "product_return", RETURN_POLICY, "c", "reply c")
+
+    assert cache.lookup(vector(1), "product_return", RETURN_POLICY) == "reply a"
+    assert cache.lookup(vector(2), "product_return", OTHER_CONTEXT) == "reply b"
+    assert cache.lookup(vector(3), "product_return", RETURN_POLICY) == "reply c"
+    assert cache.stats()["evicted"] == 0
+
+
+def test_size_bound_evicts_least_recently_used_across_contexts(cache):
+    for seed in range(4):
+        context = RETURN_POLICY if seed % 2 else OTHER_CONTEXT
+        cache.put(vector(seed), "product_return", context, str(seed), f"reply {seed}")
+    assert cache.lookup(vector(0), "product_return", OTHER_CONTEXT) == "reply 0"
+
+    cache.put(vector(9), "product_return", RETURN_POLICY, "9", "reply 9")
+
+    stats = cache.stats()
+    assert stats["evicted"] == 1
+    assert stats["size"] == {"product_return": 4}
+    assert cache.lookup(vector(1), "product_return", RETURN_POLICY) is None
+    assert cache.lookup(vector(0), "product_return", OTHER_CONTEXT) == "reply 0"
+
+
+def test_invalidate_drops_every_context_of_a_type(cache):
+    cache.put(vector(1), "product_return", RETURN_POLICY, "a", "reply a")
+    cache.put(vector(2), "product_return", OTHER_CONTEXT, "b", "reply b")
+    cache.put(vector(3), "general", RETURN_POLICY, "c", "reply c")
+
+    assert cache.invalidate("product_return") == 2
+    assert cache.stats()["size"] == {"general": 1}
+    assert cache.lookup(vector(3), "general", RETURN_POLICY) == "reply c"
+
+
+def test_save_and_load_round_trip(cache, tmp_path):
+    cache.put(vector(1), "product_return", RETURN_POLICY, "a", "reply a")
+    cache.put(vector(2), "product_return", OTHER_CONTEXT, "b", "reply b")
+    cache.save()
+
+    reloaded = SemanticResponseCache(embeddings=None, cache_dir=str(tmp_path), threshold=0.9)
+    assert reloaded.lookup(vector(1), "product_return", RETURN_POLICY) == "reply a"
+    assert reloaded.lookup(vector(2), "product_return", OTHER_CONTEXT) == "reply b"
@@ -0,0 +1,105 @@
+import threading
+import time
+
+import mongomock
+import pytest
+
+from src.snapshot import CatalogSnapshot, bump_catalog_version
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def db():
+    db = mongomock.MongoClient()['snapshot_test']
+    db.policies.insert_one({"policy_type": "return", "days_allowed": 30})
+    db.products.insert_one({"product_id": "P-1", "name": "Premium Laptop 15 inch", "category": "electronics", "price": 899.99})
+    return db
+
+
+@pytest.fixture
+def snapshot(db):
+    snapshot = CatalogSnapshot(db, ttl_seconds=3600, check_interval=3600, watch=False)
+    snapshot.reload()
+    return snapshot
+
+
+def test_lookups(snapshot):
+    assert snapshot.return_policy()['days_allowed'] == 30
+    assert snapshot.product("P-1")['name'] == "Premium Laptop 15 inch"
+    assert snapshot.product_by_name("laptop")['product_id'] == "P-1"
+
+
+def test_exact_name_lookup_rejects_fuzzy_matches(snapshot):
+    assert snapshot.product_by_name("premium lpatop") is None
+    assert snapshot.search_products("premium lpatop")[0][0]['product_id'] == "P-1"
+
+
+def test_writes_wait_for_invalidate(db, snapshot):
+    db.policies.update_one({"policy_type": "return"}, {"$set": {"days_allowed": 14}})
+    assert snapshot.return_policy()['days_allowed'] == 30
+
+    snapshot.invalidate()
+    assert snapshot.return_policy()['days_allowed'] == 14
+
+
+def test_failed_reload_keeps_previous_catalog(db, snapshot, monkeypatch):
+    monkeypatch.setattr(snapshot, "_version", lambda: 1 / 0)
+    snapshot.invalidate()
+    assert snapshot.return_policy()['days_allowed'] == 30
+    assert snapshot.stats()["reload_errors"] == 1
+
+
+def test_version_bump_marks_stale(db, snapshot):
+    db.products.update_one({"product_id": "P-1"}, {"$set": {"price": 799.99}})
+    assert not snapshot.is_stale()
+
+    bump_catalog_version(db)
+    assert snapshot.is_stale()
+    snapshot.reload()
+    assert snapshot.product("P-1")['price'] == 799.99
+
+
+def test_ttl_expiry_marks_stale(db, snapshot):
+    db.products.insert_one({"product_id": "P-2", "name": "Smart Watch", "category": "electronics"})
+    snapshot.ttl_seconds = 0
+    assert snapshot.is_stale()
+    snapshot.reload()
+    assert snapshot.product("P-2")['name'] == "Smart Watch"
+
+
+def test_background_start_debounces_reload_requests(db):
+    snapshot = CatalogSnapshot(db, ttl_seconds=3600, check_interval=3600, watch=False, debounce_seconds=0.2)
+    snapshot.start()
+    try:
+        assert wait_until(snapshot.ready)
+
+        for _ in range(10):
+            snapshot.request_reload()
+        assert wait_until(lambda: snapshot.stats()["reloads"] >= 2)
+        # The burst was consumed by that one reload; nothing else is queued
+        assert not snapshot._reload_requested.is_set()
+        assert snapshot.stats()["reloads"] == 2
+    finally:
+        snapshot.stop()
+
+
+def test_hit_counter_is_thread_safe(snapshot):
+    def lookups():
+        for _ in range(5000):
+            snapshot.product("P-1")
+
+    threads = [threading.Thread(target=lookups) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert snapshot.stats()["hits"] == 8 * 5000
@@ -0,0 +1,81 @@
+from collections import Counter
+from itertools import chain
+
+import numpy as np
+import pytest
+
+pytest.importorskip("tensorflow")
+from tensorflow.keras.preprocessing.sequence import pad_sequences
+from tensorflow.keras.preprocessing.text import Tokenizer
+
+from normalizer import clean_texts
+from vocabulary import Vocabulary, verify_conversion
+
+
+TRAIN_TEXTS = clean_texts([
+    "Free entry in 2 a wkly comp to win FA Cup final tkts",
+    "U dun say so early hor... U c already then say...",
+    "Nah I don't think he goes to usf, he lives around here though",
+    "WINNER!! As a valued network customer you have been selected to receive a prize reward",
+    "Had your mobile 11 months or more? Update to the latest colour mobiles with camera for free",
+    "I'm gonna be home soon and i don't want to talk about this stuff anymore tonight",
+    "SIX chances to win CASH! From 100 to 20,000 pounds txt CSH11 and send to 87575",
+    "URGENT! You have won a 1 week FREE membership in our prize Jackpot",
+])
+
+QUERY_TEXTS = TRAIN_TEXTS + [
+    "unseenword free prize",
+    "win win win to to the",
+    "",
+    "Mixed CASE and punctuation: free!!! prize?? (win)",
+]
+
+
+@pytest.fixture(scope="module", params=[None, 20])
+def tokenizer(request):
+    tokenizer = Tokenizer(num_words=request.param, oov_token='<OOV>')
+    tokenizer.fit_on_texts(TRAIN_TEXTS)
+    return tokenizer
+
+
+def test_conversion_gives_identical_sequences(tokenizer):
+    vocabulary = Vocabulary.from_keras_tokenizer(tokenizer)
+    # Every known word too, so words past num_words must map to OOV
+    texts = QUERY_TEXTS + list(tokenizer.word_index)
+
+    assert verify_conversion(tokenizer, vocabulary, texts) == []
+
+
+def test_saved_vocabulary_loads_memory_mapped(tokenizer, tmp_path):
+    path = str(tmp_path / "vocab.npy")
+    Vocabulary.from_keras_tokenizer(tokenizer).save(path)
+    loaded = Vocabulary.load(path)
+
+    assert isinstance(loaded.words, np.memmap)
+    assert verify_conversion(tokenizer, loaded, QUERY_TEXTS) == []
+
+
+def test_encode_batch_matches_padded_keras_sequences(tokenizer):
+    vocabulary = Vocabulary.from_keras_tokenizer(tokenizer)
+    expected = pad_sequences(
+        tokenizer.texts_to_sequences(QUERY_TEXTS), maxlen=6, padding='post', truncating='post'
+    )
+
+    encoded = vocabulary.encode_batch(QUERY_TEXTS, max_length=6)
+    assert encoded.dtype == np.int32
+    np.testing.assert_array_equal(encoded, expected)
+
+
+def test_streaming_counts_build_the_fitted_tokenizer():
+    from streaming import tokenizer_from_counts
+
+    words = [text.split() for text in TRAIN_TEXTS]
+    word_counts = Counter(chain.from_iterable(words))
+    word_docs = Counter(chain.from_iterable(set(seq) for seq in words))
+
+    fitted = Tokenizer(num_words=20, oov_token='<OOV>')
+    fitted.fit_on_texts(TRAIN_TEXTS)
+    streamed = tokenizer_from_counts(word_counts, word_docs, len(TRAIN_TEXTS), max_words=20)
+
+    assert streamed.word_index == fitted.word_index
+    assert streamed.texts_to_sequences(QUERY_TEXTS) == fitted.texts_to_sequences(QUERY_TEXTS)